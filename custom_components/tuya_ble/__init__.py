@@ -2,6 +2,9 @@
 from __future__ import annotations
 
 import logging
+import time
+
+import voluptuous as vol
 
 from bleak_retry_connector import BLEAK_RETRY_EXCEPTIONS as BLEAK_EXCEPTIONS, get_device
 
@@ -10,19 +13,23 @@ from homeassistant.components.bluetooth import BluetoothScanningMode
 from homeassistant.components.bluetooth.match import ADDRESS, BluetoothCallbackMatcher
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_ADDRESS, EVENT_HOMEASSISTANT_STOP, Platform
-from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.core import Event, HomeAssistant, ServiceCall, callback
 from homeassistant.exceptions import ConfigEntryNotReady
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.typing import ConfigType
 
 from .tuya_ble import TuyaBLEDevice
 
 from .cloud import HASSTuyaBLEDeviceManager
-from .const import DOMAIN
+from .const import DOMAIN, SERVICE_EXPORT_TRACE
 from .devices import (
     TuyaBLECoordinator,
     TuyaBLEData,
     TuyaBLEPassiveCoordinator,
     get_device_product_info,
 )
+from .snapshot import TuyaBLESnapshotStore, async_remove_snapshot
+from .startup import TuyaBLEStartupScheduler, device_has_controls
 
 PLATFORMS: list[Platform] = [
     Platform.BUTTON,
@@ -37,6 +44,25 @@ PLATFORMS: list[Platform] = [
 
 _LOGGER = logging.getLogger(__name__)
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+EXPORT_TRACE_SCHEMA = vol.Schema({vol.Optional(CONF_ADDRESS): cv.string})
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the Tuya BLE services."""
+
+    async def _async_export_trace(call: ServiceCall) -> None:
+        await _async_export_traces(hass, call.data.get(CONF_ADDRESS))
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_EXPORT_TRACE,
+        _async_export_trace,
+        schema=EXPORT_TRACE_SCHEMA,
+    )
+    return True
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Tuya BLE from a config entry."""
@@ -55,7 +81,13 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     if product_info is None:
         raise ConfigEntryNotReady(f"Could not determine product info for Tuya BLE device with address {address}")
 
+    # Entities render the last known values until the device reports
+    snapshot = TuyaBLESnapshotStore(hass, entry.entry_id, device)
+    await snapshot.async_restore()
+    entry.async_on_unload(snapshot.async_start())
+
     coordinator = TuyaBLEPassiveCoordinator(hass, _LOGGER, address, device)
+    entry.async_on_unload(coordinator.async_shutdown)
 
     '''
     try:
@@ -65,7 +97,12 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             f"Could not communicate with Tuya BLE device with address {address}"
         ) from ex
     '''
-    hass.add_job(device.update())
+    # Staggered with first updates of other devices
+    entry.async_on_unload(
+        TuyaBLEStartupScheduler.async_get(hass).async_schedule(
+            device, device_has_controls(device)
+        )
+    )
 
     @callback
     def _async_update_ble(
@@ -107,6 +144,35 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return True
 
 
+def _write_trace_file(path: str, data: bytes) -> None:
+    with open(path, "wb") as file:
+        file.write(data)
+
+
+async def _async_export_traces(hass: HomeAssistant, address: str | None) -> None:
+    """Save packet traces of devices to the configuration directory."""
+    data: TuyaBLEData
+    for data in hass.data.get(DOMAIN, {}).values():
+        device = data.device
+        if address and device.address.upper() != address.upper():
+            continue
+        if device.trace is None:
+            continue
+        # Exported in the event loop, the recorder is not thread safe
+        trace = device.trace.export()
+        path = hass.config.path(
+            "tuya_ble_trace_%s_%s.bin"
+            % (device.address.replace(":", "").lower(), int(time.time()))
+        )
+        await hass.async_add_executor_job(_write_trace_file, path, trace)
+        _LOGGER.info(
+            "%s: Saved trace of %s packets to %s",
+            device.address,
+            len(device.trace),
+            path,
+        )
+
+
 async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Handle options update."""
     data: TuyaBLEData = hass.data[DOMAIN][entry.entry_id]
@@ -114,6 +180,11 @@ async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> Non
         await hass.config_entries.async_reload(entry.entry_id)
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove a config entry."""
+    await async_remove_snapshot(hass, entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
@@ -21,7 +21,7 @@ from homeassistant.components.bluetooth.passive_update_coordinator import Passiv
 from .const import (
     DOMAIN,
 )
-from .devices import TuyaBLEData, TuyaBLEEntity, TuyaBLEProductInfo, TuyaBLEPassiveCoordinator
+from .devices import TuyaBLEData, TuyaBLEEntity, TuyaBLEProductInfo, TuyaBLEPassiveCoordinator, get_mapping_datapoint_ids
 from .tuya_ble import TuyaBLEDataPointType, TuyaBLEDevice
 
 _LOGGER = logging.getLogger(__name__)
@@ -45,6 +45,8 @@ class TuyaBLEBinarySensorMapping:
     #coefficient: float = 1.0
     #icons: list[str] | None = None
     is_available: TuyaBLEBinarySensorIsAvailable = None
+    # Other datapoints read to render the entity, like by is_available
+    extra_dp_ids: tuple[int, ...] = ()
 
 
 @dataclass
@@ -180,7 +182,14 @@ class TuyaBLEBinarySensor(RestoreEntity, TuyaBLEEntity, BinarySensorEntity):
         product: TuyaBLEProductInfo,
         mapping: TuyaBLEBinarySensorMapping,
     ) -> None:
-        super().__init__(hass, coordinator, device, product, mapping.description)
+        super().__init__(
+            hass,
+            coordinator,
+            device,
+            product,
+            mapping.description,
+            get_mapping_datapoint_ids(mapping, product),
+        )
         self._mapping = mapping
 
     async def async_added_to_hass(self):
@@ -206,7 +215,7 @@ class TuyaBLEBinarySensor(RestoreEntity, TuyaBLEEntity, BinarySensorEntity):
                 self._attr_is_on = bool((value >> self._mapping.bit) & 1)
             elif datapoint is not None and datapoint.value is not None:
                 self._attr_is_on = bool(datapoint.value)
-        self.async_write_ha_state()
+        self.async_write_ha_state_if_changed()
 
 
 async def async_setup_entry(
@@ -19,7 +19,7 @@ from homeassistant.components.bluetooth.passive_update_coordinator import Passiv
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
 from .const import DOMAIN
-from .devices import TuyaBLEData, TuyaBLEEntity, TuyaBLEProductInfo, TuyaBLEPassiveCoordinator
+from .devices import TuyaBLEData, TuyaBLEEntity, TuyaBLEProductInfo, TuyaBLEPassiveCoordinator, get_mapping_datapoint_ids
 from .tuya_ble import TuyaBLEDataPointType, TuyaBLEDevice
 
 _LOGGER = logging.getLogger(__name__)
@@ -36,6 +36,8 @@ class TuyaBLEButtonMapping:
     dp_type: TuyaBLEDataPointType | None = None
     is_available: TuyaBLEButtonIsAvailable = None
     value: str | None = None
+    # Other datapoints read to render the entity, like by is_available
+    extra_dp_ids: tuple[int, ...] = ()
 
 
 def is_fingerbot_in_push_mode(self: TuyaBLEButton, product: TuyaBLEProductInfo) -> bool:
@@ -143,10 +145,17 @@ class TuyaBLEButton(TuyaBLEEntity, ButtonEntity):
         product: TuyaBLEProductInfo,
         mapping: TuyaBLEButtonMapping,
     ) -> None:
-        super().__init__(hass, coordinator, device, product, mapping.description)
+        super().__init__(
+            hass,
+            coordinator,
+            device,
+            product,
+            mapping.description,
+            get_mapping_datapoint_ids(mapping, product),
+        )
         self._mapping = mapping
 
-    def press(self) -> None:
+    async def async_press(self) -> None:
         """Press the button."""
         if (
             self._mapping.dp_type == TuyaBLEDataPointType.DT_RAW
@@ -163,7 +172,7 @@ class TuyaBLEButton(TuyaBLEEntity, ButtonEntity):
                 raw_value,
             )
             if datapoint:
-                self._hass.create_task(datapoint.set_value(raw_value))
+                await self._async_send(datapoint.set_value(raw_value))
         else:
             datapoint = self._device.datapoints.get_or_create(
                 self._mapping.dp_id,
@@ -171,7 +180,7 @@ class TuyaBLEButton(TuyaBLEEntity, ButtonEntity):
                 False,
             )
             if datapoint:
-                self._hass.create_task(datapoint.set_value(not bool(datapoint.value)))
+                await self._async_send(datapoint.set_value(not bool(datapoint.value)))
 
     @property
     def is_available(self) -> bool:
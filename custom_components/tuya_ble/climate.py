@@ -24,8 +24,8 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
 from .const import DOMAIN
-from .devices import TuyaBLEData, TuyaBLEEntity, TuyaBLEProductInfo, TuyaBLEPassiveCoordinator
-from .tuya_ble import TuyaBLEDataPoint, TuyaBLEDataPointType, TuyaBLEDevice
+from .devices import TuyaBLEData, TuyaBLEEntity, TuyaBLEProductInfo, TuyaBLEPassiveCoordinator, TuyaBLEWriteDebouncer
+from .tuya_ble import TuyaBLEDataPointType, TuyaBLEDevice
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -58,6 +58,9 @@ class TuyaBLEClimateMapping:
     target_humidity_max: float = 100.0
     target_humidity_min: float = 0.0
 
+    # Send only the last target set within this time, 0 sends at once
+    write_debounce_ms: int = 0
+
 
 @dataclass
 class TuyaBLECategoryClimateMapping:
@@ -124,6 +127,7 @@ mapping: dict[str, TuyaBLECategoryClimateMapping] = {
                     target_temperature_dp_id=103,
                     target_temperature_min=5.0,
                     target_temperature_max=30.0,
+                    write_debounce_ms=1000,
                     ),
                 ],
             ),
@@ -157,7 +161,20 @@ class TuyaBLEClimate(TuyaBLEEntity, ClimateEntity):
         product: TuyaBLEProductInfo,
         mapping: TuyaBLEClimateMapping,
     ) -> None:
-        super().__init__(hass, coordinator, device, product, mapping.description)
+        dp_ids = {
+            mapping.hvac_mode_dp_id,
+            mapping.hvac_switch_dp_id,
+            mapping.current_temperature_dp_id,
+            mapping.target_temperature_dp_id,
+            mapping.current_humidity_dp_id,
+            mapping.target_humidity_dp_id,
+        }
+        if mapping.preset_mode_dp_ids:
+            dp_ids.update(mapping.preset_mode_dp_ids.values())
+        dp_ids.discard(0)
+        super().__init__(
+            hass, coordinator, device, product, mapping.description, dp_ids
+        )
         self._mapping = mapping
         self._attr_hvac_mode = HVACMode.HEAT
         self._attr_preset_mode = PRESET_NONE
@@ -184,6 +201,21 @@ class TuyaBLEClimate(TuyaBLEEntity, ClimateEntity):
             self._attr_max_humidity = mapping.target_humidity_max
             self._attr_min_humidity = mapping.target_humidity_min
 
+        self._pending_temperature: float | None = None
+        self._pending_humidity: int | None = None
+        self._write_debouncer: TuyaBLEWriteDebouncer | None = None
+        if mapping.write_debounce_ms > 0:
+            self._write_debouncer = TuyaBLEWriteDebouncer(
+                hass,
+                mapping.write_debounce_ms / 1000,
+                self._async_write_pending_targets,
+            )
+
+    async def async_will_remove_from_hass(self) -> None:
+        await super().async_will_remove_from_hass()
+        if self._write_debouncer is not None:
+            self._write_debouncer.async_cancel()
+
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
@@ -195,7 +227,10 @@ class TuyaBLEClimate(TuyaBLEEntity, ClimateEntity):
                     datapoint.value / self._mapping.current_temperature_coefficient
                 )
 
-        if self._mapping.target_temperature_dp_id != 0:
+        if (
+            self._mapping.target_temperature_dp_id != 0
+            and self._pending_temperature is None
+        ):
             datapoint = self._device.datapoints[self._mapping.target_temperature_dp_id]
             if datapoint:
                 self._attr_target_temperature = (
@@ -209,7 +244,10 @@ class TuyaBLEClimate(TuyaBLEEntity, ClimateEntity):
                     datapoint.value / self._mapping.current_humidity_coefficient
                 )
 
-        if self._mapping.target_humidity_dp_id != 0:
+        if (
+            self._mapping.target_humidity_dp_id != 0
+            and self._pending_humidity is None
+        ):
             datapoint = self._device.datapoints[self._mapping.target_humidity_dp_id]
             if datapoint:
                 self._attr_target_humidity = (
@@ -252,13 +290,25 @@ class TuyaBLEClimate(TuyaBLEEntity, ClimateEntity):
         except:
             pass
 
-        self.async_write_ha_state()
+        self.async_write_ha_state_if_changed()
 
     async def async_set_temperature(self, **kwargs) -> None:
         """Set new target temperature."""
+        if self._mapping.target_temperature_dp_id != 0:
+            if self._write_debouncer is not None:
+                self._pending_temperature = kwargs["temperature"]
+                self._attr_target_temperature = self._pending_temperature
+                self.async_write_ha_state()
+                await self._async_send(self._write_debouncer.async_call())
+                return
+            await self._async_send(
+                self._async_write_temperature(kwargs["temperature"])
+            )
+
+    async def _async_write_temperature(self, temperature: float) -> None:
         if self._mapping.target_temperature_dp_id != 0:
             int_value = int(
-                kwargs["temperature"] * self._mapping.target_temperature_coefficient
+                temperature * self._mapping.target_temperature_coefficient
             )
             datapoint = self._device.datapoints.get_or_create(
                 self._mapping.target_temperature_dp_id,
@@ -266,10 +316,20 @@ class TuyaBLEClimate(TuyaBLEEntity, ClimateEntity):
                 int_value,
             )
             if datapoint:
-                self._hass.create_task(datapoint.set_value(int_value))
+                await datapoint.set_value(int_value)
 
     async def async_set_humidity(self, humidity: int) -> None:
         """Set new target humidity."""
+        if self._mapping.target_humidity_dp_id != 0:
+            if self._write_debouncer is not None:
+                self._pending_humidity = humidity
+                self._attr_target_humidity = humidity
+                self.async_write_ha_state()
+                await self._async_send(self._write_debouncer.async_call())
+                return
+            await self._async_send(self._async_write_humidity(humidity))
+
+    async def _async_write_humidity(self, humidity: int) -> None:
         if self._mapping.target_humidity_dp_id != 0:
             int_value = int(humidity * self._mapping.target_humidity_coefficient)
             datapoint = self._device.datapoints.get_or_create(
@@ -278,7 +338,19 @@ class TuyaBLEClimate(TuyaBLEEntity, ClimateEntity):
                 int_value,
             )
             if datapoint:
-                self._hass.create_task(datapoint.set_value(int_value))
+                await datapoint.set_value(int_value)
+
+    async def _async_write_pending_targets(self) -> None:
+        """Send targets set while the debouncer was waiting."""
+        temperature = self._pending_temperature
+        humidity = self._pending_humidity
+        self._pending_temperature = None
+        self._pending_humidity = None
+        async with self._device.datapoints.batch():
+            if temperature is not None:
+                await self._async_write_temperature(temperature)
+            if humidity is not None:
+                await self._async_write_humidity(humidity)
 
     async def async_set_hvac_mode(self, hvac_mode: HVACMode) -> None:
         """Set new target hvac mode."""
@@ -294,7 +366,7 @@ class TuyaBLEClimate(TuyaBLEEntity, ClimateEntity):
                 int_value,
             )
             if datapoint:
-                self._hass.create_task(datapoint.set_value(int_value))
+                await self._async_send(datapoint.set_value(int_value))
         elif self._mapping.hvac_switch_dp_id != 0 and self._mapping.hvac_switch_mode:
             bool_value = hvac_mode == self._mapping.hvac_switch_mode
             datapoint = self._device.datapoints.get_or_create(
@@ -303,30 +375,30 @@ class TuyaBLEClimate(TuyaBLEEntity, ClimateEntity):
                 bool_value,
             )
             if datapoint:
-                self._hass.create_task(datapoint.set_value(bool_value))
+                await self._async_send(datapoint.set_value(bool_value))
 
     async def async_set_preset_mode(self, preset_mode: str) -> None:
         """Set new preset mode."""
-        if self._mapping.preset_mode_dp_ids:
-            datapoint: TuyaBLEDataPoint | None = None
-            bool_value = False
+        await self._async_send(self._async_write_preset_mode(preset_mode))
 
+    async def _async_write_preset_mode(self, preset_mode: str) -> None:
+        if self._mapping.preset_mode_dp_ids:
             keys = [x for x in self._mapping.preset_mode_dp_ids.keys()]
             values = [
                 x for x in self._mapping.preset_mode_dp_ids.values()
             ]  # Get all DP IDs
-            # TRVs with only Away and None modes can be set with a single datapoint and use a single DP ID
-            if all(values[0] == elem for elem in values) and keys[0] == PRESET_AWAY:
-                for dp_id in values:
+            async with self._device.datapoints.batch():
+                # TRVs with only Away and None modes can be set with a single datapoint and use a single DP ID
+                if all(values[0] == elem for elem in values) and keys[0] == PRESET_AWAY:
                     bool_value = preset_mode == PRESET_AWAY
                     datapoint = self._device.datapoints.get_or_create(
-                        dp_id,
+                        values[0],
                         TuyaBLEDataPointType.DT_BOOL,
                         bool_value,
                     )
-                    break
-            else:
-                if self._mapping.preset_mode_dp_ids:
+                    if datapoint:
+                        await datapoint.set_value(bool_value)
+                else:
                     for (
                         dp_preset_mode,
                         dp_id,
@@ -337,8 +409,8 @@ class TuyaBLEClimate(TuyaBLEEntity, ClimateEntity):
                             TuyaBLEDataPointType.DT_BOOL,
                             bool_value,
                         )
-            if datapoint:
-                self._hass.create_task(datapoint.set_value(bool_value))
+                        if datapoint:
+                            await datapoint.set_value(bool_value)
 
 
 async def async_setup_entry(
@@ -1,10 +1,13 @@
-"""The Tuya BLE integration."""
+"""Credentials of Tuya BLE devices fetched from Tuya cloud."""
 from __future__ import annotations
 
+import asyncio
 import logging
 
 from dataclasses import dataclass
+import hashlib
 import json
+import time
 from typing import Any, Iterable
 
 from homeassistant.const import (
@@ -14,7 +17,7 @@ from homeassistant.const import (
     CONF_PASSWORD,
     CONF_USERNAME,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.components.tuya.const import (
     CONF_APP_TYPE,
     CONF_ENDPOINT,
@@ -22,19 +25,17 @@ from homeassistant.components.tuya.const import (
     TUYA_RESPONSE_RESULT,
     TUYA_RESPONSE_SUCCESS,
 )
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.entity import DeviceInfo, EntityDescription
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import (
     CoordinatorEntity,
     DataUpdateCoordinator,
 )
 
-from tuya_iot import (
-    TuyaOpenAPI,
-    AuthType,
-    TuyaOpenMQ,
-    TuyaDeviceManager,
-)
+from tuya_iot import AuthType
 
+from .cloud_api import TuyaCloudAPI
 from .tuya_ble import (
     AbstaractTuyaBLEDeviceManager,
     TuyaBLEDevice,
@@ -49,13 +50,17 @@ from .const import (
     CONF_PRODUCT_ID,
     CONF_DEVICE_NAME,
     CONF_PRODUCT_NAME,
+    CREDENTIALS_CACHE_TTL,
+    CREDENTIALS_SAVE_DELAY,
+    CREDENTIALS_STORAGE_VERSION,
     DOMAIN,
+    TUYA_API_CONCURRENCY,
     TUYA_API_DEVICES_URL,
+    TUYA_API_FACTORY_INFO_BATCH,
     TUYA_API_FACTORY_INFO_URL,
     TUYA_FACTORY_INFO_MAC,
-    TUYA_API_DEVICES_URL,
-    TUYA_API_FACTORY_INFO_URL,
-    TUYA_FACTORY_INFO_MAC,
+    TUYA_FILL_FAILURE_CACHE,
+    TUYA_LOGIN_FAILURE_CACHE,
     CONF_ACCESS_ID,
     CONF_ACCESS_SECRET,
     CONF_AUTH_TYPE,
@@ -65,11 +70,19 @@ from .const import (
 _LOGGER = logging.getLogger(__name__)
 
 
+CREDENTIALS_STORE = f"{DOMAIN}_credentials_store"
+
+
 @dataclass
 class TuyaCloudCacheItem:
-    api: TuyaOpenAPI | None
+    api: TuyaCloudAPI | None
     login: dict[str, Any]
     credentials: dict[str, dict[str, Any]]
+    # Time of the last fetch of credentials from the cloud
+    updated: float = 0.0
+    # Monotonic time of the last failed fetch of credentials
+    failed: float | None = None
+    refresh_task: asyncio.Task | None = None
 
 
 CONF_TUYA_LOGIN_KEYS = [
@@ -96,6 +109,97 @@ CONF_TUYA_DEVICE_KEYS = [
 
 _cache: dict[str, TuyaCloudCacheItem] = {}
 
+# Logins and fills in progress by cache key, awaited by concurrent callers
+_logins: dict[str, asyncio.Task] = {}
+_fills: dict[str, asyncio.Task] = {}
+# Time and response of recent failed logins by cache key
+_failed_logins: dict[str, tuple[float, dict[Any, Any]]] = {}
+# Cache key of the account and credentials by address of all devices
+_addresses: dict[str, tuple[str, dict[str, Any]]] = {}
+
+
+def _index_credentials(
+    cache_key: str, address: str, credentials: dict[str, Any]
+) -> None:
+    _addresses[address] = (cache_key, credentials)
+
+
+def _reindex_account(cache_key: str, item: TuyaCloudCacheItem) -> None:
+    """Replace indexed addresses of the account with its credentials."""
+    for address in [
+        address for address, (key, _) in _addresses.items() if key == cache_key
+    ]:
+        del _addresses[address]
+    for address, credentials in item.credentials.items():
+        _index_credentials(cache_key, address, credentials)
+
+
+class TuyaCloudCredentialsStore:
+    """Keeps credentials fetched from Tuya cloud across restarts.
+
+    Credentials of each account are saved under a hash of its login,
+    so the login itself is never written to disk.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        ttl: float = CREDENTIALS_CACHE_TTL,
+        save_delay: float = CREDENTIALS_SAVE_DELAY,
+    ) -> None:
+        self._store: Store[dict[str, Any]] = Store(
+            hass, CREDENTIALS_STORAGE_VERSION, f"{DOMAIN}.credentials"
+        )
+        self._ttl = ttl
+        self._save_delay = save_delay
+        self._accounts: dict[str, dict[str, Any]] | None = None
+        self._load_lock = asyncio.Lock()
+
+    @classmethod
+    async def async_get(cls, hass: HomeAssistant) -> TuyaCloudCredentialsStore:
+        """Get the loaded store shared by all config entries."""
+        store = hass.data.get(CREDENTIALS_STORE)
+        if store is None:
+            store = hass.data[CREDENTIALS_STORE] = cls(hass)
+        await store._async_load()
+        return store
+
+    async def _async_load(self) -> None:
+        async with self._load_lock:
+            if self._accounts is None:
+                self._accounts = await self._store.async_load() or {}
+
+    @staticmethod
+    def _get_login_hash(cache_key: str) -> str:
+        return hashlib.sha256(cache_key.encode()).hexdigest()
+
+    def is_expired(self, item: TuyaCloudCacheItem) -> bool:
+        """Whether credentials of the account should be fetched again."""
+        return time.time() - item.updated > self._ttl
+
+    def get(
+        self, cache_key: str, login: dict[str, Any]
+    ) -> TuyaCloudCacheItem | None:
+        """Create cache item from saved credentials of the account."""
+        account = self._accounts.get(self._get_login_hash(cache_key))
+        if account is None:
+            return None
+        return TuyaCloudCacheItem(
+            None,
+            login,
+            account.get("credentials", {}),
+            account.get("updated", 0.0),
+        )
+
+    @callback
+    def async_save(self, cache_key: str, item: TuyaCloudCacheItem) -> None:
+        """Save credentials of the account, writes are delayed."""
+        self._accounts[self._get_login_hash(cache_key)] = {
+            "updated": item.updated,
+            "credentials": item.credentials,
+        }
+        self._store.async_delay_save(lambda: self._accounts, self._save_delay)
+
 
 class HASSTuyaBLEDeviceManager(AbstaractTuyaBLEDeviceManager):
     """Cloud connected manager of the Tuya BLE devices credentials."""
@@ -112,6 +216,9 @@ class HASSTuyaBLEDeviceManager(AbstaractTuyaBLEDeviceManager):
     @staticmethod
     def _get_cache_key(data: dict[str, Any]) -> str:
         key_dict = {key: data.get(key) for key in CONF_TUYA_LOGIN_KEYS}
+        auth_type = key_dict[CONF_AUTH_TYPE]
+        if isinstance(auth_type, AuthType):
+            key_dict[CONF_AUTH_TYPE] = auth_type.value
         return json.dumps(key_dict)
 
     @staticmethod
@@ -135,21 +242,25 @@ class HASSTuyaBLEDeviceManager(AbstaractTuyaBLEDeviceManager):
         if len(data) == 0:
             return {}
 
-        api = TuyaOpenAPI(
-            endpoint=data.get(CONF_ENDPOINT, ""),
-            access_id=data.get(CONF_ACCESS_ID, ""),
-            access_secret=data.get(CONF_ACCESS_SECRET, ""),
-            auth_type=data.get(CONF_AUTH_TYPE, ""),
-        )
-        api.set_dev_channel("hass")
-
-        response = await self._hass.async_add_executor_job(
-            api.connect,
-            data.get(CONF_USERNAME, ""),
-            data.get(CONF_PASSWORD, ""),
-            data.get(CONF_COUNTRY_CODE, ""),
-            data.get(CONF_APP_TYPE, ""),
-        )
+        cache_key = self._get_cache_key(data)
+        failed_login = _failed_logins.get(cache_key)
+        if failed_login is not None:
+            failed_time, response = failed_login
+            if time.monotonic() - failed_time < TUYA_LOGIN_FAILURE_CACHE:
+                _LOGGER.debug(
+                    "Skipping login for %s, it failed recently",
+                    data.get(CONF_USERNAME),
+                )
+                return response
+            _failed_logins.pop(cache_key, None)
+
+        task = _logins.get(cache_key)
+        if task is None:
+            task = _logins[cache_key] = self._hass.async_create_task(
+                self._connect(data.copy(), cache_key)
+            )
+            task.add_done_callback(lambda _: _logins.pop(cache_key, None))
+        api, response = await asyncio.shield(task)
 
         if self._is_login_success(response):
             _LOGGER.debug("Successful login for %s", data[CONF_USERNAME])
@@ -167,6 +278,29 @@ class HASSTuyaBLEDeviceManager(AbstaractTuyaBLEDeviceManager):
 
         return response
 
+    async def _connect(
+        self, data: dict[str, Any], cache_key: str
+    ) -> tuple[TuyaCloudAPI, dict[Any, Any]]:
+        api = TuyaCloudAPI(
+            async_get_clientsession(self._hass),
+            endpoint=data.get(CONF_ENDPOINT, ""),
+            access_id=data.get(CONF_ACCESS_ID, ""),
+            access_secret=data.get(CONF_ACCESS_SECRET, ""),
+            auth_type=data.get(CONF_AUTH_TYPE) or AuthType.SMART_HOME,
+            dev_channel="cloud_hass",
+        )
+
+        response = await api.connect(
+            data.get(CONF_USERNAME, ""),
+            data.get(CONF_PASSWORD, ""),
+            data.get(CONF_COUNTRY_CODE, ""),
+            data.get(CONF_APP_TYPE, ""),
+        )
+        if not self._is_login_success(response):
+            _failed_logins[cache_key] = (time.monotonic(), response)
+
+        return api, response
+
     def _check_login(self) -> bool:
         cache_key = self._get_cache_key(self._data)
         return _cache.get(cache_key) != None
@@ -174,65 +308,211 @@ class HASSTuyaBLEDeviceManager(AbstaractTuyaBLEDeviceManager):
     async def login(self, add_to_cache: bool = False) -> dict[Any, Any]:
         return await self._login(self._data, add_to_cache)
 
-    async def _fill_cache_item(self, item: TuyaCloudCacheItem) -> None:
-        devices_response = await self._hass.async_add_executor_job(
-            item.api.get,
-            TUYA_API_DEVICES_URL % (item.api.token_info.uid),
-        )
-        if devices_response.get(TUYA_RESPONSE_SUCCESS):
-            devices = devices_response.get(TUYA_RESPONSE_RESULT)
-            if isinstance(devices, Iterable):
-                for device in devices:
-                    fi_response = await self._hass.async_add_executor_job(
-                        item.api.get,
-                        TUYA_API_FACTORY_INFO_URL % (device.get("id")),
-                    )
-                    fi_response_result = fi_response.get(TUYA_RESPONSE_RESULT)
-                    if fi_response_result and len(fi_response_result) > 0:
-                        factory_info = fi_response_result[0]
-                        if factory_info and (TUYA_FACTORY_INFO_MAC in factory_info):
-                            mac = ":".join(
-                                factory_info[TUYA_FACTORY_INFO_MAC][i : i + 2]
-                                for i in range(0, 12, 2)
-                            ).upper()
-                            item.credentials[mac] = {
-                                CONF_ADDRESS: mac,
-                                CONF_UUID: device.get("uuid"),
-                                CONF_LOCAL_KEY: device.get("local_key"),
-                                CONF_DEVICE_ID: device.get("id"),
-                                CONF_CATEGORY: device.get("category"),
-                                CONF_PRODUCT_ID: device.get("product_id"),
-                                CONF_DEVICE_NAME: device.get("name"),
-                                CONF_PRODUCT_MODEL: device.get("model"),
-                                CONF_PRODUCT_NAME: device.get("product_name"),
-                            }
+    async def _get_cache_item(
+        self, data: dict[str, Any]
+    ) -> TuyaCloudCacheItem | None:
+        """Get cache item of the account, loading saved credentials.
 
-    async def build_cache(self) -> None:
+        Expired credentials are returned as is and refreshed in the
+        background.
+        """
         global _cache
-        data = {}
+
+        if not self._has_login(data):
+            return None
+        cache_key = self._get_cache_key(data)
+        store = await TuyaCloudCredentialsStore.async_get(self._hass)
+        item = _cache.get(cache_key)
+        if item is None:
+            item = store.get(cache_key, data.copy())
+            if item is None:
+                return None
+            _cache[cache_key] = item
+            _reindex_account(cache_key, item)
+            _LOGGER.debug(
+                "Loaded %s saved credentials for %s",
+                len(item.credentials),
+                data[CONF_USERNAME],
+            )
+        if store.is_expired(item):
+            if (
+                item.failed is not None
+                and time.monotonic() - item.failed < TUYA_FILL_FAILURE_CACHE
+            ):
+                _LOGGER.debug(
+                    "Skipping refresh of credentials for %s, it failed recently",
+                    data[CONF_USERNAME],
+                )
+            else:
+                self._refresh_cache_item(item)
+        return item
+
+    @callback
+    def _refresh_cache_item(self, item: TuyaCloudCacheItem) -> None:
+        if item.refresh_task is None:
+            item.refresh_task = self._hass.async_create_background_task(
+                self._async_refresh_cache_item(item),
+                f"{DOMAIN} refresh credentials",
+            )
+
+    async def _async_refresh_cache_item(self, item: TuyaCloudCacheItem) -> None:
+        try:
+            if self._is_login_success(await self._login(item.login.copy(), True)):
+                await self._fill_cache_item(item)
+        except Exception:
+            _LOGGER.warning("Refreshing credentials failed", exc_info=True)
+        finally:
+            item.refresh_task = None
+
+    async def _fill_cache_item(
+        self, item: TuyaCloudCacheItem, address: str | None = None
+    ) -> None:
+        """Fill credentials of all devices of the account.
+
+        Factory infos are requested for batches of devices, a few batches at
+        once. If address is given, returns as soon as its credentials are
+        known and the rest of batches complete in the background. Callers
+        filling the same account at once share requests.
+        """
+        cache_key = self._get_cache_key(item.login)
+        fill = _fills.get(cache_key)
+        if fill is None:
+            fill = _fills[cache_key] = self._hass.async_create_task(
+                self._start_fill_cache_item(item, cache_key)
+            )
+        tasks = await asyncio.shield(fill)
+        tasks = {task for task in tasks if not task.done()}
+        while tasks:
+            if address is not None and address in item.credentials:
+                break
+            done, tasks = await asyncio.wait(
+                tasks, return_when=asyncio.FIRST_COMPLETED
+            )
+
+    async def _start_fill_cache_item(
+        self, item: TuyaCloudCacheItem, cache_key: str
+    ) -> set[asyncio.Task]:
+        """Request device list and start requests of factory infos."""
+        try:
+            devices_response = await item.api.get(
+                TUYA_API_DEVICES_URL % (item.api.token_info.uid)
+            )
+        except Exception:
+            item.failed = time.monotonic()
+            _fills.pop(cache_key, None)
+            raise
+        devices = devices_response.get(TUYA_RESPONSE_RESULT)
+        if not devices_response.get(TUYA_RESPONSE_SUCCESS) or not isinstance(
+            devices, Iterable
+        ):
+            item.failed = time.monotonic()
+            _fills.pop(cache_key, None)
+            return set()
+        item.updated = time.time()
+        item.failed = None
+
+        devices_by_id = {
+            device.get("id"): device for device in devices if device.get("id")
+        }
+        # Forget devices removed from the account
+        for address in [
+            address
+            for address, credentials in item.credentials.items()
+            if credentials.get(CONF_DEVICE_ID) not in devices_by_id
+        ]:
+            del item.credentials[address]
+        _reindex_account(cache_key, item)
+        ids = list(devices_by_id)
+        semaphore = asyncio.Semaphore(TUYA_API_CONCURRENCY)
+        tasks = {
+            self._hass.async_create_task(
+                self._fill_cache_item_batch(
+                    item,
+                    devices_by_id,
+                    ids[i : i + TUYA_API_FACTORY_INFO_BATCH],
+                    semaphore,
+                )
+            )
+            for i in range(0, len(ids), TUYA_API_FACTORY_INFO_BATCH)
+        }
+        remaining = set(tasks)
+
+        def _batch_done(task: asyncio.Task) -> None:
+            remaining.discard(task)
+            if not remaining:
+                _fills.pop(cache_key, None)
+
+        for task in tasks:
+            task.add_done_callback(_batch_done)
+        if not tasks:
+            _fills.pop(cache_key, None)
+        return tasks
+
+    async def _fill_cache_item_batch(
+        self,
+        item: TuyaCloudCacheItem,
+        devices_by_id: dict[str, dict[str, Any]],
+        ids: list[str],
+        semaphore: asyncio.Semaphore,
+    ) -> None:
+        async with semaphore:
+            try:
+                fi_response = await item.api.get(
+                    TUYA_API_FACTORY_INFO_URL % (",".join(ids))
+                )
+            except Exception:
+                # Other batches may still succeed
+                _LOGGER.warning(
+                    "Getting factory info of %s devices failed",
+                    len(ids),
+                    exc_info=True,
+                )
+                return
+        fi_response_result = fi_response.get(TUYA_RESPONSE_RESULT)
+        if not isinstance(fi_response_result, Iterable):
+            return
+        cache_key = self._get_cache_key(item.login)
+        for factory_info in fi_response_result:
+            if not factory_info or (TUYA_FACTORY_INFO_MAC not in factory_info):
+                continue
+            device = devices_by_id.get(factory_info.get("id"))
+            if device is None:
+                continue
+            mac = ":".join(
+                factory_info[TUYA_FACTORY_INFO_MAC][i : i + 2]
+                for i in range(0, 12, 2)
+            ).upper()
+            credentials = item.credentials[mac] = {
+                CONF_ADDRESS: mac,
+                CONF_UUID: device.get("uuid"),
+                CONF_LOCAL_KEY: device.get("local_key"),
+                CONF_DEVICE_ID: device.get("id"),
+                CONF_CATEGORY: device.get("category"),
+                CONF_PRODUCT_ID: device.get("product_id"),
+                CONF_DEVICE_NAME: device.get("name"),
+                CONF_PRODUCT_MODEL: device.get("model"),
+                CONF_PRODUCT_NAME: device.get("product_name"),
+            }
+            _index_credentials(cache_key, mac, credentials)
+        store = await TuyaCloudCredentialsStore.async_get(self._hass)
+        store.async_save(cache_key, item)
+
+    async def _build_cache_item(self, data: dict[str, Any]) -> None:
+        item = await self._get_cache_item(data)
+        if item is None or len(item.credentials) == 0:
+            if self._is_login_success(await self._login(data, True)):
+                item = _cache.get(self._get_cache_key(data))
+                if item and len(item.credentials) == 0:
+                    await self._fill_cache_item(item)
+
+    async def build_cache(self) -> None:
         tuya_config_entries = self._hass.config_entries.async_entries(TUYA_DOMAIN)
         for config_entry in tuya_config_entries:
-            data.clear()
-            data.update(config_entry.data)
-            key = self._get_cache_key(data)
-            item = _cache.get(key)
-            if item is None or len(item.credentials) == 0:
-                if self._is_login_success(await self._login(data, True)):
-                    item = _cache.get(key)
-                    if item and len(item.credentials) == 0:
-                        await self._fill_cache_item(item)
+            await self._build_cache_item(dict(config_entry.data))
 
         ble_config_entries = self._hass.config_entries.async_entries(DOMAIN)
         for config_entry in ble_config_entries:
-            data.clear()
-            data.update(config_entry.options)
-            key = self._get_cache_key(data)
-            item = _cache.get(key)
-            if item is None or len(item.credentials) == 0:
-                if self._is_login_success(await self._login(data, True)):
-                    item = _cache.get(key)
-                    if item and len(item.credentials) == 0:
-                        await self._fill_cache_item(item)
+            await self._build_cache_item(dict(config_entry.options))
 
     def get_login_from_cache(self) -> None:
         global _cache
@@ -258,18 +538,22 @@ class HASSTuyaBLEDeviceManager(AbstaractTuyaBLEDeviceManager):
             cache_key: str | None = None
             if self._has_login(self._data):
                 cache_key = self._get_cache_key(self._data)
+                item = await self._get_cache_item(self._data)
             else:
-                for key in _cache.keys():
-                    if _cache[key].credentials.get(address) is not None:
-                        cache_key = key
-                        break
-            if cache_key:
-                item = _cache.get(cache_key)
-            if item is None or force_update:
+                indexed = _addresses.get(address)
+                if indexed is not None:
+                    cache_key = indexed[0]
+                    item = _cache.get(cache_key)
+            if (
+                item is None
+                or force_update
+                # Saved credentials miss devices added since they were fetched
+                or (item.api is None and address not in item.credentials)
+            ):
                 if self._is_login_success(await self.login(True)):
                     item = _cache.get(cache_key)
                     if item:
-                        await self._fill_cache_item(item)
+                        await self._fill_cache_item(item, address)
 
             if item:
                 credentials = item.credentials.get(address)
@@ -0,0 +1,289 @@
+"""Asynchronous client of the Tuya OpenAPI used to fetch device credentials."""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+import hashlib
+import hmac
+import json
+import logging
+import time
+from typing import Any
+
+import aiohttp
+from yarl import URL
+
+from tuya_iot import AuthType
+
+from .const import (
+    TUYA_API_CUSTOM_LOGIN_URL,
+    TUYA_API_CUSTOM_REFRESH_TOKEN_URL,
+    TUYA_API_RETRY_ATTEMPTS,
+    TUYA_API_RETRY_DELAY,
+    TUYA_API_SMART_HOME_LOGIN_URL,
+    TUYA_API_SMART_HOME_REFRESH_TOKEN_URL,
+    TUYA_API_TIMEOUT,
+    TUYA_API_TOKEN_INVALID,
+    TUYA_API_TOKEN_REFRESH_MARGIN,
+)
+from .tuya_ble import TuyaBLERetryPolicy
+
+_LOGGER = logging.getLogger(__name__)
+
+# Statuses worth retrying, others are answered the same way again
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+@dataclass
+class TuyaCloudTokenInfo:
+    access_token: str
+    refresh_token: str
+    uid: str
+    # Milliseconds since epoch, as the cloud reports time
+    expire_time: int
+
+    @classmethod
+    def from_response(cls, response: dict[str, Any]) -> TuyaCloudTokenInfo:
+        result = response.get("result", {})
+        return cls(
+            result.get("access_token", ""),
+            result.get("refresh_token", ""),
+            result.get("uid", ""),
+            response.get("t", 0)
+            + result.get("expire", result.get("expire_time", 0)) * 1000,
+        )
+
+
+class TuyaCloudAPI:
+    """Asynchronous client of the Tuya OpenAPI endpoints used here.
+
+    Requests go through the given aiohttp session, so connections to the
+    endpoint are kept alive between requests. The access token is
+    refreshed before it expires, requests failed on network errors are
+    retried with backoff.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        endpoint: str,
+        access_id: str,
+        access_secret: str,
+        auth_type: AuthType | int = AuthType.SMART_HOME,
+        dev_channel: str = "",
+        lang: str = "en",
+        retry_policy: TuyaBLERetryPolicy | None = None,
+    ) -> None:
+        self._session = session
+        self._endpoint = endpoint
+        self._access_id = access_id
+        self._access_secret = access_secret
+        self._auth_type = AuthType(auth_type)
+        self._dev_channel = dev_channel
+        self._lang = lang
+        self._retry_policy = retry_policy or TuyaBLERetryPolicy(
+            attempts=TUYA_API_RETRY_ATTEMPTS,
+            initial_delay=TUYA_API_RETRY_DELAY,
+        )
+        self._login: tuple[str, str, str, str] | None = None
+        self._token_lock = asyncio.Lock()
+        self.token_info: TuyaCloudTokenInfo | None = None
+
+    @property
+    def _login_path(self) -> str:
+        if self._auth_type == AuthType.CUSTOM:
+            return TUYA_API_CUSTOM_LOGIN_URL
+        return TUYA_API_SMART_HOME_LOGIN_URL
+
+    @property
+    def is_connected(self) -> bool:
+        return self.token_info is not None and len(self.token_info.access_token) > 0
+
+    async def connect(
+        self,
+        username: str = "",
+        password: str = "",
+        country_code: str = "",
+        schema: str = "",
+    ) -> dict[str, Any]:
+        """Login into Tuya cloud, returns the login response."""
+        self._login = (username, password, country_code, schema)
+        if self._auth_type == AuthType.CUSTOM:
+            body = {
+                "username": username,
+                "password": hashlib.sha256(password.encode("utf8"))
+                .hexdigest()
+                .lower(),
+            }
+        else:
+            body = {
+                "username": username,
+                "password": hashlib.md5(password.encode("utf8")).hexdigest(),
+                "country_code": country_code,
+                "schema": schema,
+            }
+        response = await self._request_with_retry(
+            "POST", self._login_path, None, body, True
+        )
+        if response.get("success"):
+            self.token_info = TuyaCloudTokenInfo.from_response(response)
+        return response
+
+    async def get(
+        self, path: str, params: dict[str, Any] | None = None
+    ) -> dict[str, Any]:
+        return await self._request("GET", path, params, None)
+
+    async def post(
+        self, path: str, body: dict[str, Any] | None = None
+    ) -> dict[str, Any]:
+        return await self._request("POST", path, None, body)
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        params: dict[str, Any] | None,
+        body: dict[str, Any] | None,
+    ) -> dict[str, Any]:
+        await self._refresh_token_if_needed()
+        token_info = self.token_info
+        response = await self._request_with_retry(method, path, params, body)
+        if response.get("code") == TUYA_API_TOKEN_INVALID and self._login:
+            if await self._login_again(token_info):
+                response = await self._request_with_retry(method, path, params, body)
+        return response
+
+    async def _login_again(self, token_info: TuyaCloudTokenInfo | None) -> bool:
+        """Login again after token_info was rejected, returns if logged in."""
+        async with self._token_lock:
+            if self.token_info is not token_info and self.is_connected:
+                # Another request already logged in again meanwhile
+                return True
+            _LOGGER.debug("Access token is invalid, logging in again")
+            return bool((await self.connect(*self._login)).get("success"))
+
+    async def _refresh_token_if_needed(self) -> None:
+        async with self._token_lock:
+            if not self.is_connected:
+                return
+            now = int(time.time() * 1000)
+            if (
+                self.token_info.expire_time - TUYA_API_TOKEN_REFRESH_MARGIN * 1000
+                > now
+            ):
+                return
+            refresh_token = self.token_info.refresh_token
+            if self._auth_type == AuthType.CUSTOM:
+                method, path = "POST", TUYA_API_CUSTOM_REFRESH_TOKEN_URL
+            else:
+                method, path = "GET", TUYA_API_SMART_HOME_REFRESH_TOKEN_URL
+            response = await self._request_with_retry(
+                method, path % (refresh_token), None, None, True
+            )
+            if response.get("success"):
+                self.token_info = TuyaCloudTokenInfo.from_response(response)
+            elif self._login:
+                await self.connect(*self._login)
+
+    def _calculate_sign(
+        self,
+        method: str,
+        path: str,
+        params: dict[str, Any] | None,
+        body: dict[str, Any] | None,
+        access_token: str,
+    ) -> tuple[str, int]:
+        # https://developer.tuya.com/docs/iot/open-api/api-reference/singnature?id=Ka43a5mtx1gsc
+        content = "" if not body else json.dumps(body)
+        str_to_sign = "\n".join(
+            (
+                method,
+                hashlib.sha256(content.encode("utf8")).hexdigest().lower(),
+                "",
+                path,
+            )
+        )
+        if params:
+            str_to_sign += "?" + "&".join(
+                f"{key}={params[key]}" for key in sorted(params)
+            )
+        t = int(time.time() * 1000)
+        message = self._access_id + access_token + str(t) + str_to_sign
+        sign = (
+            hmac.new(
+                self._access_secret.encode("utf8"),
+                msg=message.encode("utf8"),
+                digestmod=hashlib.sha256,
+            )
+            .hexdigest()
+            .upper()
+        )
+        return sign, t
+
+    async def _request_with_retry(
+        self,
+        method: str,
+        path: str,
+        params: dict[str, Any] | None,
+        body: dict[str, Any] | None,
+        token_request: bool = False,
+    ) -> dict[str, Any]:
+        retry = 0
+        while True:
+            try:
+                return await self._send(method, path, params, body, token_request)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as ex:
+                if (
+                    isinstance(ex, aiohttp.ClientResponseError)
+                    and ex.status not in RETRY_STATUSES
+                ) or retry + 1 >= self._retry_policy.attempts:
+                    raise
+                delay = self._retry_policy.get_delay(retry)
+                _LOGGER.debug(
+                    "%s %s failed: %s, retry in %.1f seconds",
+                    method,
+                    path,
+                    ex,
+                    delay,
+                )
+                await asyncio.sleep(delay)
+                retry += 1
+
+    async def _send(
+        self,
+        method: str,
+        path: str,
+        params: dict[str, Any] | None,
+        body: dict[str, Any] | None,
+        token_request: bool,
+    ) -> dict[str, Any]:
+        # Login and refresh requests are sent without access token, so a
+        # failed refresh leaves the current one in place
+        access_token = ""
+        if self.token_info is not None and not token_request:
+            access_token = self.token_info.access_token
+        # Signed again on every attempt, the signature includes the time
+        sign, t = self._calculate_sign(method, path, params, body, access_token)
+        headers = {
+            "client_id": self._access_id,
+            "sign": sign,
+            "sign_method": "HMAC-SHA256",
+            "access_token": access_token,
+            "t": str(t),
+            "lang": self._lang,
+        }
+        if token_request:
+            headers["dev_lang"] = "python"
+            headers["dev_channel"] = self._dev_channel
+        # Paths may carry a query string, which is signed as is
+        async with self._session.request(
+            method,
+            URL(self._endpoint + path, encoded=True),
+            params=params,
+            json=body,
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=TUYA_API_TIMEOUT),
+        ) as response:
+            response.raise_for_status()
+            return await response.json(content_type=None)
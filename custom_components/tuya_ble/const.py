@@ -12,6 +12,32 @@ DEVICE_METADATA_UUIDS: Final = "uuids"
 
 DEVICE_DEF_MANUFACTURER: Final = "Tuya"
 SET_DISCONNECTED_DELAY = 10 * 60
+# Seconds to merge datapoint reports into one entity update,
+# 0 merges reports received within one event loop iteration.
+DATAPOINT_UPDATE_COALESCE_WINDOW = 0.0
+# Seconds a service call waits for its datapoint write, a write still
+# queued then goes on in the background and rolls back if it fails.
+WRITE_WAIT_TIMEOUT = 10
+
+SERVICE_EXPORT_TRACE: Final = "export_trace"
+
+# First connections at boot: devices set up within the collect delay are
+# ordered by priority, at most STARTUP_CONNECT_MAX connect at once, each
+# after a random delay of up to STARTUP_JITTER seconds.
+STARTUP_COLLECT_DELAY = 1.0
+STARTUP_CONNECT_MAX = 3
+STARTUP_JITTER = 2.0
+
+SNAPSHOT_STORAGE_VERSION: Final = 1
+# Seconds to wait before saving reported datapoints, later reports
+# within the delay are saved together.
+SNAPSHOT_SAVE_DELAY = 60
+
+CREDENTIALS_STORAGE_VERSION: Final = 1
+# Seconds credentials saved from Tuya cloud are used as is, older ones
+# are still used while refreshed in the background.
+CREDENTIALS_CACHE_TTL = 24 * 60 * 60
+CREDENTIALS_SAVE_DELAY = 10
 
 CONF_UUID: Final = "uuid"
 CONF_LOCAL_KEY: Final = "local_key"
@@ -29,9 +55,30 @@ CONF_ACCESS_SECRET = "access_secret"
 SMARTLIFE_APP = "smartlife"
 TUYA_SMART_APP = "tuyaSmart"
 
+TUYA_API_CUSTOM_LOGIN_URL: Final = "/v1.0/iot-03/users/login"
+TUYA_API_SMART_HOME_LOGIN_URL: Final = (
+    "/v1.0/iot-01/associated-users/actions/authorized-login"
+)
+TUYA_API_CUSTOM_REFRESH_TOKEN_URL: Final = "/v1.0/iot-03/users/token/%s"
+TUYA_API_SMART_HOME_REFRESH_TOKEN_URL: Final = "/v1.0/token/%s"
 TUYA_API_DEVICES_URL: Final = "/v1.0/users/%s/devices"
 TUYA_API_FACTORY_INFO_URL: Final = "/v1.0/iot-03/devices/factory-infos?device_ids=%s"
 TUYA_FACTORY_INFO_MAC: Final = "mac"
+# Device ids per factory-infos request and requests run at once
+TUYA_API_FACTORY_INFO_BATCH = 20
+TUYA_API_CONCURRENCY = 4
+# Seconds a failed login is answered from cache instead of retried
+TUYA_LOGIN_FAILURE_CACHE = 30
+# Seconds before credentials are fetched again after fetching failed
+TUYA_FILL_FAILURE_CACHE = 30
+TUYA_API_TOKEN_INVALID: Final = 1010
+# Seconds before expiration the access token is refreshed
+TUYA_API_TOKEN_REFRESH_MARGIN = 60
+TUYA_API_TIMEOUT = 10
+# Requests failed on network errors are retried after delays of
+# TUYA_API_RETRY_DELAY seconds, doubled on every retry.
+TUYA_API_RETRY_ATTEMPTS = 3
+TUYA_API_RETRY_DELAY = 1.0
 
 BATTERY_STATE_LOW: Final = "low"
 BATTERY_STATE_NORMAL: Final = "normal"
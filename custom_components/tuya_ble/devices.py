@@ -2,11 +2,14 @@
 from __future__ import annotations
 from dataclasses import dataclass
 
+import asyncio
+from collections.abc import Awaitable, Callable, Iterable
 from typing import Any
 import logging
 from homeassistant.const import CONF_ADDRESS, CONF_DEVICE_ID
 
 from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers.entity import (
     DeviceInfo,
@@ -23,19 +26,23 @@ import datetime
 from homeassistant.components.bluetooth import BluetoothScanningMode
 from homeassistant.components.bluetooth.passive_update_coordinator import PassiveBluetoothCoordinatorEntity, PassiveBluetoothDataUpdateCoordinator
 from home_assistant_bluetooth import BluetoothServiceInfoBleak
+from bleak.exc import BleakError
 from .tuya_ble import (
     AbstaractTuyaBLEDeviceManager,
     TuyaBLEDataPoint,
     TuyaBLEDevice,
     TuyaBLEDeviceCredentials,
+    TuyaBLEError,
 )
 
 from .cloud import HASSTuyaBLEDeviceManager
 from .const import (
+    DATAPOINT_UPDATE_COALESCE_WINDOW,
     DEVICE_DEF_MANUFACTURER,
     DOMAIN,
     FINGERBOT_BUTTON_EVENT,
     SET_DISCONNECTED_DELAY,
+    WRITE_WAIT_TIMEOUT,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -67,6 +74,65 @@ class TuyaBLEProductInfo:
     lock: TuyaBLELockInfo | None = None
 
 
+class TuyaBLEWriteDebouncer:
+    """Run a write once requests for it stopped for the delay.
+
+    Every request waits for the write that follows it, so errors of the
+    write are raised to all requests it covers.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        delay: float,
+        function: Callable[[], Awaitable[None]],
+    ) -> None:
+        self._hass = hass
+        self._delay = delay
+        self._function = function
+        self._handle: asyncio.TimerHandle | None = None
+        self._future: asyncio.Future[None] | None = None
+
+    async def async_call(self) -> None:
+        """Request the write, restarting the delay."""
+        if self._handle is not None:
+            self._handle.cancel()
+        if self._future is None:
+            self._future = self._hass.loop.create_future()
+        future = self._future
+        self._handle = self._hass.loop.call_later(self._delay, self._async_fire)
+        # Other requests wait for the same write
+        await asyncio.shield(future)
+
+    @callback
+    def _async_fire(self) -> None:
+        future = self._future
+        self._handle = None
+        self._future = None
+        if future is not None:
+            self._hass.async_create_task(self._async_write(future))
+
+    async def _async_write(self, future: asyncio.Future[None]) -> None:
+        try:
+            await self._function()
+        except Exception as err:  # pylint: disable=broad-except
+            if not future.done():
+                future.set_exception(err)
+        else:
+            if not future.done():
+                future.set_result(None)
+
+    @callback
+    def async_cancel(self) -> None:
+        """Drop the requested write."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        if self._future is not None:
+            self._future.cancel()
+            self._future = None
+
+
 class TuyaBLEEntity(PassiveBluetoothCoordinatorEntity):
     """Tuya BLE base entity."""
 
@@ -77,8 +143,13 @@ class TuyaBLEEntity(PassiveBluetoothCoordinatorEntity):
         device: TuyaBLEDevice,
         product: TuyaBLEProductInfo,
         description: EntityDescription,
+        dp_ids: Iterable[int] | None = None,
     ) -> None:
-        super().__init__(coordinator)
+        # Entities with dp_ids are woken only by reports of those
+        # datapoints, other entities by every report.
+        super().__init__(
+            coordinator, frozenset(dp_ids) if dp_ids is not None else None
+        )
         self._hass = hass
         self._coordinator = coordinator
         self._device = device
@@ -89,19 +160,90 @@ class TuyaBLEEntity(PassiveBluetoothCoordinatorEntity):
         self._attr_has_entity_name = True
         self._attr_device_info = get_device_info(self._device)
         self._attr_unique_id = f"{self._device.device_id}-{description.key}"
+        self._state_fingerprint: tuple | None = None
         self.entity_id = generate_entity_id(
             "sensor.{}", self._attr_unique_id, hass=hass
         )
 
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        if len(self._device.datapoints) > 0:
+            # Render datapoints known before the device reports them,
+            # restored from the snapshot.
+            self._handle_coordinator_update()
+
     @property
     def available(self) -> bool:
         """Return if entity is available."""
         return self.coordinator.available
 
+    def _get_state_fingerprint(self) -> tuple:
+        """Get everything that is rendered into the state object."""
+        state_attributes = self.state_attributes
+        extra_state_attributes = self.extra_state_attributes
+        return (
+            self.available,
+            self.state,
+            dict(state_attributes) if state_attributes else None,
+            dict(extra_state_attributes) if extra_state_attributes else None,
+            self.icon,
+            self.unit_of_measurement,
+        )
+
+    @callback
+    def async_write_ha_state(self) -> None:
+        """Write the state, next conditional write is never skipped."""
+        self._state_fingerprint = None
+        super().async_write_ha_state()
+
+    @callback
+    def async_write_ha_state_if_changed(self) -> None:
+        """Write the state unless it renders the same as the last write."""
+        fingerprint = self._get_state_fingerprint()
+        if fingerprint == self._state_fingerprint:
+            self._coordinator.suppressed_writes += 1
+            return
+        self.async_write_ha_state()
+        self._state_fingerprint = fingerprint
+
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
-        self.async_write_ha_state()
+        self.async_write_ha_state_if_changed()
+
+    async def _async_send(self, write: Awaitable[None]) -> None:
+        """Wait for datapoints write, raising a visible error if it failed.
+
+        Written values are shown right away and rolled back on failure.
+        Writes not done within WRITE_WAIT_TIMEOUT finish in the background.
+        """
+        task = self.hass.async_create_task(write)
+        try:
+            await asyncio.wait_for(asyncio.shield(task), WRITE_WAIT_TIMEOUT)
+        except asyncio.TimeoutError:
+            _LOGGER.debug(
+                "%s: Still sending %s, continuing in background",
+                self._device.address,
+                self.entity_description.key,
+            )
+            task.add_done_callback(self._async_write_done)
+        except (TuyaBLEError, BleakError) as err:
+            raise HomeAssistantError(
+                f"Failed to send {self.name or self.entity_description.key} "
+                f"to {self._device.name}: {err}"
+            ) from err
+
+    @callback
+    def _async_write_done(self, task: asyncio.Task) -> None:
+        """Log failure of a write finished in the background."""
+        if task.cancelled() or task.exception() is None:
+            return
+        _LOGGER.warning(
+            "%s: Failed to send %s: %s",
+            self._device.address,
+            self.entity_description.key,
+            task.exception(),
+        )
 
 
 class TuyaBLECoordinator(DataUpdateCoordinator[dict[str, Any]]):
@@ -216,19 +358,77 @@ class TuyaBLECoordinator(DataUpdateCoordinator[dict[str, Any]]):
 
 class TuyaBLEPassiveCoordinator(PassiveBluetoothDataUpdateCoordinator):
     """Data coordinator для получения обновлений Tuya BLE через пассивный Bluetooth."""
-    def __init__(self, hass: HomeAssistant, logger: logging.Logger, address: str, device: TuyaBLEDevice):
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        logger: logging.Logger,
+        address: str,
+        device: TuyaBLEDevice,
+        coalesce_window: float = DATAPOINT_UPDATE_COALESCE_WINDOW,
+    ):
         super().__init__(hass, logger, address, BluetoothScanningMode.ACTIVE, connectable=True)
         self._device = device
+        self._coalesce_window = coalesce_window
+        self._pending_dp_ids: set[int] = set()
+        self._flush_handle: asyncio.Handle | None = None
         self._disconnected: bool = True
         self._unsub_disconnect: CALLBACK_TYPE | None = None
-        device.register_connected_callback(self._async_handle_connect)
-        device.register_callback(self._async_handle_update)
-        device.register_disconnected_callback(self._async_handle_disconnect)
+        self._datapoint_listeners: dict[int, list[CALLBACK_TYPE]] = {}
+        self._unfiltered_listeners: list[CALLBACK_TYPE] = []
+        # State writes of the device entities skipped as unchanged
+        self.suppressed_writes = 0
+        self._unsub_device = [
+            device.register_connected_callback(self._async_handle_connect),
+            device.register_callback(self._async_handle_update),
+            device.register_user_update_callback(self._async_handle_user_update),
+            device.register_disconnected_callback(self._async_handle_disconnect),
+        ]
 
     @property
     def connected(self) -> bool:
         return not self._disconnected
 
+    @callback
+    def async_add_listener(
+        self, update_callback: CALLBACK_TYPE, context: Any = None
+    ) -> Callable[[], None]:
+        """Listen for updates, a frozenset context subscribes to datapoint ids."""
+        remove_listener = super().async_add_listener(update_callback, context)
+        if isinstance(context, frozenset):
+            for dp_id in context:
+                self._datapoint_listeners.setdefault(dp_id, []).append(
+                    update_callback
+                )
+        else:
+            self._unfiltered_listeners.append(update_callback)
+
+        @callback
+        def remove_datapoint_listener() -> None:
+            remove_listener()
+            if isinstance(context, frozenset):
+                for dp_id in context:
+                    listeners = self._datapoint_listeners[dp_id]
+                    listeners.remove(update_callback)
+                    if not listeners:
+                        del self._datapoint_listeners[dp_id]
+            else:
+                self._unfiltered_listeners.remove(update_callback)
+
+        return remove_datapoint_listener
+
+    @callback
+    def async_update_datapoint_listeners(self, dp_ids: Iterable[int]) -> None:
+        """Update listeners subscribed to any of datapoints and unfiltered ones."""
+        update_callbacks: dict[CALLBACK_TYPE, None] = dict.fromkeys(
+            self._unfiltered_listeners
+        )
+        for dp_id in dp_ids:
+            update_callbacks.update(
+                dict.fromkeys(self._datapoint_listeners.get(dp_id, ()))
+            )
+        for update_callback in update_callbacks:
+            update_callback()
+
     @callback
     def _async_handle_connect(self) -> None:
         if self._unsub_disconnect is not None:
@@ -237,10 +437,52 @@ class TuyaBLEPassiveCoordinator(PassiveBluetoothDataUpdateCoordinator):
             self._disconnected = False
             self.async_update_listeners()
 
+    @callback
+    def async_shutdown(self) -> None:
+        """Stop handling the device, called when the entry unloads."""
+        for unsub in self._unsub_device:
+            unsub()
+        self._unsub_device = []
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self._pending_dp_ids.clear()
+        if self._unsub_disconnect is not None:
+            self._unsub_disconnect()
+            self._unsub_disconnect = None
+
+    @callback
+    def _async_flush_updates(self) -> None:
+        """Update listeners of datapoints reported since the last flush."""
+        self._flush_handle = None
+        dp_ids = self._pending_dp_ids
+        self._pending_dp_ids = set()
+        self.async_update_datapoint_listeners(dp_ids)
+
+    @callback
+    def _async_schedule_updates(self, updates: list[TuyaBLEDataPoint]) -> None:
+        self._pending_dp_ids.update(update.id for update in updates)
+        if self._flush_handle is None:
+            if self._coalesce_window > 0:
+                self._flush_handle = self.hass.loop.call_later(
+                    self._coalesce_window, self._async_flush_updates
+                )
+            else:
+                self._flush_handle = self.hass.loop.call_soon(
+                    self._async_flush_updates
+                )
+
+    @callback
+    def _async_handle_user_update(self, updates: list[TuyaBLEDataPoint]) -> None:
+        # Values set locally, shown before the device confirms them
+        self._async_schedule_updates(updates)
+
     @callback
     def _async_handle_update(self, updates: list[TuyaBLEDataPoint]) -> None:
         self._async_handle_connect()
-        self.async_update_listeners()
+        # Bursts of reports are merged into one listeners update,
+        # events below are still fired for every report.
+        self._async_schedule_updates(updates)
         info = get_device_product_info(self._device)
         if info and info.fingerbot and info.fingerbot.manual_control != 0:
             for update in updates:
@@ -311,6 +553,28 @@ class TuyaBLEPassiveCoordinator(PassiveBluetoothDataUpdateCoordinator):
             )
 
 
+def get_mapping_datapoint_ids(
+    mapping: Any, product: TuyaBLEProductInfo
+) -> frozenset[int] | None:
+    """Get ids of datapoints read by an entity built from the mapping.
+
+    Getters and availability checks of the mappings read the fingerbot
+    mode and program datapoints or the extra datapoints declared by the
+    mapping in addition to the mapped one. Mappings without a real
+    datapoint, like signal strength, get None.
+    """
+    if mapping.dp_id < 0:
+        return None
+    result = {mapping.dp_id, *getattr(mapping, "extra_dp_ids", ())}
+    if product.fingerbot and (
+        getattr(mapping, "getter", None) or getattr(mapping, "is_available", None)
+    ):
+        for dp_id in (product.fingerbot.mode, product.fingerbot.program):
+            if dp_id:
+                result.add(dp_id)
+    return frozenset(result)
+
+
 @dataclass
 class TuyaBLEData:
     """Data for the Tuya BLE integration."""
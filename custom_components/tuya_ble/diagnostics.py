@@ -0,0 +1,69 @@
+"""Diagnostics support for Tuya BLE devices."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_DEVICE_ID, CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    CONF_ACCESS_ID,
+    CONF_ACCESS_SECRET,
+    CONF_LOCAL_KEY,
+    CONF_UUID,
+    DOMAIN,
+)
+from .devices import TuyaBLEData
+
+TO_REDACT = {
+    CONF_ACCESS_ID,
+    CONF_ACCESS_SECRET,
+    CONF_DEVICE_ID,
+    CONF_LOCAL_KEY,
+    CONF_PASSWORD,
+    CONF_USERNAME,
+    CONF_UUID,
+}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    data: TuyaBLEData = hass.data[DOMAIN][entry.entry_id]
+    device = data.device
+    return {
+        "entry": {
+            "title": entry.title,
+            "data": async_redact_data(entry.data, TO_REDACT),
+            "options": async_redact_data(entry.options, TO_REDACT),
+        },
+        "device": {
+            "address": device.address,
+            "name": device.name,
+            "connected": device.is_connected,
+            "rssi": device.rssi,
+            "device_version": device.device_version,
+            "hardware_version": device.hardware_version,
+            "protocol_version": device.protocol_version,
+            "trace_records": len(device.trace) if device.trace is not None else None,
+            "datapoints": [
+                {
+                    "id": datapoint.id,
+                    "type": datapoint.type.name,
+                    "value": datapoint.value.hex()
+                    if isinstance(datapoint.value, bytes)
+                    else datapoint.value,
+                    "timestamp": datapoint.timestamp,
+                }
+                for datapoint in device.datapoints
+            ],
+        },
+        "coordinator": {
+            "connected": data.coordinator.connected,
+            # State writes of the device entities skipped as unchanged
+            "suppressed_writes": data.coordinator.suppressed_writes,
+        },
+    }
@@ -4,7 +4,7 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 
 import logging
-from typing import Any, Callable
+from typing import Any, Awaitable, Callable
 
 from homeassistant.components.number import (
     NumberEntityDescription,
@@ -25,7 +25,7 @@ from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.restore_state import RestoreEntity
 from homeassistant.components.bluetooth.passive_update_coordinator import PassiveBluetoothDataUpdateCoordinator
-from .devices import TuyaBLEData, TuyaBLEEntity, TuyaBLEProductInfo, TuyaBLEPassiveCoordinator
+from .devices import TuyaBLEData, TuyaBLEEntity, TuyaBLEProductInfo, TuyaBLEPassiveCoordinator, TuyaBLEWriteDebouncer, get_mapping_datapoint_ids
 from .const import DOMAIN
 from .tuya_ble import TuyaBLEDataPointType, TuyaBLEDevice
 from homeassistant.components.number.const import NumberDeviceClass
@@ -43,7 +43,7 @@ TuyaBLENumberIsAvailable = (
 
 
 TuyaBLENumberSetter = (
-    Callable[["TuyaBLENumber", TuyaBLEProductInfo, float], None] | None
+    Callable[["TuyaBLENumber", TuyaBLEProductInfo, float], Awaitable[None]] | None
 )
 
 
@@ -60,6 +60,10 @@ class TuyaBLENumberMapping:
     getter: TuyaBLENumberGetter = None
     setter: TuyaBLENumberSetter = None
     mode: NumberMode = NumberMode.BOX
+    # Send only the last value set within this time, 0 sends at once
+    write_debounce_ms: int = 0
+    # Other datapoints read to render the entity, like by is_available
+    extra_dp_ids: tuple[int, ...] = ()
 
 
 
@@ -131,7 +135,7 @@ def get_fingerbot_program_repeat_count(
     return result
 
 
-def set_fingerbot_program_repeat_count(
+async def set_fingerbot_program_repeat_count(
     self: TuyaBLENumber,
     product: TuyaBLEProductInfo,
     value: float,
@@ -143,7 +147,7 @@ def set_fingerbot_program_repeat_count(
                 int.to_bytes(int(value), 2, "big") +
                 datapoint.value[2:]
             )
-            self._hass.create_task(datapoint.set_value(new_value))
+            await datapoint.set_value(new_value)
 
 
 def get_fingerbot_program_position(
@@ -159,7 +163,7 @@ def get_fingerbot_program_position(
     return result
 
 
-def set_fingerbot_program_position(
+async def set_fingerbot_program_position(
     self: TuyaBLENumber,
     product: TuyaBLEProductInfo,
     value: float,
@@ -169,7 +173,7 @@ def set_fingerbot_program_position(
         if datapoint and type(datapoint.value) is bytes:
             new_value = bytearray(datapoint.value)
             new_value[2] = int(value)
-            self._hass.create_task(datapoint.set_value(new_value))
+            await datapoint.set_value(new_value)
 
 
 @dataclass
@@ -254,6 +258,7 @@ mapping: dict[str, TuyaBLECategoryNumberMapping] = {
                         entity_category=EntityCategory.CONFIG,
                     ),
                     mode=NumberMode.SLIDER,
+                    write_debounce_ms=500,
                 ),
                 TuyaBLENumberMapping(
                     dp_id=26,
@@ -563,7 +568,14 @@ class TuyaBLENumber(TuyaBLEEntity, NumberEntity):
         product: TuyaBLEProductInfo,
         mapping: TuyaBLENumberMapping,
     ) -> None:
-        super().__init__(hass, coordinator, device, product, mapping.description)
+        super().__init__(
+            hass,
+            coordinator,
+            device,
+            product,
+            mapping.description,
+            get_mapping_datapoint_ids(mapping, product),
+        )
         self._mapping = mapping
         self._attr_mode = mapping.mode
         self._attr_native_min_value = mapping.description.native_min_value
@@ -571,6 +583,19 @@ class TuyaBLENumber(TuyaBLEEntity, NumberEntity):
         self._attr_native_step = mapping.description.native_step
         self._attr_native_unit_of_measurement = mapping.description.native_unit_of_measurement
         self._attr_entity_category = mapping.description.entity_category
+        self._pending_value: float | None = None
+        self._write_debouncer: TuyaBLEWriteDebouncer | None = None
+        if mapping.write_debounce_ms > 0:
+            self._write_debouncer = TuyaBLEWriteDebouncer(
+                hass,
+                mapping.write_debounce_ms / 1000,
+                self._async_write_pending_value,
+            )
+
+    async def async_will_remove_from_hass(self) -> None:
+        await super().async_will_remove_from_hass()
+        if self._write_debouncer is not None:
+            self._write_debouncer.async_cancel()
 
     @property
     def min_value(self) -> float:
@@ -582,6 +607,8 @@ class TuyaBLENumber(TuyaBLEEntity, NumberEntity):
     
     @property
     def native_value(self) -> float | None:
+        if self._pending_value is not None:
+            return self._pending_value
         if self._mapping.getter is not None:
             return self._mapping.getter(self, self._product)
         datapoint = self._device.datapoints[self._mapping.dp_id]
@@ -590,8 +617,23 @@ class TuyaBLENumber(TuyaBLEEntity, NumberEntity):
         return self._mapping.description.native_min_value
 
     async def async_set_native_value(self, value: float) -> None:
+        if self._write_debouncer is not None:
+            self._pending_value = value
+            self.async_write_ha_state()
+            await self._async_send(self._write_debouncer.async_call())
+            return
+        await self._async_send(self._async_write_value(value))
+
+    async def _async_write_pending_value(self) -> None:
+        value = self._pending_value
+        if value is None:
+            return
+        self._pending_value = None
+        await self._async_write_value(value)
+
+    async def _async_write_value(self, value: float) -> None:
         if self._mapping.setter is not None:
-            self._mapping.setter(self, self._product, value)
+            await self._mapping.setter(self, self._product, value)
             return
         int_value = int(value * self._mapping.coefficient)
         datapoint = self._device.datapoints.get_or_create(
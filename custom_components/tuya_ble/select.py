@@ -22,7 +22,7 @@ from .const import (
     FINGERBOT_MODE_PUSH,
     FINGERBOT_MODE_SWITCH,
 )
-from .devices import TuyaBLEData, TuyaBLEEntity, TuyaBLEProductInfo, TuyaBLEPassiveCoordinator
+from .devices import TuyaBLEData, TuyaBLEEntity, TuyaBLEProductInfo, TuyaBLEPassiveCoordinator, get_mapping_datapoint_ids
 from .tuya_ble import TuyaBLEDataPointType, TuyaBLEDevice
 
 _LOGGER = logging.getLogger(__name__)
@@ -34,6 +34,8 @@ class TuyaBLESelectMapping:
     description: SelectEntityDescription
     force_add: bool = True
     dp_type: TuyaBLEDataPointType | None = None
+    # Other datapoints read to render the entity, like by is_available
+    extra_dp_ids: tuple[int, ...] = ()
 
 
 @dataclass(frozen=True)
@@ -309,7 +311,8 @@ class TuyaBLESelect(TuyaBLEEntity, SelectEntity):
             coordinator,
             device,
             product,
-            mapping.description
+            mapping.description,
+            get_mapping_datapoint_ids(mapping, product),
         )
         self._mapping = mapping
         self._attr_options = mapping.description.options
@@ -328,7 +331,7 @@ class TuyaBLESelect(TuyaBLEEntity, SelectEntity):
                 return value
         return None
 
-    def select_option(self, value: str) -> None:
+    async def async_select_option(self, value: str) -> None:
         """Change the selected option."""
         if value in self._attr_options:
             int_value = self._attr_options.index(value)
@@ -338,7 +341,7 @@ class TuyaBLESelect(TuyaBLEEntity, SelectEntity):
                 int_value,
             )
             if datapoint:
-                self._hass.create_task(datapoint.set_value(int_value))
+                await self._async_send(datapoint.set_value(int_value))
 
 
 async def async_setup_entry(
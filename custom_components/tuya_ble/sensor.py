@@ -35,7 +35,7 @@ from .const import (
     CO2_LEVEL_NORMAL,
     DOMAIN,
 )
-from .devices import TuyaBLEData, TuyaBLEEntity, TuyaBLEProductInfo, TuyaBLEPassiveCoordinator
+from .devices import TuyaBLEData, TuyaBLEEntity, TuyaBLEProductInfo, TuyaBLEPassiveCoordinator, get_mapping_datapoint_ids
 from .tuya_ble import TuyaBLEDataPointType, TuyaBLEDevice
 _LOGGER = logging.getLogger(__name__)
 SIGNAL_STRENGTH_DP_ID = -1
@@ -50,6 +50,8 @@ class TuyaBLESensorMapping:
     coefficient: float = 1.0
     icons: list[str] | None = None
     is_available: TuyaBLESensorIsAvailable = None
+    # Other datapoints read to render the entity, like by is_available
+    extra_dp_ids: tuple[int, ...] = ()
 
 @dataclass
 class TuyaBLELastUnlockSensorMapping:
@@ -178,6 +180,7 @@ mapping: dict[str, TuyaBLECategorySensorMapping] = {
                         ],
                     ),
                     is_available=is_co2_alarm_enabled,
+                    extra_dp_ids=(13,),
                 ),
                 TuyaBLESensorMapping(
                     dp_id=2,
@@ -502,7 +505,14 @@ class TuyaBLESensor(RestoreSensor, SensorEntity, TuyaBLEEntity):
         product: TuyaBLEProductInfo,
         mapping: TuyaBLESensorMapping,
     ) -> None:
-        super().__init__(hass, coordinator, device, product, mapping.description)
+        super().__init__(
+            hass,
+            coordinator,
+            device,
+            product,
+            mapping.description,
+            get_mapping_datapoint_ids(mapping, product),
+        )
         self._mapping = mapping
 
     async def async_added_to_hass(self):
@@ -521,7 +531,7 @@ class TuyaBLESensor(RestoreSensor, SensorEntity, TuyaBLEEntity):
         """Handle updated data from the coordinator."""
         if self._mapping.getter is not None:
             self._mapping.getter(self)
-            self.async_write_ha_state()
+            self.async_write_ha_state_if_changed()
             return
         datapoint = self._device.datapoints[self._mapping.dp_id]
         if not datapoint or datapoint.value is None:
@@ -543,7 +553,7 @@ class TuyaBLESensor(RestoreSensor, SensorEntity, TuyaBLEEntity):
             self._attr_native_value = int(value)
         else:
             self._attr_native_value = str(value)
-        self.async_write_ha_state()
+        self.async_write_ha_state_if_changed()
 
     def _handle_enum_value(self, datapoint, value):
         if self.entity_description.options is not None and 0 <= value < len(self.entity_description.options):
@@ -563,7 +573,14 @@ class TuyaBLELastUnlockSensor(SensorEntity, TuyaBLEEntity):
         product: TuyaBLEProductInfo,
         mapping: TuyaBLELastUnlockSensorMapping,
     ) -> None:
-        super().__init__(hass, coordinator, device, product, mapping.description)
+        super().__init__(
+            hass,
+            coordinator,
+            device,
+            product,
+            mapping.description,
+            mapping.unlock_methods.keys(),
+        )
         self._unlock_methods = mapping.unlock_methods
         self._attr_native_value = None
         self._attr_extra_state_attributes = {}
@@ -593,7 +610,7 @@ class TuyaBLELastUnlockSensor(SensorEntity, TuyaBLEEntity):
         if last_method is not None:
             self._attr_native_value = last_method
             self._attr_extra_state_attributes = {"method": last_method, "value": last_value}
-        self.async_write_ha_state()
+        self.async_write_ha_state_if_changed()
 
 async def async_setup_entry(
     hass: HomeAssistant,
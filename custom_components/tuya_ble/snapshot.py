@@ -0,0 +1,57 @@
+"""Datapoints of Tuya BLE devices kept across restarts."""
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, SNAPSHOT_SAVE_DELAY, SNAPSHOT_STORAGE_VERSION
+from .tuya_ble import TuyaBLEDataPoint, TuyaBLEDevice
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _get_store(hass: HomeAssistant, entry_id: str) -> Store[dict[str, Any]]:
+    return Store(hass, SNAPSHOT_STORAGE_VERSION, f"{DOMAIN}.snapshot.{entry_id}")
+
+
+class TuyaBLESnapshotStore:
+    """Keeps the last datapoints of a device across restarts."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry_id: str,
+        device: TuyaBLEDevice,
+        save_delay: float = SNAPSHOT_SAVE_DELAY,
+    ) -> None:
+        self._device = device
+        self._save_delay = save_delay
+        self._store = _get_store(hass, entry_id)
+
+    async def async_restore(self) -> None:
+        """Load datapoints saved before the restart into the device."""
+        snapshot = await self._store.async_load()
+        if snapshot:
+            self._device.restore_snapshot(snapshot)
+            _LOGGER.debug(
+                "%s: Restored %s datapoints from snapshot",
+                self._device.address,
+                len(self._device.datapoints),
+            )
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Save datapoints reported by the device, returns unsubscribe."""
+        return self._device.register_callback(self._async_handle_update)
+
+    @callback
+    def _async_handle_update(self, updates: list[TuyaBLEDataPoint]) -> None:
+        self._store.async_delay_save(self._device.snapshot, self._save_delay)
+
+
+async def async_remove_snapshot(hass: HomeAssistant, entry_id: str) -> None:
+    """Remove saved datapoints of a removed config entry."""
+    await _get_store(hass, entry_id).async_remove()
@@ -0,0 +1,176 @@
+"""Ordered and rate limited first connections of Tuya BLE devices."""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+import logging
+import random
+import time
+
+from homeassistant.components import bluetooth
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+from . import button, climate, number, select, switch, text
+from .const import (
+    DOMAIN,
+    STARTUP_COLLECT_DELAY,
+    STARTUP_CONNECT_MAX,
+    STARTUP_JITTER,
+)
+from .tuya_ble import TuyaBLEDevice
+
+_LOGGER = logging.getLogger(__name__)
+
+STARTUP_SCHEDULER = f"{DOMAIN}_startup_scheduler"
+
+# RSSI used for devices not heard yet, they go last
+RSSI_UNKNOWN = -127
+
+
+def device_has_controls(device: TuyaBLEDevice) -> bool:
+    """Whether the device has entities the user can operate."""
+    return any(
+        platform.get_mapping_by_device(device)
+        for platform in (button, climate, number, select, switch, text)
+    )
+
+
+@dataclass(eq=False)
+class _TuyaBLEStartupItem:
+    device: TuyaBLEDevice
+    has_controls: bool
+    task: asyncio.Task | None = None
+
+
+class TuyaBLEStartupScheduler:
+    """Runs the first status update of devices set up at startup.
+
+    Devices scheduled together are updated in order: devices with controls
+    first, then by signal strength. Only a few connect at once, each after
+    a random delay, so they do not all compete for the adapter. A device
+    holds its slot for a single connect attempt, an unreachable one keeps
+    retrying afterwards without blocking the others.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        max_concurrent: int = STARTUP_CONNECT_MAX,
+        jitter: float = STARTUP_JITTER,
+        collect_delay: float = STARTUP_COLLECT_DELAY,
+    ) -> None:
+        self._hass = hass
+        self._max_concurrent = max_concurrent
+        self._jitter = jitter
+        self._collect_delay = collect_delay
+        self._pending: list[_TuyaBLEStartupItem] = []
+        self._running: set[_TuyaBLEStartupItem] = set()
+        self._runner: asyncio.Task | None = None
+        self._started = 0.0
+        self._ready = 0
+        self._failed = 0
+
+    @classmethod
+    @callback
+    def async_get(cls, hass: HomeAssistant) -> TuyaBLEStartupScheduler:
+        """Get the scheduler shared by all config entries."""
+        scheduler = hass.data.get(STARTUP_SCHEDULER)
+        if scheduler is None:
+            scheduler = hass.data[STARTUP_SCHEDULER] = cls(hass)
+        return scheduler
+
+    @callback
+    def async_schedule(
+        self, device: TuyaBLEDevice, has_controls: bool
+    ) -> CALLBACK_TYPE:
+        """Schedule the first update of the device, returns cancel."""
+        item = _TuyaBLEStartupItem(device, has_controls)
+        self._pending.append(item)
+        if self._runner is None or self._runner.done():
+            self._started = time.monotonic()
+            self._ready = 0
+            self._failed = 0
+            self._runner = self._hass.async_create_background_task(
+                self._async_run(), f"{DOMAIN} startup"
+            )
+
+        @callback
+        def cancel() -> None:
+            if item in self._pending:
+                self._pending.remove(item)
+            elif item.task is not None:
+                item.task.cancel()
+
+        return cancel
+
+    def _priority(self, item: _TuyaBLEStartupItem) -> tuple[bool, int]:
+        rssi = item.device.rssi
+        if rssi is None:
+            service_info = bluetooth.async_last_service_info(
+                self._hass, item.device.address, True
+            )
+            rssi = service_info.rssi if service_info else RSSI_UNKNOWN
+        return (not item.has_controls, -rssi)
+
+    async def _async_run(self) -> None:
+        # Let entries set up at the same time join before ordering
+        await asyncio.sleep(self._collect_delay)
+        semaphore = asyncio.Semaphore(self._max_concurrent)
+        while True:
+            await semaphore.acquire()
+            if not self._pending:
+                semaphore.release()
+                if not self._running:
+                    break
+                # Devices may still be scheduled while the last ones update
+                await asyncio.wait(
+                    [item.task for item in self._running],
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                continue
+            # RSSI changes while waiting, so the order is decided late
+            item = min(self._pending, key=self._priority)
+            self._pending.remove(item)
+            self._running.add(item)
+            item.task = self._hass.async_create_background_task(
+                self._async_update(item, semaphore),
+                f"{DOMAIN} startup {item.device.address}",
+            )
+        _LOGGER.info(
+            "%s devices ready in %.1f s, %s not connected",
+            self._ready,
+            time.monotonic() - self._started,
+            self._failed,
+        )
+
+    async def _async_update(
+        self, item: _TuyaBLEStartupItem, semaphore: asyncio.Semaphore
+    ) -> None:
+        device = item.device
+        connected = False
+        try:
+            await asyncio.sleep(random.uniform(0, self._jitter))
+            connected = await device.try_connect()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            _LOGGER.debug("%s: First connect failed", device.address, exc_info=True)
+        finally:
+            semaphore.release()
+            self._running.discard(item)
+        if connected:
+            self._ready += 1
+            _LOGGER.debug(
+                "%s: Ready %.1f s after startup",
+                device.address,
+                time.monotonic() - self._started,
+            )
+        else:
+            self._failed += 1
+        # Status, and connect retries of unreachable devices, need no slot
+        try:
+            await device.update()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            _LOGGER.debug("%s: First update failed", device.address, exc_info=True)
@@ -4,7 +4,7 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 
 import logging
-from typing import Any, Callable
+from typing import Any, Awaitable, Callable
 
 from homeassistant.components.switch import (
     SwitchEntityDescription,
@@ -19,7 +19,7 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
 from .const import DOMAIN
-from .devices import TuyaBLEData, TuyaBLEEntity, TuyaBLEProductInfo
+from .devices import TuyaBLEData, TuyaBLEEntity, TuyaBLEProductInfo, get_mapping_datapoint_ids
 from .tuya_ble import TuyaBLEDataPointType, TuyaBLEDevice
 
 _LOGGER = logging.getLogger(__name__)
@@ -36,7 +36,7 @@ TuyaBLESwitchIsAvailable = (
 
 
 TuyaBLESwitchSetter = (
-    Callable[["TuyaBLESwitch", TuyaBLEProductInfo, bool], None] | None
+    Callable[["TuyaBLESwitch", TuyaBLEProductInfo, bool], Awaitable[None]] | None
 )
 
 
@@ -50,6 +50,8 @@ class TuyaBLESwitchMapping:
     is_available: TuyaBLESwitchIsAvailable = None
     getter: TuyaBLESwitchGetter = None
     setter: TuyaBLESwitchSetter = None
+    # Other datapoints read to render the entity, like by is_available
+    extra_dp_ids: tuple[int, ...] = ()
 
 
 def is_fingerbot_in_program_mode(
@@ -86,7 +88,7 @@ def get_fingerbot_program_repeat_forever(
     return result
 
 
-def set_fingerbot_program_repeat_forever(
+async def set_fingerbot_program_repeat_forever(
     self: TuyaBLESwitch, product: TuyaBLEProductInfo, value: bool
 ) -> None:
     if product.fingerbot and product.fingerbot.program:
@@ -96,21 +98,21 @@ def set_fingerbot_program_repeat_forever(
                 int.to_bytes(0xFFFF if value else 1, 2, "big") +
                 datapoint.value[2:]
             )
-            self._hass.create_task(datapoint.set_value(new_value))
+            await datapoint.set_value(new_value)
 
 
 # --- Кастомные getter/setter для замка ---
-def lock_switch_setter(self: TuyaBLESwitch, product: TuyaBLEProductInfo, value: bool) -> None:
+async def lock_switch_setter(self: TuyaBLESwitch, product: TuyaBLEProductInfo, value: bool) -> None:
     if value:
         import base64
         raw_value = base64.b64decode("AQE=")
         datapoint = self._device.datapoints.get_or_create(6, TuyaBLEDataPointType.DT_RAW, raw_value)
         if datapoint:
-            self._hass.create_task(datapoint.set_value(raw_value))
+            await datapoint.set_value(raw_value)
     else:
         datapoint = self._device.datapoints.get_or_create(46, TuyaBLEDataPointType.DT_BOOL, False)
         if datapoint:
-            self._hass.create_task(datapoint.set_value(True))
+            await datapoint.set_value(True)
 
 
 @dataclass
@@ -423,7 +425,14 @@ class TuyaBLESwitch(TuyaBLEEntity, SwitchEntity):
         product: TuyaBLEProductInfo,
         mapping: TuyaBLESwitchMapping,
     ) -> None:
-        super().__init__(hass, coordinator, device, product, mapping.description)
+        super().__init__(
+            hass,
+            coordinator,
+            device,
+            product,
+            mapping.description,
+            get_mapping_datapoint_ids(mapping, product),
+        )
         self._mapping = mapping
 
     @property
@@ -450,37 +459,17 @@ class TuyaBLESwitch(TuyaBLEEntity, SwitchEntity):
                 return bool(datapoint.value)
         return False
 
-    def turn_on(self, **kwargs: Any) -> None:
+    async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn the switch on."""
-        if self._mapping.setter:
-            return self._mapping.setter(self, self._product, True)
-
-        new_value: bool | bytes
-        if self._mapping.bitmap_mask:
-            datapoint = self._device.datapoints.get_or_create(
-                self._mapping.dp_id,
-                TuyaBLEDataPointType.DT_BITMAP,
-                self._mapping.bitmap_mask,
-            )
-            bitmap_mask = self._mapping.bitmap_mask
-            bitmap_value = datapoint.value if isinstance(datapoint.value, bytes) else bytes()
-            new_value = bytes(
-                v | m for (v, m) in zip(bitmap_value, bitmap_mask, strict=True)
-            )
-        else:
-            datapoint = self._device.datapoints.get_or_create(
-                self._mapping.dp_id,
-                TuyaBLEDataPointType.DT_BOOL,
-                True,
-            )
-            new_value = True
-        if datapoint:
-            self._hass.create_task(datapoint.set_value(new_value))
+        await self._async_send(self._async_turn(True))
 
-    def turn_off(self, **kwargs: Any) -> None:
+    async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn the switch off."""
+        await self._async_send(self._async_turn(False))
+
+    async def _async_turn(self, value: bool) -> None:
         if self._mapping.setter:
-            return self._mapping.setter(self, self._product, False)
+            return await self._mapping.setter(self, self._product, value)
 
         new_value: bool | bytes
         if self._mapping.bitmap_mask:
@@ -491,18 +480,23 @@ class TuyaBLESwitch(TuyaBLEEntity, SwitchEntity):
             )
             bitmap_mask = self._mapping.bitmap_mask
             bitmap_value = datapoint.value if isinstance(datapoint.value, bytes) else bytes()
-            new_value = bytes(
-                v & ~m for (v, m) in zip(bitmap_value, bitmap_mask, strict=True)
-            )
+            if value:
+                new_value = bytes(
+                    v | m for (v, m) in zip(bitmap_value, bitmap_mask, strict=True)
+                )
+            else:
+                new_value = bytes(
+                    v & ~m for (v, m) in zip(bitmap_value, bitmap_mask, strict=True)
+                )
         else:
             datapoint = self._device.datapoints.get_or_create(
                 self._mapping.dp_id,
                 TuyaBLEDataPointType.DT_BOOL,
-                False,
+                value,
             )
-            new_value = False
+            new_value = value
         if datapoint:
-            self._hass.create_task(datapoint.set_value(new_value))
+            await datapoint.set_value(new_value)
 
     @property
     def available(self) -> bool:
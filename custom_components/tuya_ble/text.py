@@ -6,7 +6,7 @@ from dataclasses import dataclass
 
 import logging
 from struct import pack, unpack
-from typing import Callable, Optional
+from typing import Awaitable, Callable, Optional
 
 from homeassistant.components.text import (
     TextEntity,
@@ -21,7 +21,7 @@ from homeassistant.components.bluetooth.passive_update_coordinator import Passiv
 from .const import (
     DOMAIN,
 )
-from .devices import TuyaBLEData, TuyaBLEEntity, TuyaBLEProductInfo, TuyaBLEPassiveCoordinator
+from .devices import TuyaBLEData, TuyaBLEEntity, TuyaBLEProductInfo, TuyaBLEPassiveCoordinator, get_mapping_datapoint_ids
 from .tuya_ble import TuyaBLEDataPointType, TuyaBLEDevice
 
 _LOGGER = logging.getLogger(__name__)
@@ -39,7 +39,7 @@ TuyaBLETextIsAvailable = (
 
 
 TuyaBLETextSetter = (
-    Callable[["TuyaBLEText", TuyaBLEProductInfo, str], None] | None
+    Callable[["TuyaBLEText", TuyaBLEProductInfo, str], Awaitable[None]] | None
 )
 
 
@@ -79,7 +79,7 @@ def get_fingerbot_program(
     return result
 
 
-def set_fingerbot_program(
+async def set_fingerbot_program(
     self: TuyaBLEText,
     product: TuyaBLEProductInfo,
     value: str,
@@ -95,7 +95,7 @@ def set_fingerbot_program(
                 position = int(step_values[0])
                 delay = int(step_values[1]) if len(step_values) > 1 else 0
                 new_value += pack(">BH", position, delay)
-            self._hass.create_task(datapoint.set_value(new_value))
+            await datapoint.set_value(new_value)
 
 
 @dataclass
@@ -108,6 +108,8 @@ class TuyaBLETextMapping:
     is_available: Optional[TuyaBLETextIsAvailable] = None
     getter: Optional[TuyaBLETextGetter] = None
     setter: Optional[TuyaBLETextSetter] = None
+    # Other datapoints read to render the entity, like by is_available
+    extra_dp_ids: tuple[int, ...] = ()
 
 
 @dataclass
@@ -118,7 +120,7 @@ class TuyaBLECategoryTextMapping:
 
 # debug timer raw input / setter
 
-def set_timer_raw(self, product, value):
+async def set_timer_raw(self, product, value):
     decoded = base64.b64decode(value)
     datapoint = self._device.datapoints.get_or_create(
         17,
@@ -126,7 +128,7 @@ def set_timer_raw(self, product, value):
         decoded
     )
     if datapoint is not None:
-        self._hass.create_task(datapoint.set_value(decoded))
+        await datapoint.set_value(decoded)
 
 mapping: dict[str, TuyaBLECategoryTextMapping] = {
     "szjqr": TuyaBLECategoryTextMapping(
@@ -183,7 +185,14 @@ class TuyaBLEText(TuyaBLEEntity, TextEntity):
         product: TuyaBLEProductInfo,
         mapping: TuyaBLETextMapping,
     ) -> None:
-        super().__init__(hass, coordinator, device, product, mapping.description)
+        super().__init__(
+            hass,
+            coordinator,
+            device,
+            product,
+            mapping.description,
+            get_mapping_datapoint_ids(mapping, product),
+        )
         self._mapping = mapping
 
     @property
@@ -198,10 +207,10 @@ class TuyaBLEText(TuyaBLEEntity, TextEntity):
 
         return self._mapping.description.default_value
 
-    def set_value(self, value: str) -> None:
+    async def async_set_value(self, value: str) -> None:
         """Change the value."""
         if self._mapping.setter:
-            self._mapping.setter(self, self._product, value)
+            await self._async_send(self._mapping.setter(self, self._product, value))
             return
         datapoint = self._device.datapoints.get_or_create(
             self._mapping.dp_id,
@@ -209,7 +218,7 @@ class TuyaBLEText(TuyaBLEEntity, TextEntity):
             value,
         )
         if datapoint:
-            self._hass.create_task(datapoint.set_value(value))
+            await self._async_send(datapoint.set_value(value))
 
 
 async def async_setup_entry(
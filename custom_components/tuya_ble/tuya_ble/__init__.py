@@ -7,17 +7,51 @@ from .const import (
     SERVICE_UUID,
     TuyaBLEDataPointType, 
 )
+from .exceptions import (
+    TuyaBLECommandQueuedError,
+    TuyaBLEDeviceError,
+    TuyaBLEError,
+    TuyaBLEResponseTimeoutError,
+)
 from .manager import (
     AbstaractTuyaBLEDeviceManager,
     TuyaBLEDeviceCredentials,
 )
+from .retry import (
+    TuyaBLECircuitBreaker,
+    TuyaBLERetryPolicy,
+)
+from .scheduler import (
+    TuyaBLEConnectionScheduler,
+    TuyaBLEConnectionSlotStats,
+    connection_scheduler,
+)
+from .trace import (
+    TuyaBLETraceRecorder,
+    load_trace,
+    read_trace,
+    replay_trace,
+)
 from .tuya_ble import TuyaBLEDataPoint, TuyaBLEDevice 
 
 __all__ = [
     "AbstaractTuyaBLEDeviceManager",
+    "TuyaBLECircuitBreaker",
+    "TuyaBLECommandQueuedError",
+    "TuyaBLEConnectionScheduler",
+    "TuyaBLEConnectionSlotStats",
     "TuyaBLEDataPoint",
     "TuyaBLEDataPointType",
     "TuyaBLEDevice",
     "TuyaBLEDeviceCredentials",
+    "TuyaBLEDeviceError",
+    "TuyaBLEError",
+    "TuyaBLEResponseTimeoutError",
+    "TuyaBLERetryPolicy",
+    "TuyaBLETraceRecorder",
     "SERVICE_UUID",
+    "connection_scheduler",
+    "load_trace",
+    "read_trace",
+    "replay_trace",
 ]
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable
+from struct import Struct, error as StructError
+
+from .const import TuyaBLEDataPointType
+from .exceptions import (
+    TuyaBLEDataFormatError,
+    TuyaBLEDataLengthError,
+    TuyaBLEValueLengthError,
+)
+
+# Datapoint header: id, type and value length (1 byte in v3, 2 bytes in v4)
+DP_HEADER_V3 = Struct(">BBB")
+DP_HEADER_V4 = Struct(">BBH")
+
+# Datapoint types indexed by their wire value
+DP_TYPES: tuple[TuyaBLEDataPointType, ...] = tuple(
+    sorted(TuyaBLEDataPointType, key=lambda item: item.value)
+)
+
+_UINT8 = Struct(">B")
+_UINT16 = Struct(">H")
+_UINT32 = Struct(">I")
+_INT32 = Struct(">i")
+_SIGNED: dict[int, Struct] = {1: Struct(">b"), 2: Struct(">h"), 4: _INT32}
+_UNSIGNED: dict[int, Struct] = {1: _UINT8, 2: _UINT16, 4: _UINT32}
+
+
+def _decode_raw(raw: bytes) -> bytes:
+    return raw
+
+
+def _decode_bool(raw: bytes) -> bool:
+    return any(raw)
+
+
+def _decode_int(raw: bytes) -> int:
+    decoder = _SIGNED.get(len(raw))
+    if decoder:
+        return decoder.unpack(raw)[0]
+    return int.from_bytes(raw, "big", signed=True)
+
+
+def _decode_uint(raw: bytes) -> int:
+    decoder = _UNSIGNED.get(len(raw))
+    if decoder:
+        return decoder.unpack(raw)[0]
+    return int.from_bytes(raw, "big")
+
+
+def _decode_string(raw: bytes) -> str:
+    return raw.decode()
+
+
+def _encode_raw(value: bytes) -> bytes:
+    return value
+
+
+def _encode_bool(value: bool) -> bytes:
+    return _UINT8.pack(1 if value else 0)
+
+
+def _encode_value(value: int) -> bytes:
+    return _INT32.pack(value)
+
+
+def _encode_enum(value: int) -> bytes:
+    if value > 0xFFFF:
+        return _UINT32.pack(value)
+    elif value > 0xFF:
+        return _UINT16.pack(value)
+    else:
+        return _UINT8.pack(value)
+
+
+def _encode_string(value: str) -> bytes:
+    return value.encode()
+
+
+# Decoders and encoders indexed by datapoint type wire value
+DP_DECODERS: tuple[Callable[[bytes], bytes | bool | int | str], ...] = (
+    _decode_raw,  # DT_RAW
+    _decode_bool,  # DT_BOOL
+    _decode_int,  # DT_VALUE
+    _decode_string,  # DT_STRING
+    _decode_uint,  # DT_ENUM
+    _decode_raw,  # DT_BITMAP
+)
+DP_ENCODERS: tuple[Callable[[bytes | bool | int | str], bytes], ...] = (
+    _encode_raw,  # DT_RAW
+    _encode_bool,  # DT_BOOL
+    _encode_value,  # DT_VALUE
+    _encode_string,  # DT_STRING
+    _encode_enum,  # DT_ENUM
+    _encode_raw,  # DT_BITMAP
+)
+
+
+def decode_datapoints(
+    data: bytes,
+    start_pos: int,
+    header: Struct = DP_HEADER_V3,
+) -> list[tuple[int, TuyaBLEDataPointType, bytes | bool | int | str, bytes]]:
+    """Decode all datapoints of a report.
+
+    Returns (id, type, value, raw value) tuples, the raw value is the value
+    as received.
+    """
+    header_size = header.size
+    data_len = len(data)
+    # Every datapoint takes at least its header
+    result: list = [None] * max((data_len - start_pos) // header_size, 0)
+    count = 0
+    pos = start_pos
+    while data_len - pos >= header_size:
+        id, type_value, value_len = header.unpack_from(data, pos)
+        if type_value >= len(DP_TYPES):
+            raise TuyaBLEDataFormatError()
+        pos += header_size
+        next_pos = pos + value_len
+        if next_pos > data_len:
+            raise TuyaBLEDataLengthError()
+        raw = data[pos:next_pos]
+        result[count] = (id, DP_TYPES[type_value], DP_DECODERS[type_value](raw), raw)
+        count += 1
+        pos = next_pos
+
+    del result[count:]
+    return result
+
+
+def decode_value(
+    type: TuyaBLEDataPointType, raw: bytes
+) -> bytes | bool | int | str:
+    """Decode datapoint value."""
+    return DP_DECODERS[type.value](raw)
+
+
+def encode_value(
+    type: TuyaBLEDataPointType, value: bytes | bool | int | str
+) -> bytes:
+    """Encode datapoint value."""
+    return DP_ENCODERS[type.value](value)
+
+
+def encode_datapoints(
+    datapoints: Iterable[tuple[int, TuyaBLEDataPointType, bytes]],
+    header: Struct = DP_HEADER_V3,
+    offset: int = 0,
+) -> bytearray:
+    """Encode (id, type, encoded value) tuples into a single buffer.
+
+    The first offset bytes of the result are left zeroed for the caller.
+    Raises TuyaBLEValueLengthError if a value does not fit the length field
+    of header.
+    """
+    result = bytearray(offset)
+    pack = header.pack
+    for id, type, value in datapoints:
+        try:
+            result += pack(id, type.value, len(value))
+        except StructError:
+            raise TuyaBLEValueLengthError(id, len(value)) from None
+        result += value
+    return result
+
+
+def split_datapoints(
+    datapoints: Iterable[tuple[int, TuyaBLEDataPointType, bytes]],
+    max_length: int,
+    header: Struct = DP_HEADER_V3,
+) -> list[list[tuple[int, TuyaBLEDataPointType, bytes]]]:
+    """Split encoded datapoints into the fewest groups of max_length bytes.
+
+    Groups are filled first-fit by decreasing size, a datapoint larger than
+    max_length gets a group of its own. Datapoints keep their order inside
+    a group.
+    """
+    items = list(datapoints)
+    header_size = header.size
+    sizes = [header_size + len(value) for _, _, value in items]
+    if sum(sizes) <= max_length:
+        return [items] if items else []
+
+    groups: list[list[int]] = []
+    free: list[int] = []
+    for index in sorted(range(len(items)), key=sizes.__getitem__, reverse=True):
+        size = sizes[index]
+        for group_index, group_free in enumerate(free):
+            if size <= group_free:
+                groups[group_index].append(index)
+                free[group_index] -= size
+                break
+        else:
+            groups.append([index])
+            free.append(max_length - size)
+    return [[items[index] for index in sorted(group)] for group in groups]
@@ -3,9 +3,24 @@ from __future__ import annotations
 from enum import Enum
 
 GATT_MTU = 20
+# Largest write payload used with a negotiated MTU (ATT MTU 247 minus header)
+GATT_MTU_MAX = 244
 
 DEFAULT_ATTEMPTS = 0xFFFF
 
+# Connection attempts of one connect, delayed by exponential backoff
+CONNECT_ATTEMPTS = 10
+CONNECT_BACKOFF_INITIAL = 0.25
+CONNECT_BACKOFF_MAX = 30.0
+CONNECT_BACKOFF_MULTIPLIER = 2.0
+# Fraction of a backoff delay that is randomized
+CONNECT_BACKOFF_JITTER = 0.5
+
+# Seconds connects fail fast after all attempts failed, doubled while
+# the device stays unreachable
+CIRCUIT_BREAKER_RESET_TIMEOUT = 60.0
+CIRCUIT_BREAKER_RESET_TIMEOUT_MAX = 15 * 60.0
+
 CHARACTERISTIC_NOTIFY = "00002b10-0000-1000-8000-00805f9b34fb"
 CHARACTERISTIC_WRITE = "00002b11-0000-1000-8000-00805f9b34fb"
 
@@ -13,8 +28,31 @@ SERVICE_UUID = "0000a201-0000-1000-8000-00805f9b34fb"
 
 MANUFACTURER_DATA_ID = 0x07D0
 
+DP_ID_MAX = 0xFF
+
 RESPONSE_WAIT_TIMEOUT = 60
 
+# Largest frame a device can announce: security flag, IV and the encrypted
+# header, 16-bit length data and CRC padded to the AES block size
+INPUT_FRAME_MAX = 1 + 16 + (12 + 0xFFFF + 2 + 15) // 16 * 16
+# Reassembly buffers above this size are released once a frame is parsed
+INPUT_BUFFER_KEEP = 1024
+
+# Largest datapoints payload sent to the device in a single frame
+DATAPOINTS_FRAME_MAX = 512
+
+# Seconds a datapoint write waits in the outbound queue before dropped
+COMMAND_QUEUE_EXPIRY = 60
+
+# Raw packets kept by the per-device trace recorder
+TRACE_RECORDS_DEFAULT = 256
+
+# Concurrent connection attempts allowed per local adapter (BlueZ handles
+# one LE connection attempt at a time) and per remote Bluetooth proxy.
+CONNECT_SLOTS_ADAPTER = 1
+CONNECT_SLOTS_PROXY = 3
+CONNECT_SOURCE_DEFAULT = "default"
+
 
 class TuyaBLECode(Enum):
     FUN_SENDER_DEVICE_INFO = 0x0000
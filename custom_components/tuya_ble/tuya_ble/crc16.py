@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+CRC16_INIT = 0xFFFF
+CRC16_POLY = 0xA001  # CRC16/MODBUS, reflected 0x8005
+
+
+def _build_table() -> tuple[int, ...]:
+    table: list[int] = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            if crc & 1:
+                crc = (crc >> 1) ^ CRC16_POLY
+            else:
+                crc >>= 1
+        table.append(crc)
+    return tuple(table)
+
+
+CRC16_TABLE = _build_table()
+
+
+def crc16(data: bytes | bytearray | memoryview, crc: int = CRC16_INIT) -> int:
+    """Calculate CRC16/MODBUS of data, optionally continuing from crc."""
+    table = CRC16_TABLE
+    for byte in data:
+        crc = (crc >> 8) ^ table[(crc ^ byte) & 0xFF]
+    return crc
+
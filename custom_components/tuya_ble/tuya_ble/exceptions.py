@@ -33,6 +33,29 @@ class TuyaBLEDataLengthError(TuyaBLEError):
         super().__init__("Incoming packet has invalid length")
 
 
+class TuyaBLEValueLengthError(TuyaBLEError):
+    """Raised when datapoint value is too long for the protocol version."""
+
+    def __init__(self, id: int, length: int) -> None:
+        super().__init__(
+            ("Value of datapoint %s is too long to send: %s bytes") % (id, length)
+        )
+
+
+class TuyaBLEResponseTimeoutError(TuyaBLEError):
+    """Raised when Tuya BLE device did not respond to command in time."""
+
+    def __init__(self) -> None:
+        super().__init__("BLE device did not respond in time")
+
+
+class TuyaBLECommandQueuedError(TuyaBLEError):
+    """Raised when Tuya BLE device is unreachable and command is queued."""
+
+    def __init__(self) -> None:
+        super().__init__("BLE device is not connected, command is queued")
+
+
 class TuyaBLEDeviceError(TuyaBLEError):
     """Raised when Tuya BLE device returned error in response to command."""
 
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import random
+import time
+from dataclasses import dataclass
+
+from .const import (
+    CIRCUIT_BREAKER_RESET_TIMEOUT,
+    CIRCUIT_BREAKER_RESET_TIMEOUT_MAX,
+    CONNECT_ATTEMPTS,
+    CONNECT_BACKOFF_INITIAL,
+    CONNECT_BACKOFF_JITTER,
+    CONNECT_BACKOFF_MAX,
+    CONNECT_BACKOFF_MULTIPLIER,
+)
+
+
+@dataclass
+class TuyaBLERetryPolicy:
+    """Number of connection attempts and delays between them."""
+
+    attempts: int = CONNECT_ATTEMPTS
+    initial_delay: float = CONNECT_BACKOFF_INITIAL
+    max_delay: float = CONNECT_BACKOFF_MAX
+    multiplier: float = CONNECT_BACKOFF_MULTIPLIER
+    jitter: float = CONNECT_BACKOFF_JITTER
+
+    def get_delay(self, retry: int) -> float:
+        """Get delay before the retry, counted from 0."""
+        delay = min(
+            self.initial_delay * self.multiplier ** min(retry, 64), self.max_delay
+        )
+        # Randomized, so devices failing together do not retry together
+        return delay * (1.0 - self.jitter * random.random())
+
+
+class TuyaBLECircuitBreaker:
+    """Fails connects fast while the device is known to be unreachable.
+
+    Opened when a connect failed after all attempts. While open, connects
+    fail without touching the adapter until the reset timeout passes, then
+    one connect is let through. The timeout doubles every time that connect
+    fails too. Seeing the device again closes the breaker at once.
+    """
+
+    def __init__(
+        self,
+        reset_timeout: float = CIRCUIT_BREAKER_RESET_TIMEOUT,
+        max_reset_timeout: float = CIRCUIT_BREAKER_RESET_TIMEOUT_MAX,
+    ) -> None:
+        self._reset_timeout = reset_timeout
+        self._max_reset_timeout = max_reset_timeout
+        self._current_timeout = reset_timeout
+        self._open_until: float | None = None
+        self._trips = 0
+
+    @property
+    def is_open(self) -> bool:
+        return self._open_until is not None
+
+    @property
+    def trips(self) -> int:
+        """Number of times the breaker opened."""
+        return self._trips
+
+    @property
+    def time_until_retry(self) -> float:
+        """Seconds until a connect is let through."""
+        if self._open_until is None:
+            return 0.0
+        return max(self._open_until - time.monotonic(), 0.0)
+
+    def allow(self) -> bool:
+        """Whether a connect may be attempted now."""
+        return self._open_until is None or time.monotonic() >= self._open_until
+
+    def record_success(self) -> None:
+        self.reset()
+
+    def record_failure(self) -> None:
+        if self._open_until is not None:
+            self._current_timeout = min(
+                self._current_timeout * 2, self._max_reset_timeout
+            )
+        self._open_until = time.monotonic() + self._current_timeout
+        self._trips += 1
+
+    def reset(self) -> None:
+        self._open_until = None
+        self._current_timeout = self._reset_timeout
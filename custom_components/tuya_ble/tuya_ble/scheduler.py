@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+from bleak.backends.device import BLEDevice
+
+from .const import (
+    CONNECT_SLOTS_ADAPTER,
+    CONNECT_SLOTS_PROXY,
+    CONNECT_SOURCE_DEFAULT,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class TuyaBLEConnectionSlotStats:
+    """Connection slot usage and queue wait metrics of one source."""
+
+    slots: int
+    in_use: int = 0
+    peak_in_use: int = 0
+    waiting: int = 0
+    acquired: int = 0
+    wait_time_total: float = 0.0
+    wait_time_max: float = 0.0
+
+    @property
+    def free(self) -> int:
+        return max(self.slots - self.in_use, 0)
+
+    @property
+    def wait_time_average(self) -> float:
+        if self.acquired == 0:
+            return 0.0
+        return self.wait_time_total / self.acquired
+
+
+class _TuyaBLEConnectionSource:
+    def __init__(self, slots: int) -> None:
+        self.stats = TuyaBLEConnectionSlotStats(slots)
+        self.waiters: deque[asyncio.Future[None]] = deque()
+
+
+class TuyaBLEConnectionScheduler:
+    """Schedules connection attempts over adapters and proxies.
+
+    Every adapter or proxy (a connection source) has its own number of
+    connection slots. Attempts on different sources run in parallel,
+    attempts on the same source wait for a free slot in FIFO order.
+    """
+
+    def __init__(self) -> None:
+        self._sources: dict[str, _TuyaBLEConnectionSource] = {}
+
+    @staticmethod
+    def get_source(ble_device: BLEDevice) -> tuple[str, int]:
+        """Get name and default slots count of the device connection source."""
+        details = ble_device.details
+        if isinstance(details, dict):
+            source = details.get("source")
+            if source:
+                return (source, CONNECT_SLOTS_PROXY)
+            path = details.get("path")
+            if isinstance(path, str):
+                # /org/bluez/hci0/dev_XX_XX_XX_XX_XX_XX
+                parts = path.split("/")
+                if len(parts) > 3:
+                    return (parts[3], CONNECT_SLOTS_ADAPTER)
+        return (CONNECT_SOURCE_DEFAULT, CONNECT_SLOTS_ADAPTER)
+
+    def _get_or_create_source(
+        self, source: str, slots: int
+    ) -> _TuyaBLEConnectionSource:
+        result = self._sources.get(source)
+        if result is None:
+            result = _TuyaBLEConnectionSource(slots)
+            self._sources[source] = result
+        return result
+
+    def set_slots(self, source: str, slots: int) -> None:
+        """Set number of connection slots of the source."""
+        item = self._get_or_create_source(source, slots)
+        item.stats.slots = max(slots, 1)
+        self._wake_waiters(item)
+
+    def get_stats(self) -> dict[str, TuyaBLEConnectionSlotStats]:
+        """Get metrics of all known connection sources."""
+        return {source: item.stats for source, item in self._sources.items()}
+
+    def _wake_waiters(self, item: _TuyaBLEConnectionSource) -> None:
+        stats = item.stats
+        while item.waiters and stats.in_use < stats.slots:
+            future = item.waiters.popleft()
+            if future.done():
+                continue
+            stats.in_use += 1
+            future.set_result(None)
+        stats.waiting = len(item.waiters)
+
+    def _release(self, item: _TuyaBLEConnectionSource) -> None:
+        item.stats.in_use -= 1
+        self._wake_waiters(item)
+
+    async def _acquire(
+        self, item: _TuyaBLEConnectionSource, source: str, address: str
+    ) -> None:
+        stats = item.stats
+        started = time.monotonic()
+        if stats.in_use < stats.slots and not item.waiters:
+            stats.in_use += 1
+        else:
+            _LOGGER.debug(
+                "%s: Waiting for connection slot on %s, %s in use of %s",
+                address,
+                source,
+                stats.in_use,
+                stats.slots,
+            )
+            future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+            item.waiters.append(future)
+            stats.waiting = len(item.waiters)
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # The slot was already handed over to us
+                    self._release(item)
+                else:
+                    try:
+                        item.waiters.remove(future)
+                    except ValueError:
+                        pass
+                    stats.waiting = len(item.waiters)
+                raise
+
+        wait_time = time.monotonic() - started
+        stats.acquired += 1
+        stats.wait_time_total += wait_time
+        stats.wait_time_max = max(stats.wait_time_max, wait_time)
+        stats.peak_in_use = max(stats.peak_in_use, stats.in_use)
+
+    @asynccontextmanager
+    async def connect_slot(self, ble_device: BLEDevice) -> AsyncIterator[None]:
+        """Hold a connection slot of the device source while connecting."""
+        source, slots = self.get_source(ble_device)
+        item = self._get_or_create_source(source, slots)
+        await self._acquire(item, source, ble_device.address)
+        try:
+            yield
+        finally:
+            self._release(item)
+
+
+connection_scheduler = TuyaBLEConnectionScheduler()
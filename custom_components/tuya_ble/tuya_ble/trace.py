@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from struct import Struct
+from typing import TYPE_CHECKING
+
+from .const import TRACE_RECORDS_DEFAULT
+from .exceptions import TuyaBLEDataFormatError, TuyaBLEDataLengthError
+
+if TYPE_CHECKING:
+    from .tuya_ble import TuyaBLEDevice
+
+TRACE_DIRECTION_RX = 0
+TRACE_DIRECTION_TX = 1
+
+# File layout: magic, then per record timestamp, direction, length and data
+TRACE_FILE_MAGIC = b"TBLETRC1"
+TRACE_RECORD_HEADER = Struct(">dBH")
+
+TuyaBLETraceRecord = tuple[float, int, bytes]
+
+
+class TuyaBLETraceRecorder:
+    """Keeps the last raw packets sent to and received from a device."""
+
+    def __init__(self, max_records: int = TRACE_RECORDS_DEFAULT) -> None:
+        self._records: deque[TuyaBLETraceRecord] = deque(maxlen=max_records)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    @property
+    def max_records(self) -> int:
+        return self._records.maxlen
+
+    @property
+    def records(self) -> list[TuyaBLETraceRecord]:
+        return list(self._records)
+
+    def record(self, direction: int, data: bytes | bytearray) -> None:
+        self._records.append((time.time(), direction, bytes(data)))
+
+    def clear(self) -> None:
+        self._records.clear()
+
+    def export(self) -> bytes:
+        """Export recorded packets in the binary trace format."""
+        result = bytearray(TRACE_FILE_MAGIC)
+        for timestamp, direction, data in self._records:
+            result += TRACE_RECORD_HEADER.pack(timestamp, direction, len(data))
+            result += data
+        return bytes(result)
+
+    def save(self, path: str) -> None:
+        """Write recorded packets to a file, blocking."""
+        with open(path, "wb") as file:
+            file.write(self.export())
+
+
+def load_trace(data: bytes) -> list[TuyaBLETraceRecord]:
+    """Load packets from data in the binary trace format."""
+    if not data.startswith(TRACE_FILE_MAGIC):
+        raise TuyaBLEDataFormatError()
+
+    result: list[TuyaBLETraceRecord] = []
+    header_size = TRACE_RECORD_HEADER.size
+    pos = len(TRACE_FILE_MAGIC)
+    while pos < len(data):
+        if pos + header_size > len(data):
+            raise TuyaBLEDataLengthError()
+        timestamp, direction, length = TRACE_RECORD_HEADER.unpack_from(data, pos)
+        pos += header_size
+        if pos + length > len(data):
+            raise TuyaBLEDataLengthError()
+        result.append((timestamp, direction, data[pos:pos + length]))  # fmt: skip
+        pos += length
+    return result
+
+
+def read_trace(path: str) -> list[TuyaBLETraceRecord]:
+    """Load packets from a trace file, blocking."""
+    with open(path, "rb") as file:
+        return load_trace(file.read())
+
+
+async def replay_trace(
+    device: TuyaBLEDevice,
+    records: list[TuyaBLETraceRecord],
+    realtime: bool = False,
+) -> int:
+    """Feed received packets of a trace to the device notification handler.
+
+    The device must have its credentials, so frames of the recorded
+    session can be decrypted. Responses are not sent while the device
+    is not connected. Returns number of replayed packets.
+    """
+    if device._login_key is None:
+        await device._update_device_info()
+
+    count = 0
+    previous: float | None = None
+    for timestamp, direction, data in records:
+        if direction != TRACE_DIRECTION_RX:
+            continue
+        if realtime and previous is not None and timestamp > previous:
+            await asyncio.sleep(timestamp - previous)
+        previous = timestamp
+        device._notification_handler(0, bytearray(data))
+        count += 1
+        # Let tasks created by the handlers run
+        await asyncio.sleep(0)
+    return count
@@ -5,8 +5,16 @@ import hashlib
 import logging
 import secrets
 import time
-from collections.abc import Callable
-from struct import pack, unpack
+from collections.abc import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Iterator,
+)
+from contextlib import asynccontextmanager
+from struct import Struct, pack, unpack_from
+from typing import Any
 
 from bleak.backends.device import BLEDevice
 from bleak.backends.scanner import AdvertisementData
@@ -21,32 +29,70 @@ from bleak_retry_connector import (
 )
 from Crypto.Cipher import AES
 
+from .codec import (
+    DP_HEADER_V3,
+    DP_HEADER_V4,
+    decode_datapoints,
+    decode_value,
+    encode_datapoints,
+    encode_value,
+    split_datapoints,
+)
 from .const import (
     CHARACTERISTIC_NOTIFY,
     CHARACTERISTIC_WRITE,
+    COMMAND_QUEUE_EXPIRY,
+    DATAPOINTS_FRAME_MAX,
+    DP_ID_MAX,
     GATT_MTU,
+    GATT_MTU_MAX,
+    INPUT_BUFFER_KEEP,
+    INPUT_FRAME_MAX,
     MANUFACTURER_DATA_ID,
     RESPONSE_WAIT_TIMEOUT,
     SERVICE_UUID,
+    TRACE_RECORDS_DEFAULT,
     TuyaBLECode,
     TuyaBLEDataPointType,
 )
+from .crc16 import crc16
 from .exceptions import (
+    TuyaBLECommandQueuedError,
     TuyaBLEDataCRCError,
     TuyaBLEDataFormatError,
     TuyaBLEDataLengthError,
     TuyaBLEDeviceError,
     TuyaBLEEnumValueError,
+    TuyaBLEError,
+    TuyaBLEResponseTimeoutError,
 )
 from .manager import AbstaractTuyaBLEDeviceManager, TuyaBLEDeviceCredentials
+from .retry import TuyaBLECircuitBreaker, TuyaBLERetryPolicy
+from .scheduler import TuyaBLEConnectionScheduler, connection_scheduler
+from .trace import TRACE_DIRECTION_RX, TRACE_DIRECTION_TX, TuyaBLETraceRecorder
 
 _LOGGER = logging.getLogger(__name__)
 
 
 BLEAK_EXCEPTIONS = (*BLEAK_RETRY_EXCEPTIONS, OSError)
 
+# Negotiated write payload size by connection source and device address,
+# used when a reconnected client does not report it
+_mtu_cache: dict[tuple[str, str], int] = {}
+
 
 class TuyaBLEDataPoint:
+    __slots__ = (
+        "_owner",
+        "_id",
+        "_timestamp",
+        "_flags",
+        "_type",
+        "_value",
+        "_raw",
+        "_changed_by_device",
+    )
+
     def __init__(
         self,
         owner: TuyaBLEDataPoints,
@@ -55,12 +101,13 @@ class TuyaBLEDataPoint:
         flags: int,
         type: TuyaBLEDataPointType,
         value: bytes | bool | int | str,
+        raw: bytes | None = None,
     ) -> None:
         self._owner = owner
         self._id = id
         self._value = value
         self._changed_by_device = False
-        self._update_from_device(timestamp, flags, type, value)
+        self._update_from_device(timestamp, flags, type, value, raw)
 
     def _update_from_device(
         self,
@@ -68,30 +115,18 @@ class TuyaBLEDataPoint:
         flags: int,
         type: TuyaBLEDataPointType,
         value: bytes | bool | int | str,
+        raw: bytes | None,
     ) -> None:
         self._timestamp = timestamp
         self._flags = flags
         self._type = type
         self._changed_by_device = self._value != value
         self._value = value
+        # Last value reported by the device as received, None if never
+        self._raw = raw
 
     def _get_value(self) -> bytes:
-        match self._type:
-            case TuyaBLEDataPointType.DT_RAW | TuyaBLEDataPointType.DT_BITMAP:
-                return self._value
-            case TuyaBLEDataPointType.DT_BOOL:
-                return pack(">B", 1 if self._value else 0)
-            case TuyaBLEDataPointType.DT_VALUE:
-                return pack(">i", self._value)
-            case TuyaBLEDataPointType.DT_ENUM:
-                if self._value > 0xFFFF:
-                    return pack(">I", self._value)
-                elif self._value > 0xFF:
-                    return pack(">H", self._value)
-                else:
-                    return pack(">B", self._value)
-            case TuyaBLEDataPointType.DT_STRING:
-                return self._value.encode()
+        return encode_value(self._type, self._value)
 
     @property
     def id(self) -> int:
@@ -118,6 +153,15 @@ class TuyaBLEDataPoint:
         return self._changed_by_device
 
     async def set_value(self, value: bytes | bool | int | str) -> None:
+        """Set new value, sending it to the device.
+
+        The new value is visible right away. It is rolled back if the
+        device rejects it or does not respond in time. If the device is
+        unreachable, TuyaBLECommandQueuedError is raised and the value
+        stays until the queued write is sent, or is rolled back when it
+        expires.
+        """
+        previous_value = self._value
         match self._type:
             case TuyaBLEDataPointType.DT_RAW | TuyaBLEDataPointType.DT_BITMAP:
                 self._value = bytes(value)
@@ -136,38 +180,67 @@ class TuyaBLEDataPoint:
                 self._value = str(value)
 
         self._changed_by_device = False
-        await self._owner._update_from_user(self._id)
+        await self._owner._update_from_user(self._id, previous_value)
 
 
 class TuyaBLEDataPoints:
     def __init__(self, owner: TuyaBLEDevice) -> None:
         self._owner = owner
-        self._datapoints: dict[int, TuyaBLEDataPoint] = {}
+        # Datapoint ids are one byte, so datapoints are indexed densely
+        # by id; ids out of that range are only kept for compatibility.
+        self._table: list[TuyaBLEDataPoint | None] = [None] * (DP_ID_MAX + 1)
+        self._extra: dict[int, TuyaBLEDataPoint] = {}
+        self._count = 0
         self._update_started: int = 0
         self._updated_datapoints: list[int] = []
+        # Values before the batch, restored if sending fails
+        self._previous_values: dict[int, bytes | bool | int | str] = {}
+        # Values before writes queued while the device is unreachable,
+        # restored if the queued writes are dropped or fail
+        self._queued_values: dict[int, bytes | bool | int | str] = {}
 
     def __len__(self) -> int:
-        return len(self._datapoints)
+        return self._count + len(self._extra)
+
+    def __iter__(self) -> Iterator[TuyaBLEDataPoint]:
+        for datapoint in self._table:
+            if datapoint is not None:
+                yield datapoint
+        yield from self._extra.values()
 
     def __getitem__(self, key: int) -> TuyaBLEDataPoint | None:
-        return self._datapoints.get(key)
+        if key >= 0:
+            try:
+                return self._table[key]
+            except IndexError:
+                pass
+        return self._extra.get(key)
 
     def has_id(self, id: int, type: TuyaBLEDataPointType | None = None) -> bool:
-        return (id in self._datapoints) and (
-            (type is None) or (self._datapoints[id].type == type)
+        datapoint = self[id]
+        return (datapoint is not None) and (
+            (type is None) or (datapoint.type == type)
         )
 
+    def _add(self, datapoint: TuyaBLEDataPoint) -> None:
+        id = datapoint.id
+        if 0 <= id <= DP_ID_MAX:
+            self._table[id] = datapoint
+            self._count += 1
+        else:
+            self._extra[id] = datapoint
+
     def get_or_create(
         self,
         id: int,
         type: TuyaBLEDataPointType,
         value: bytes | bool | int | str | None = None,
     ) -> TuyaBLEDataPoint:
-        datapoint = self._datapoints.get(id)
+        datapoint = self[id]
         if datapoint:
             return datapoint
         datapoint = TuyaBLEDataPoint(self, id, time.time(), 0, type, value)
-        self._datapoints[id] = datapoint
+        self._add(datapoint)
         return datapoint
 
     def begin_update(self) -> None:
@@ -177,35 +250,138 @@ class TuyaBLEDataPoints:
         if self._update_started > 0:
             self._update_started -= 1
             if self._update_started == 0 and len(self._updated_datapoints) > 0:
-                await self._owner._send_datapoints(self._updated_datapoints)
+                datapoint_ids = self._updated_datapoints
+                previous_values = self._previous_values
                 self._updated_datapoints = []
+                self._previous_values = {}
+                await self._send(datapoint_ids, previous_values)
 
-    def _update_from_device(
+    @asynccontextmanager
+    async def batch(self) -> AsyncIterator[None]:
+        """Send all datapoints set inside the block together.
+
+        Batches may be nested, datapoints are sent when the outermost one
+        exits. If a block raises, datapoints set in it are restored to the
+        values they had when it was entered and are not sent, datapoints
+        set by enclosing blocks before it still are.
+        """
+        self.begin_update()
+        updated_datapoints = list(self._updated_datapoints)
+        previous_values = dict(self._previous_values)
+        entered_values = {
+            dp_id: self[dp_id].value for dp_id in self._updated_datapoints
+        }
+        try:
+            yield
+        except BaseException:
+            self._update_started -= 1
+            self._rollback(
+                {
+                    dp_id: entered_values.get(dp_id, previous_value)
+                    for dp_id, previous_value in self._previous_values.items()
+                    if self[dp_id].value != entered_values.get(dp_id, previous_value)
+                }
+            )
+            self._updated_datapoints = updated_datapoints
+            self._previous_values = previous_values
+            raise
+        await self.end_update()
+
+    def _restore(
         self,
         dp_id: int,
         timestamp: float,
         flags: int,
         type: TuyaBLEDataPointType,
         value: bytes | bool | int | str,
+        raw: bytes,
     ) -> None:
-        dp = self._datapoints.get(dp_id)
+        if self[dp_id] is None:
+            self._add(
+                TuyaBLEDataPoint(self, dp_id, timestamp, flags, type, value, raw)
+            )
+
+    def _update_from_device(
+        self,
+        dp_id: int,
+        timestamp: float,
+        flags: int,
+        type: TuyaBLEDataPointType,
+        value: bytes | bool | int | str,
+        raw: bytes,
+    ) -> TuyaBLEDataPoint:
+        dp = self[dp_id]
+        # The reported value is the one to restore from now on
+        self._queued_values.pop(dp_id, None)
         if dp:
-            dp._update_from_device(timestamp, flags, type, value)
+            dp._update_from_device(timestamp, flags, type, value, raw)
         else:
-            self._datapoints[dp_id] = TuyaBLEDataPoint(
-                self, dp_id, timestamp, flags, type, value
-            )
+            dp = TuyaBLEDataPoint(self, dp_id, timestamp, flags, type, value, raw)
+            self._add(dp)
+        return dp
 
-    async def _update_from_user(self, dp_id: int) -> None:
+    async def _update_from_user(
+        self, dp_id: int, previous_value: bytes | bool | int | str
+    ) -> None:
+        self._owner._fire_user_update_callbacks([self[dp_id]])
         if self._update_started > 0:
             if dp_id in self._updated_datapoints:
                 self._updated_datapoints.remove(dp_id)
+            else:
+                self._previous_values[dp_id] = previous_value
             self._updated_datapoints.append(dp_id)
         else:
-            await self._owner._send_datapoints([dp_id])
+            await self._send([dp_id], {dp_id: previous_value})
 
+    async def _send(
+        self,
+        datapoint_ids: list[int],
+        previous_values: dict[int, bytes | bool | int | str],
+    ) -> None:
+        values = {dp_id: self[dp_id].value for dp_id in datapoint_ids}
+        try:
+            await self._owner._send_datapoints(datapoint_ids)
+        except TuyaBLECommandQueuedError:
+            # Values are shown until the queued writes are sent or dropped
+            for dp_id, previous_value in previous_values.items():
+                self._queued_values.setdefault(dp_id, previous_value)
+            raise
+        except Exception:
+            # Keep values updated meanwhile by the device or another write
+            rolled_back = {
+                dp_id: previous_value
+                for dp_id, previous_value in previous_values.items()
+                if self[dp_id].value == values[dp_id]
+            }
+            self._owner._dequeue_datapoints(rolled_back)
+            self._rollback(rolled_back)
+            raise
 
-global_connect_lock = asyncio.Lock()
+    def _release_queued(self, datapoint_ids: Iterable[int], rollback: bool) -> None:
+        """Forget values before queued writes, restoring them if dropped."""
+        previous_values = {
+            dp_id: self._queued_values.pop(dp_id)
+            for dp_id in datapoint_ids
+            if dp_id in self._queued_values
+        }
+        if rollback:
+            self._rollback(previous_values)
+
+    def _rollback(
+        self, previous_values: dict[int, bytes | bool | int | str]
+    ) -> None:
+        datapoints: list[TuyaBLEDataPoint] = []
+        for dp_id, previous_value in previous_values.items():
+            datapoint = self[dp_id]
+            datapoint._value = previous_value
+            datapoints.append(datapoint)
+        if datapoints:
+            _LOGGER.debug(
+                "%s: Rolled back datapoints %s",
+                self._owner.address,
+                [datapoint.id for datapoint in datapoints],
+            )
+            self._owner._fire_user_update_callbacks(datapoints)
 
 
 class TuyaBLEDevice:
@@ -214,9 +390,30 @@ class TuyaBLEDevice:
         device_manager: AbstaractTuyaBLEDeviceManager,
         ble_device: BLEDevice,
         advertisement_data: AdvertisementData | None = None,
+        connect_scheduler: TuyaBLEConnectionScheduler | None = None,
+        fallback_mtu: int = GATT_MTU,
+        trace_records: int = TRACE_RECORDS_DEFAULT,
+        command_expiry: float = COMMAND_QUEUE_EXPIRY,
+        client_factory: Callable[
+            [BLEDevice, Callable[[BleakClientWithServiceCache], None]],
+            Awaitable[BleakClientWithServiceCache],
+        ]
+        | None = None,
+        retry_policy: TuyaBLERetryPolicy | None = None,
+        circuit_breaker: TuyaBLECircuitBreaker | None = None,
     ) -> None:
         """Init the TuyaBLE."""
         self._device_manager = device_manager
+        self._connect_scheduler = connect_scheduler or connection_scheduler
+        self._retry_policy = retry_policy or TuyaBLERetryPolicy()
+        self._circuit_breaker = circuit_breaker or TuyaBLECircuitBreaker()
+        self._reconnect_retry = 0
+        self._client_factory = client_factory
+        self._fallback_mtu = fallback_mtu
+        self._mtu = fallback_mtu
+        self._trace: TuyaBLETraceRecorder | None = (
+            TuyaBLETraceRecorder(trace_records) if trace_records > 0 else None
+        )
         self._device_info: TuyaBLEDeviceCredentials | None = None
         self._ble_device = ble_device
         self._advertisement_data = advertisement_data
@@ -226,6 +423,12 @@ class TuyaBLEDevice:
         self._expected_disconnect = False
         self._connected_callbacks: list[Callable[[], None]] = []
         self._callbacks: list[Callable[[list[TuyaBLEDataPoint]], None]] = []
+        self._user_update_callbacks: list[
+            Callable[[list[TuyaBLEDataPoint]], None]
+        ] = []
+        self._datapoint_callbacks: dict[
+            int, list[Callable[[list[TuyaBLEDataPoint]], None]]
+        ] = {}
         self._disconnected_callbacks: list[Callable[[], None]] = []
         self._current_seq_num = 1
         self._seq_num_lock = asyncio.Lock()
@@ -233,6 +436,8 @@ class TuyaBLEDevice:
         self._is_bound = False
         self._flags = 0
         self._protocol_version = 2
+        # Whether the protocol version came from the device, not a snapshot
+        self._protocol_version_reported = False
 
         self._device_version: str = ""
         self._protocol_version_str: str = ""
@@ -247,7 +452,12 @@ class TuyaBLEDevice:
 
         self._is_paired = False
 
-        self._input_buffer: bytearray | None = None
+        # Reassembly buffer is preallocated from the announced frame length
+        # and reused while large enough, _input_length is the write position.
+        # Announced lengths are bounded by INPUT_FRAME_MAX and buffers above
+        # INPUT_BUFFER_KEEP are released after use.
+        self._input_buffer = bytearray()
+        self._input_length = 0
         self._input_expected_packet_num = 0
         self._input_expected_length = 0
         self._input_expected_responses: dict[int,
@@ -256,12 +466,24 @@ class TuyaBLEDevice:
 
         self._datapoints = TuyaBLEDataPoints(self)
 
+        # Outbound queue, datapoint id to number and enqueue time of the
+        # write; the value to send is always the current value of the
+        # datapoint (last write wins). Writes with a caller waiting for
+        # them in _waiting_writes never expire.
+        self._command_expiry = command_expiry
+        self._pending_datapoints: dict[int, tuple[int, float]] = {}
+        self._waiting_writes: set[int] = set()
+        self._write_count = 0
+        self._flush_task: asyncio.Task | None = None
+
     def set_ble_device_and_advertisement_data(
         self, ble_device: BLEDevice, advertisement_data: AdvertisementData
     ) -> None:
         """Set the ble device."""
         self._ble_device = ble_device
         self._advertisement_data = advertisement_data
+        # The device is in range again
+        self._circuit_breaker.reset()
 
     async def initialize(self) -> None:
         _LOGGER.debug("%s: Initializing", self.address)
@@ -327,6 +549,7 @@ class TuyaBLEDevice:
                 if manufacturer_data and len(manufacturer_data) > 6:
                     self._is_bound = (manufacturer_data[0] & 0x80) != 0
                     self._protocol_version = manufacturer_data[1]
+                    self._protocol_version_reported = True
                     raw_uuid = manufacturer_data[6:]
                     if raw_product_id:
                         key = hashlib.md5(raw_product_id).digest()
@@ -347,6 +570,11 @@ class TuyaBLEDevice:
         else:
             return self._ble_device.name or self._ble_device.address
 
+    @property
+    def is_connected(self) -> bool:
+        """Whether the device is connected and paired."""
+        return bool(self._client and self._client.is_connected and self._is_paired)
+
     @property
     def rssi(self) -> int | None:
         """Get the rssi of the device."""
@@ -415,6 +643,69 @@ class TuyaBLEDevice:
     def protocol_version(self) -> str:
         return self._protocol_version_str
 
+    def snapshot(self) -> dict[str, Any]:
+        """Get versions and datapoints as JSON serializable data.
+
+        Datapoints are saved as last reported by the device, in the bytes
+        received, datapoints never reported are left out.
+        """
+        datapoints: list[list[Any]] = [
+            [
+                datapoint.id,
+                datapoint.type.value,
+                datapoint._raw.hex(),
+                datapoint.timestamp,
+                datapoint.flags,
+            ]
+            for datapoint in self._datapoints
+            if datapoint._raw is not None
+        ]
+        return {
+            "device_version": self._device_version,
+            "hardware_version": self._hardware_version,
+            "protocol_version": self._protocol_version_str,
+            "protocol": self._protocol_version,
+            "datapoints": datapoints,
+        }
+
+    def restore_snapshot(self, snapshot: dict[str, Any]) -> None:
+        """Restore versions and datapoints not yet received from the device."""
+        if not self._device_version:
+            self._device_version = snapshot.get("device_version", "")
+            self._hardware_version = snapshot.get("hardware_version", "")
+            self._protocol_version_str = snapshot.get("protocol_version", "")
+        if not self._protocol_version_reported:
+            self._protocol_version = snapshot.get("protocol", self._protocol_version)
+        for dp_id, type_value, raw, timestamp, flags in snapshot.get(
+            "datapoints", ()
+        ):
+            try:
+                type = TuyaBLEDataPointType(type_value)
+                raw = bytes.fromhex(raw)
+                value = decode_value(type, raw)
+            except ValueError:
+                _LOGGER.debug(
+                    "%s: Skipping invalid datapoint %s in snapshot",
+                    self.address,
+                    dp_id,
+                )
+                continue
+            self._datapoints._restore(dp_id, timestamp, flags, type, value, raw)
+
+    @property
+    def command_expiry(self) -> float:
+        """Seconds a queued datapoint write is kept before it is dropped."""
+        return self._command_expiry
+
+    @command_expiry.setter
+    def command_expiry(self, value: float) -> None:
+        self._command_expiry = value
+
+    @property
+    def trace(self) -> TuyaBLETraceRecorder | None:
+        """Recorder of the last raw packets, None if disabled."""
+        return self._trace
+
     @property
     def datapoints(self) -> TuyaBLEDataPoints:
         """Get datapoints exposed by device."""
@@ -448,6 +739,41 @@ class TuyaBLEDevice:
         """Fire the callbacks."""
         for callback in self._callbacks:
             callback(datapoints)
+        if self._datapoint_callbacks:
+            self._fire_datapoint_callbacks(datapoints)
+
+    def _fire_datapoint_callbacks(self, datapoints: list[TuyaBLEDataPoint]) -> None:
+        """Fire callbacks subscribed to the updated datapoints."""
+        updates: dict[
+            Callable[[list[TuyaBLEDataPoint]], None], list[TuyaBLEDataPoint]
+        ] = {}
+        for datapoint in datapoints:
+            for callback in self._datapoint_callbacks.get(datapoint.id, ()):
+                updates.setdefault(callback, []).append(datapoint)
+        for callback, callback_datapoints in updates.items():
+            callback(callback_datapoints)
+
+    def register_datapoint_callback(
+        self,
+        dp_ids: Iterable[int],
+        callback: Callable[[list[TuyaBLEDataPoint]], None],
+    ) -> Callable[[], None]:
+        """Register a callback to be called when any of datapoints changes.
+
+        The callback receives only the updated datapoints it subscribed to.
+        """
+        dp_ids = frozenset(dp_ids)
+
+        def unregister_callback() -> None:
+            for dp_id in dp_ids:
+                callbacks = self._datapoint_callbacks[dp_id]
+                callbacks.remove(callback)
+                if not callbacks:
+                    del self._datapoint_callbacks[dp_id]
+
+        for dp_id in dp_ids:
+            self._datapoint_callbacks.setdefault(dp_id, []).append(callback)
+        return unregister_callback
 
     def register_callback(
         self,
@@ -461,6 +787,27 @@ class TuyaBLEDevice:
         self._callbacks.append(callback)
         return unregister_callback
 
+    def _fire_user_update_callbacks(self, datapoints: list[TuyaBLEDataPoint]) -> None:
+        """Fire the callbacks."""
+        for callback in self._user_update_callbacks:
+            callback(datapoints)
+
+    def register_user_update_callback(
+        self,
+        callback: Callable[[list[TuyaBLEDataPoint]], None],
+    ) -> Callable[[], None]:
+        """Register a callback to be called when values are set locally.
+
+        Called when a new value is set before it is sent to the device,
+        and again when it is rolled back after sending failed.
+        """
+
+        def unregister_callback() -> None:
+            self._user_update_callbacks.remove(callback)
+
+        self._user_update_callbacks.append(callback)
+        return unregister_callback
+
     def _fire_disconnected_callbacks(self) -> None:
         """Fire the callbacks."""
         for callback in self._disconnected_callbacks:
@@ -539,7 +886,6 @@ class TuyaBLEDevice:
 
     async def _ensure_connected(self) -> None:
         """Ensure connection to device is established."""
-        global global_connect_lock
         if self._expected_disconnect:
             return
         if self._connect_lock.locked():
@@ -551,122 +897,66 @@ class TuyaBLEDevice:
             )
         if self._client and self._client.is_connected and self._is_paired:
             return
-        async with self._connect_lock:
-            # Check again while holding the lock
-            await asyncio.sleep(0.01)
-            if self._client and self._client.is_connected and self._is_paired:
-                return
-            attempts_count = 100
-            while attempts_count > 0:
-                attempts_count -= 1
-                if attempts_count == 0:
-                    _LOGGER.error(
-                        "%s: Connecting, all attempts failed; RSSI: %s",
-                        self.address,
-                        self.rssi,
+        attempt = 0
+        while True:
+            async with self._connect_lock:
+                # Check again while holding the lock
+                await asyncio.sleep(0.01)
+                if self._client and self._client.is_connected and self._is_paired:
+                    return
+                if not self._circuit_breaker.allow():
+                    raise BleakNotFoundError(
+                        "%s: Device is unreachable, next connect in %.0f s"
+                        % (self.address, self._circuit_breaker.time_until_retry)
                     )
-                    raise BleakNotFoundError()
-                try:
-                    async with global_connect_lock:
-                        _LOGGER.debug(
-                            "%s: Connecting; RSSI: %s", self.address, self.rssi
-                        )
-                        client = await establish_connection(
-                            BleakClientWithServiceCache,
-                            self._ble_device,
-                            self.address,
-                            self._disconnected,
-                            use_services_cache=True,
-                            ble_device_callback=lambda: self._ble_device,
-                        )
-                except BleakNotFoundError:
+                attempt += 1
+                if await self._connect_attempt():
+                    self._circuit_breaker.record_success()
+                    break
+                if attempt >= self._retry_policy.attempts:
+                    self._circuit_breaker.record_failure()
                     _LOGGER.error(
-                        "%s: device not found, not in range, or poor RSSI: %s",
+                        "%s: Connecting, all attempts failed; RSSI: %s; "
+                        "next connect in %.0f s",
                         self.address,
                         self.rssi,
-                        exc_info=True,
-                    )
-                    continue
-                except BLEAK_EXCEPTIONS:
-                    _LOGGER.debug(
-                        "%s: communication failed", self.address, exc_info=True
+                        self._circuit_breaker.time_until_retry,
                     )
-                    continue
-                except:
-                    _LOGGER.debug("%s: unexpected error",
-                                  self.address, exc_info=True)
-                    continue
-
-                if client and client.is_connected:
-                    _LOGGER.debug("%s: Connected; RSSI: %s",
-                                  self.address, self.rssi)
-                    self._client = client
-                    try:
-                        await self._client.start_notify(
-                            CHARACTERISTIC_NOTIFY, self._notification_handler
-                        )
-                    except:  # [BLEAK_EXCEPTIONS, BleakNotFoundError]:
-                        self._client = None
-                        _LOGGER.error("%s: starting notifications failed",
-                                      self.address, exc_info=True)
-                        continue
-                else:
-                    continue
+                    raise BleakNotFoundError()
+            # Backoff without the lock, callers waiting for it see the
+            # connection made meanwhile by another caller
+            await asyncio.sleep(self._retry_policy.get_delay(attempt - 1))
 
-                if self._client and self._client.is_connected:
-                    _LOGGER.debug(
-                        "%s: Sending device info request", self.address)
-                    try:
-                        if not await self._send_packet_while_connected(
-                            TuyaBLECode.FUN_SENDER_DEVICE_INFO,
-                            bytes(0),
-                            0,
-                            True,
-                        ):
-                            self._client = None
-                            _LOGGER.error(
-                                "%s: Sending device info request failed",
-                                self.address,
-                            )
-                            continue
-                    except:  # [BLEAK_EXCEPTIONS, BleakNotFoundError]:
-                        self._client = None
-                        _LOGGER.error("%s: Sending device info request failed",
-                                      self.address, exc_info=True)
-                        continue
-                else:
-                    continue
-
-                if self._client and self._client.is_connected:
-                    _LOGGER.debug("%s: Sending pairing request", self.address)
-                    try:
-                        if not await self._send_packet_while_connected(
-                            TuyaBLECode.FUN_SENDER_PAIR,
-                            self._build_pairing_request(),
-                            0,
-                            True,
-                        ):
-                            self._client = None
-                            _LOGGER.error(
-                                "%s: Sending pairing request failed",
-                                self.address,
-                            )
-                            continue
-                    except:  # [BLEAK_EXCEPTIONS, BleakNotFoundError]:
-                        self._client = None
-                        _LOGGER.error("%s: Sending pairing request failed",
-                                      self.address, exc_info=True)
-                        continue
-                else:
-                    continue
+        self._handle_connected()
 
-                break
+    async def try_connect(self) -> bool:
+        """Connect and pair with a single attempt, True if connected.
 
+        A failed attempt is neither retried nor counted by the circuit
+        breaker, update and writes still connect with retries afterwards.
+        """
+        if self._expected_disconnect:
+            return False
+        async with self._connect_lock:
+            if self.is_connected:
+                return True
+            if not self._circuit_breaker.allow():
+                return False
+            if not await self._connect_attempt():
+                return False
+            self._circuit_breaker.record_success()
+        self._handle_connected()
+        return self.is_connected
+
+    def _handle_connected(self) -> None:
+        """Notify about a connection made, sending queued datapoints."""
         if self._client:
             if self._client.is_connected:
                 if self._is_paired:
                     _LOGGER.debug("%s: Successfully connected", self.address)
                     self._fire_connected_callbacks()
+                    if self._pending_datapoints:
+                        self._get_flush_task()
                 else:
                     _LOGGER.error("%s: Connected but not paired", self.address)
             else:
@@ -674,6 +964,113 @@ class TuyaBLEDevice:
         else:
             _LOGGER.error("%s: No client device", self.address)
 
+    async def _connect_attempt(self) -> bool:
+        """Connect and pair once, holding the connect lock."""
+        try:
+            async with self._connect_scheduler.connect_slot(
+                self._ble_device
+            ):
+                _LOGGER.debug(
+                    "%s: Connecting; RSSI: %s", self.address, self.rssi
+                )
+                client = await self._establish_connection()
+        except BleakNotFoundError:
+            _LOGGER.debug(
+                "%s: device not found, not in range, or poor RSSI: %s",
+                self.address,
+                self.rssi,
+                exc_info=True,
+            )
+            return False
+        except BLEAK_EXCEPTIONS:
+            _LOGGER.debug(
+                "%s: communication failed", self.address, exc_info=True
+            )
+            return False
+        except:
+            _LOGGER.debug("%s: unexpected error",
+                          self.address, exc_info=True)
+            return False
+
+        if client and client.is_connected:
+            _LOGGER.debug("%s: Connected; RSSI: %s",
+                          self.address, self.rssi)
+            self._client = client
+            self._update_mtu(client)
+            try:
+                await self._client.start_notify(
+                    CHARACTERISTIC_NOTIFY, self._notification_handler
+                )
+            except:  # [BLEAK_EXCEPTIONS, BleakNotFoundError]:
+                self._client = None
+                _LOGGER.error("%s: starting notifications failed",
+                              self.address, exc_info=True)
+                return False
+        else:
+            return False
+
+        if self._client and self._client.is_connected:
+            _LOGGER.debug(
+                "%s: Sending device info request", self.address)
+            try:
+                if not await self._send_packet_while_connected(
+                    TuyaBLECode.FUN_SENDER_DEVICE_INFO,
+                    bytes(0),
+                    0,
+                    True,
+                ):
+                    self._client = None
+                    _LOGGER.error(
+                        "%s: Sending device info request failed",
+                        self.address,
+                    )
+                    return False
+            except:  # [BLEAK_EXCEPTIONS, BleakNotFoundError]:
+                self._client = None
+                _LOGGER.error("%s: Sending device info request failed",
+                              self.address, exc_info=True)
+                return False
+        else:
+            return False
+
+        if self._client and self._client.is_connected:
+            _LOGGER.debug("%s: Sending pairing request", self.address)
+            try:
+                if not await self._send_packet_while_connected(
+                    TuyaBLECode.FUN_SENDER_PAIR,
+                    self._build_pairing_request(),
+                    0,
+                    True,
+                ):
+                    self._client = None
+                    _LOGGER.error(
+                        "%s: Sending pairing request failed",
+                        self.address,
+                    )
+                    return False
+            except:  # [BLEAK_EXCEPTIONS, BleakNotFoundError]:
+                self._client = None
+                _LOGGER.error("%s: Sending pairing request failed",
+                              self.address, exc_info=True)
+                return False
+        else:
+            return False
+
+        return True
+
+    async def _establish_connection(self) -> BleakClientWithServiceCache:
+        """Connect to the device using client factory if set."""
+        if self._client_factory:
+            return await self._client_factory(self._ble_device, self._disconnected)
+        return await establish_connection(
+            BleakClientWithServiceCache,
+            self._ble_device,
+            self.address,
+            self._disconnected,
+            use_services_cache=True,
+            ble_device_callback=lambda: self._ble_device,
+        )
+
     async def _reconnect(self) -> None:
         """Attempt a reconnect"""
         _LOGGER.debug("%s: Reconnect, ensuring connection", self.address)
@@ -686,27 +1083,57 @@ class TuyaBLEDevice:
             if self._expected_disconnect:
                 return
             _LOGGER.debug("%s: Reconnect, connection ensured", self.address)
+            self._reconnect_retry = 0
         except BLEAK_EXCEPTIONS:  # BleakNotFoundError:
+            delay = max(
+                self._retry_policy.get_delay(self._reconnect_retry),
+                self._circuit_breaker.time_until_retry,
+            )
+            self._reconnect_retry += 1
             _LOGGER.debug(
-                "%s: Reconnect, failed to ensure connection - backing off",
+                "%s: Reconnect, failed to ensure connection - backing off %.1f s",
                 self.address,
+                delay,
                 exc_info=True,
             )
-            await asyncio.sleep(BLEAK_BACKOFF_TIME)
+            await asyncio.sleep(delay)
             _LOGGER.debug("%s: Reconnecting again", self.address)
             asyncio.create_task(self._reconnect())
 
+    def _update_mtu(self, client: BleakClientWithServiceCache) -> None:
+        """Update size of written packets from the negotiated MTU."""
+        # Another adapter or proxy may negotiate a smaller MTU
+        cache_key = (
+            self._connect_scheduler.get_source(self._ble_device)[0],
+            self.address,
+        )
+        mtu: int | None = None
+        try:
+            characteristic = client.services.get_characteristic(
+                CHARACTERISTIC_WRITE
+            )
+            if characteristic:
+                mtu = characteristic.max_write_without_response_size
+            else:
+                mtu = client.mtu_size - 3
+        except (AttributeError, BleakError):
+            _LOGGER.debug(
+                "%s: Unable to read negotiated MTU", self.address, exc_info=True
+            )
+
+        if mtu and mtu > GATT_MTU:
+            self._mtu = min(mtu, GATT_MTU_MAX)
+            _mtu_cache[cache_key] = self._mtu
+        elif mtu is None and cache_key in _mtu_cache:
+            self._mtu = _mtu_cache[cache_key]
+        else:
+            _mtu_cache.pop(cache_key, None)
+            self._mtu = self._fallback_mtu
+        _LOGGER.debug("%s: Using packet size %s", self.address, self._mtu)
+
     @staticmethod
     def _calc_crc16(data: bytes) -> int:
-        crc = 0xFFFF
-        for byte in data:
-            crc ^= byte & 255
-            for _ in range(8):
-                tmp = crc & 1
-                crc >>= 1
-                if tmp != 0:
-                    crc ^= 0xA001
-        return crc
+        return crc16(data)
 
     @staticmethod
     def _pack_int(value: int) -> bytearray:
@@ -781,7 +1208,7 @@ class TuyaBLEDevice:
                 packet += pack(">B", self._protocol_version << 4)
 
             data_part = encrypted[
-                pos:pos + GATT_MTU - len(packet)  # fmt: skip
+                pos:pos + self._mtu - len(packet)  # fmt: skip
             ]
             packet += data_part
             command.append(packet)
@@ -803,14 +1230,16 @@ class TuyaBLEDevice:
         data: bytes,
         wait_for_response: bool = True,
         # retry: int | None = None,
-    ) -> None:
+    ) -> bool:
         """Send packet to device and optional read response."""
         if self._expected_disconnect:
-            return
+            return False
         await self._ensure_connected()
         if self._expected_disconnect:
-            return
-        await self._send_packet_while_connected(code, data, 0, wait_for_response)
+            return False
+        return await self._send_packet_while_connected(
+            code, data, 0, wait_for_response
+        )
 
     async def _send_response(
         self,
@@ -943,6 +1372,10 @@ class TuyaBLEDevice:
 
     async def _int_send_packets_locked(self, packets: list[bytes]) -> None:
         """Execute command and read response."""
+        if self._trace is not None:
+            for packet in packets:
+                self._trace.record(TRACE_DIRECTION_TX, packet)
+
         for packet in packets:
             if self._client:
                 try:
@@ -1012,45 +1445,37 @@ class TuyaBLEDevice:
 
     def _parse_datapoints_v3(
         self, timestamp: float, flags: int, data: bytes, start_pos: int
-    ) -> int:
-        datapoints: list[TuyaBLEDataPoint] = []
+    ) -> None:
+        self._parse_datapoints(timestamp, flags, data, start_pos, DP_HEADER_V3)
 
-        pos = start_pos
-        while len(data) - pos >= 4:
-            id: int = data[pos]
-            pos += 1
-            _type: int = data[pos]
-            if _type > TuyaBLEDataPointType.DT_BITMAP.value:
-                raise TuyaBLEDataFormatError()
-            type: TuyaBLEDataPointType = TuyaBLEDataPointType(_type)
-            pos += 1
-            data_len: int = data[pos]
-            pos += 1
-            next_pos = pos + data_len
-            if next_pos > len(data):
-                raise TuyaBLEDataLengthError()
-            raw_value = data[pos:next_pos]
-            match type:
-                case (TuyaBLEDataPointType.DT_RAW | TuyaBLEDataPointType.DT_BITMAP):
-                    value = raw_value
-                case TuyaBLEDataPointType.DT_BOOL:
-                    value = int.from_bytes(raw_value, "big") != 0
-                case (TuyaBLEDataPointType.DT_VALUE | TuyaBLEDataPointType.DT_ENUM):
-                    value = int.from_bytes(raw_value, "big", signed=True)
-                case TuyaBLEDataPointType.DT_STRING:
-                    value = raw_value.decode()
+    def _parse_datapoints_v4(
+        self, timestamp: float, flags: int, data: bytes, start_pos: int
+    ) -> None:
+        self._parse_datapoints(timestamp, flags, data, start_pos, DP_HEADER_V4)
 
-            _LOGGER.debug(
-                "%s: Received datapoint update, id: %s, type: %s: value: %s",
-                self.address,
-                id,
-                type.name,
-                value,
+    def _parse_datapoints(
+        self,
+        timestamp: float,
+        flags: int,
+        data: bytes,
+        start_pos: int,
+        header: Struct,
+    ) -> None:
+        decoded = decode_datapoints(data, start_pos, header)
+        debug = _LOGGER.isEnabledFor(logging.DEBUG)
+        datapoints: list[TuyaBLEDataPoint] = [None] * len(decoded)
+        for index, (id, type, value, raw) in enumerate(decoded):
+            if debug:
+                _LOGGER.debug(
+                    "%s: Received datapoint update, id: %s, type: %s: value: %s",
+                    self.address,
+                    id,
+                    type.name,
+                    value,
+                )
+            datapoints[index] = self._datapoints._update_from_device(
+                id, timestamp, flags, type, value, raw
             )
-            self._datapoints._update_from_device(
-                id, timestamp, flags, type, value)
-            datapoints.append(self._datapoints[id])
-            pos = next_pos
 
         self._fire_callbacks(datapoints)
 
@@ -1069,6 +1494,7 @@ class TuyaBLEDevice:
                 self._hardware_version = ("%s.%s") % (data[12], data[13])
 
                 self._protocol_version = data[2]
+                self._protocol_version_reported = True
                 self._flags = data[4]
                 self._is_bound = data[5] != 0
 
@@ -1094,6 +1520,15 @@ class TuyaBLEDevice:
                     raise TuyaBLEDataLengthError()
                 result = data[0]
 
+            case TuyaBLECode.FUN_SENDER_DPS:
+                if len(data) >= 1:
+                    result = data[0]
+
+            case TuyaBLECode.FUN_SENDER_DPS_V4:
+                # version, result
+                if len(data) >= 2:
+                    result = data[1]
+
             case TuyaBLECode.FUN_RECEIVE_TIME1_REQ:
                 if len(data) != 0:
                     raise TuyaBLEDataLengthError()
@@ -1152,6 +1587,35 @@ class TuyaBLEDevice:
                 data = pack(">HBB", dp_seq_num, flags, 0)
                 asyncio.create_task(self._send_response(code, data, seq_num))
 
+            case TuyaBLECode.FUN_RECEIVE_DP_V4:
+                # version, sn, type, mode, ack, datapoints
+                if len(data) < 8:
+                    raise TuyaBLEDataLengthError()
+                version, dp_seq_num, flags, mode, ack = unpack_from(
+                    ">BIBBB", data
+                )
+                self._parse_datapoints_v4(time.time(), flags, data, 8)
+                if ack == 0:
+                    data = pack(">BIBBB", version, dp_seq_num, flags, mode, 0)
+                    asyncio.create_task(
+                        self._send_response(code, data, seq_num))
+
+            case TuyaBLECode.FUN_RECEIVE_TIME_DP_V4:
+                # version, sn, type, mode, ack, timestamp, datapoints
+                timestamp: float
+                pos: int
+                if len(data) < 8:
+                    raise TuyaBLEDataLengthError()
+                version, dp_seq_num, flags, mode, ack = unpack_from(
+                    ">BIBBB", data
+                )
+                timestamp, pos = self._parse_timestamp(data, 8)
+                self._parse_datapoints_v4(timestamp, flags, data, pos)
+                if ack == 0:
+                    data = pack(">BIBBB", version, dp_seq_num, flags, mode, 0)
+                    asyncio.create_task(
+                        self._send_response(code, data, seq_num))
+
         if response_to != 0:
             future = self._input_expected_responses.pop(response_to, None)
             if future:
@@ -1167,37 +1631,37 @@ class TuyaBLEDevice:
                     future.set_exception(TuyaBLEDeviceError(result))
 
     def _clean_input(self) -> None:
-        self._input_buffer = None
+        self._input_length = 0
         self._input_expected_packet_num = 0
         self._input_expected_length = 0
+        if len(self._input_buffer) > INPUT_BUFFER_KEEP:
+            self._input_buffer = bytearray()
 
     def _parse_input(self) -> None:
-        security_flag = self._input_buffer[0]
-        key = self._get_key(security_flag)
-        iv = self._input_buffer[1:17]
-        encrypted = self._input_buffer[17:]
-
+        length = self._input_length
+        input_buffer = self._input_buffer
         self._clean_input()
 
-        cipher = AES.new(key, AES.MODE_CBC, iv)
-        raw = cipher.decrypt(encrypted)
+        with memoryview(input_buffer) as buffer:
+            security_flag = buffer[0]
+            key = self._get_key(security_flag)
+            cipher = AES.new(key, AES.MODE_CBC, buffer[1:17])
+            raw = cipher.decrypt(buffer[17:length])
 
         seq_num: int
         response_to: int
         _code: int
-        length: int
-        seq_num, response_to, _code, length = unpack(">IIHH", raw[:12])
+        data_length: int
+        seq_num, response_to, _code, data_length = unpack_from(">IIHH", raw)
 
-        data_end_pos = length + 12
+        data_end_pos = data_length + 12
         raw_length = len(raw)
         if raw_length < data_end_pos:
             raise TuyaBLEDataLengthError()
         if raw_length > data_end_pos:
-            calc_crc = self._calc_crc16(raw[:data_end_pos])
-            (data_crc,) = unpack(
-                ">H",
-                raw[data_end_pos:data_end_pos + 2]  # fmt: skip
-            )
+            with memoryview(raw) as raw_view:
+                calc_crc = self._calc_crc16(raw_view[:data_end_pos])
+            (data_crc,) = unpack_from(">H", raw, data_end_pos)
             if calc_crc != data_crc:
                 raise TuyaBLEDataCRCError()
         data = raw[12:data_end_pos]
@@ -1236,7 +1700,10 @@ class TuyaBLEDevice:
 
     def _notification_handler(self, _sender: int, data: bytearray) -> None:
         """Handle notification responses."""
-        _LOGGER.debug("%s: Packet received: %s", self.address, data.hex())
+        if self._trace is not None:
+            self._trace.record(TRACE_DIRECTION_RX, data)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("%s: Packet received: %s", self.address, data.hex())
 
         pos: int = 0
         packet_num: int
@@ -1254,10 +1721,35 @@ class TuyaBLEDevice:
 
         if packet_num == self._input_expected_packet_num:
             if packet_num == 0:
-                self._input_buffer = bytearray()
                 self._input_expected_length, pos = self._unpack_int(data, pos)
                 pos += 1
-            self._input_buffer += data[pos:]
+                if self._input_expected_length > INPUT_FRAME_MAX:
+                    _LOGGER.error(
+                        "%s: Unexpcted length of frame in notifications, "
+                        "announced %s maximum %s",
+                        self.address,
+                        self._input_expected_length,
+                        INPUT_FRAME_MAX,
+                    )
+                    self._clean_input()
+                    return
+                if len(self._input_buffer) < self._input_expected_length:
+                    self._input_buffer = bytearray(self._input_expected_length)
+            start = self._input_length
+            end = start + len(data) - pos
+            if end > self._input_expected_length:
+                _LOGGER.error(
+                    "%s: Unexpcted length of data in notifications, "
+                    "received %s expected %s",
+                    self.address,
+                    end,
+                    self._input_expected_length,
+                )
+                self._clean_input()
+                return
+            with memoryview(data) as chunk:
+                self._input_buffer[start:end] = chunk[pos:]
+            self._input_length = end
             self._input_expected_packet_num += 1
         else:
             _LOGGER.error(
@@ -1269,40 +1761,156 @@ class TuyaBLEDevice:
             self._clean_input()
             return
 
-        if len(self._input_buffer) > self._input_expected_length:
-            _LOGGER.error(
-                "%s: Unexpcted length of data in notifications, "
-                "received %s expected %s",
-                self.address,
-                len(self._input_buffer),
-                self._input_expected_length,
-            )
-            self._clean_input()
-            return
-        elif len(self._input_buffer) == self._input_expected_length:
+        if self._input_length == self._input_expected_length:
             self._parse_input()
 
+    def _encode_datapoints(
+        self, datapoint_ids: list[int], header: Struct, offset: int = 0
+    ) -> list[bytearray]:
+        """Encode datapoints into as few frame payloads as possible."""
+        debug = _LOGGER.isEnabledFor(logging.DEBUG)
+        encoded: list[tuple[int, TuyaBLEDataPointType, bytes]] = [None] * len(
+            datapoint_ids
+        )
+        for index, dp_id in enumerate(datapoint_ids):
+            dp = self._datapoints[dp_id]
+            if debug:
+                _LOGGER.debug(
+                    "%s: Sending datapoint update, id: %s, type: %s: value: %s",
+                    self.address,
+                    dp.id,
+                    dp.type.name,
+                    dp.value,
+                )
+            encoded[index] = (dp.id, dp.type, dp._get_value())
+        return [
+            encode_datapoints(group, header, offset)
+            for group in split_datapoints(
+                encoded, DATAPOINTS_FRAME_MAX - offset, header
+            )
+        ]
+
+    def _send_failed_error(self) -> TuyaBLEError:
+        """Get error of a frame _send_packet did not send."""
+        if self._expected_disconnect:
+            # Not sent at all, kept queued like writes before a connection
+            return TuyaBLECommandQueuedError()
+        return TuyaBLEResponseTimeoutError()
+
     async def _send_datapoints_v3(self, datapoint_ids: list[int]) -> None:
         """Send new values of datapoints to the device."""
-        data = bytearray()
-        for dp_id in datapoint_ids:
-            dp = self._datapoints[dp_id]
-            value = dp._get_value()
+        for data in self._encode_datapoints(datapoint_ids, DP_HEADER_V3):
+            if not await self._send_packet(TuyaBLECode.FUN_SENDER_DPS, data):
+                raise self._send_failed_error()
+
+    async def _send_datapoints_v4(self, datapoint_ids: list[int]) -> None:
+        """Send new values of datapoints to the device."""
+        # Leading byte is the version
+        for data in self._encode_datapoints(datapoint_ids, DP_HEADER_V4, 1):
+            if not await self._send_packet(TuyaBLECode.FUN_SENDER_DPS_V4, data):
+                raise self._send_failed_error()
+
+    def _get_flush_task(self) -> asyncio.Task:
+        """Get running flush of queued datapoints or start a new one."""
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_datapoints())
+            self._flush_task.add_done_callback(self._flush_done)
+        return self._flush_task
+
+    def _flush_done(self, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception():
             _LOGGER.debug(
-                "%s: Sending datapoint update, id: %s, type: %s: value: %s",
+                "%s: Sending queued datapoints failed",
                 self.address,
-                dp.id,
-                dp.type.name,
-                dp.value,
+                exc_info=task.exception(),
             )
-            data += pack(">BBB", dp.id, int(dp.type.value), len(value))
-            data += value
 
-        await self._send_packet(TuyaBLECode.FUN_SENDER_DPS, data)
+    async def _flush_datapoints(self) -> None:
+        """Send queued datapoints, writes queued meanwhile go in next frame."""
+        while self._pending_datapoints:
+            # Datapoints stay queued, flushed again after the next connection
+            try:
+                await self._ensure_connected()
+            except BleakError as ex:
+                raise TuyaBLECommandQueuedError() from ex
+            if not (self._client and self._client.is_connected and self._is_paired):
+                raise TuyaBLECommandQueuedError()
+            expired_before = time.monotonic() - self._command_expiry
+            queued = self._pending_datapoints
+            self._pending_datapoints = {}
+            datapoint_ids = [
+                dp_id
+                for dp_id, (write, queued_time) in queued.items()
+                if queued_time >= expired_before or write in self._waiting_writes
+            ]
+            if len(datapoint_ids) < len(queued):
+                _LOGGER.debug(
+                    "%s: Dropping %s expired datapoint writes",
+                    self.address,
+                    len(queued) - len(datapoint_ids),
+                )
+                self._datapoints._release_queued(
+                    [dp_id for dp_id in queued if dp_id not in datapoint_ids],
+                    True,
+                )
+            if not datapoint_ids:
+                continue
+            try:
+                await self._send_datapoints_now(datapoint_ids)
+            except TuyaBLECommandQueuedError:
+                # Queued again unless written again meanwhile
+                for dp_id in datapoint_ids:
+                    self._pending_datapoints.setdefault(dp_id, queued[dp_id])
+                raise
+            except Exception:
+                # Writes queued meanwhile stay for the next flush
+                self._datapoints._release_queued(datapoint_ids, True)
+                raise
+            self._datapoints._release_queued(datapoint_ids, False)
+
+    def _dequeue_datapoints(self, datapoint_ids: Iterable[int]) -> None:
+        """Drop queued writes of datapoints, their values were rolled back."""
+        for dp_id in datapoint_ids:
+            self._pending_datapoints.pop(dp_id, None)
 
     async def _send_datapoints(self, datapoint_ids: list[int]) -> None:
+        """Queue new values of datapoints and wait until they are sent.
+
+        Only the latest value of a datapoint is kept while the device is
+        unreachable, all queued datapoints are sent in a single frame.
+        Raises TuyaBLECommandQueuedError if the device could not be
+        connected, the datapoints are then sent after it reconnects unless
+        they expire first.
+        """
+        self._write_count += 1
+        write = self._write_count
+        now = time.monotonic()
+        for dp_id in datapoint_ids:
+            self._pending_datapoints.pop(dp_id, None)
+            self._pending_datapoints[dp_id] = (write, now)
+        self._waiting_writes.add(write)
+        try:
+            while True:
+                try:
+                    await asyncio.shield(self._get_flush_task())
+                    return
+                except TuyaBLECommandQueuedError:
+                    raise
+                except Exception:
+                    # The failed frame did not carry datapoints still queued
+                    if not any(
+                        self._pending_datapoints.get(dp_id, (None,))[0] == write
+                        for dp_id in datapoint_ids
+                    ):
+                        raise
+        finally:
+            self._waiting_writes.discard(write)
+
+    async def _send_datapoints_now(self, datapoint_ids: list[int]) -> None:
         """Send new values of datapoints to the device."""
         if self._protocol_version == 3:
             await self._send_datapoints_v3(datapoint_ids)
+        elif self._protocol_version >= 4:
+            await self._send_datapoints_v4(datapoint_ids)
         else:
             raise TuyaBLEDeviceError(0)
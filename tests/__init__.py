@@ -0,0 +1,28 @@
+"""Tests for the Tuya BLE integration.
+
+The library in custom_components/tuya_ble/tuya_ble and the modules next
+to it are imported without running the integration __init__, so their
+tests do not need Home Assistant installed.
+"""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from types import ModuleType
+
+_ROOT = Path(__file__).parent.parent
+
+
+def _register_package(name: str, path: Path) -> None:
+    """Register a package for its submodules without running __init__."""
+    if name in sys.modules:
+        return
+    package = ModuleType(name)
+    package.__path__ = [str(path)]
+    sys.modules[name] = package
+
+
+_register_package("custom_components", _ROOT / "custom_components")
+_register_package(
+    "custom_components.tuya_ble", _ROOT / "custom_components" / "tuya_ble"
+)
@@ -0,0 +1,16 @@
+"""Micro-benchmarks of the Tuya BLE library.
+
+They are not collected by pytest, run one with e.g.
+python -m tests.benchmarks.crc16 from the repository root.
+"""
+from __future__ import annotations
+
+from collections.abc import Callable
+import timeit
+
+
+def measure(func: Callable[[], object], repeat: int = 5) -> float:
+    """Return the best time of one call to func in microseconds."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number * 1e6
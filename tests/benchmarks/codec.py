@@ -0,0 +1,107 @@
+"""Decode and encode a large multi-datapoint report.
+
+The report carries DPs 101-130 of a thermostatic radiator valve, the
+reference functions are the byte-at-a-time loops the codec replaced.
+"""
+from __future__ import annotations
+
+from struct import pack
+
+from custom_components.tuya_ble.tuya_ble.codec import (
+    DP_HEADER_V3,
+    decode_datapoints,
+    encode_datapoints,
+    encode_value,
+)
+from custom_components.tuya_ble.tuya_ble.const import TuyaBLEDataPointType
+from custom_components.tuya_ble.tuya_ble.exceptions import (
+    TuyaBLEDataFormatError,
+    TuyaBLEDataLengthError,
+)
+
+from . import measure
+
+_TYPES = (
+    (TuyaBLEDataPointType.DT_VALUE, 215),
+    (TuyaBLEDataPointType.DT_BOOL, True),
+    (TuyaBLEDataPointType.DT_ENUM, 2),
+    (TuyaBLEDataPointType.DT_RAW, bytes(range(17))),
+    (TuyaBLEDataPointType.DT_BITMAP, b"\x00\x01"),
+)
+DATAPOINTS = [
+    (dp_id, *_TYPES[dp_id % len(_TYPES)]) for dp_id in range(101, 131)
+]
+ENCODED = [
+    (dp_id, type, encode_value(type, value)) for dp_id, type, value in DATAPOINTS
+]
+REPORT = bytes(encode_datapoints(ENCODED, DP_HEADER_V3))
+
+
+def decode_reference(data: bytes, start_pos: int) -> list:
+    result = []
+    pos = start_pos
+    while len(data) - pos >= 4:
+        id: int = data[pos]
+        pos += 1
+        _type: int = data[pos]
+        if _type > TuyaBLEDataPointType.DT_BITMAP.value:
+            raise TuyaBLEDataFormatError()
+        type: TuyaBLEDataPointType = TuyaBLEDataPointType(_type)
+        pos += 1
+        data_len: int = data[pos]
+        pos += 1
+        next_pos = pos + data_len
+        if next_pos > len(data):
+            raise TuyaBLEDataLengthError()
+        raw_value = data[pos:next_pos]
+        match type:
+            case (TuyaBLEDataPointType.DT_RAW | TuyaBLEDataPointType.DT_BITMAP):
+                value = raw_value
+            case TuyaBLEDataPointType.DT_BOOL:
+                value = int.from_bytes(raw_value, "big") != 0
+            case (TuyaBLEDataPointType.DT_VALUE | TuyaBLEDataPointType.DT_ENUM):
+                value = int.from_bytes(raw_value, "big", signed=True)
+            case TuyaBLEDataPointType.DT_STRING:
+                value = raw_value.decode()
+        result.append((id, type, value))
+        pos = next_pos
+    return result
+
+
+def encode_reference(datapoints: list) -> bytearray:
+    data = bytearray()
+    for id, type, value in datapoints:
+        data += pack(">BBB", id, int(type.value), len(value))
+        data += value
+    return data
+
+
+def main() -> None:
+    assert [item[:3] for item in decode_datapoints(REPORT, 0)] == decode_reference(
+        REPORT, 0
+    )
+    assert encode_datapoints(ENCODED) == encode_reference(ENCODED)
+    print(f"{len(DATAPOINTS)} datapoints, {len(REPORT)} bytes")
+    print(f"{'':>7} {'reference us':>13} {'codec us':>9} {'speedup':>8}")
+    for name, reference, codec in (
+        (
+            "decode",
+            lambda: decode_reference(REPORT, 0),
+            lambda: decode_datapoints(REPORT, 0),
+        ),
+        (
+            "encode",
+            lambda: encode_reference(ENCODED),
+            lambda: encode_datapoints(ENCODED),
+        ),
+    ):
+        reference_time = measure(reference)
+        codec_time = measure(codec)
+        print(
+            f"{name:>7} {reference_time:>13.1f} {codec_time:>9.1f}"
+            f" {reference_time / codec_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
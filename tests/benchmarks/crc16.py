@@ -0,0 +1,24 @@
+"""Compare the table CRC16 engine with the bitwise one it replaced."""
+from __future__ import annotations
+
+import random
+
+from custom_components.tuya_ble.tuya_ble.crc16 import crc16
+
+from ..test_crc16 import crc16_bitwise
+from . import measure
+
+SIZES = (16, 256, 4096)
+
+
+def main() -> None:
+    print(f"{'size':>6} {'bitwise us':>12} {'table us':>10} {'speedup':>8}")
+    for size in SIZES:
+        data = random.Random(size).randbytes(size)
+        bitwise = measure(lambda: crc16_bitwise(data))
+        table = measure(lambda: crc16(data))
+        print(f"{size:>6} {bitwise:>12.1f} {table:>10.1f} {bitwise / table:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Memory and lookup cost of datapoint stores across a simulated fleet.
+
+The reference store is the dict of datapoints without __slots__ that
+the dense table replaced.
+"""
+from __future__ import annotations
+
+import time
+import tracemalloc
+
+from custom_components.tuya_ble.tuya_ble.const import TuyaBLEDataPointType
+from custom_components.tuya_ble.tuya_ble.tuya_ble import TuyaBLEDataPoints
+
+from . import measure
+
+FLEET_SIZE = 200
+# Datapoint ids of a radiator valve: a few standard ones and 101-130
+DATAPOINT_IDS = [*range(1, 20), *range(101, 131)]
+
+
+class ReferenceDataPoint:
+    def __init__(
+        self,
+        owner: ReferenceDataPoints,
+        id: int,
+        timestamp: float,
+        flags: int,
+        type: TuyaBLEDataPointType,
+        value: bytes | bool | int | str,
+    ) -> None:
+        self._owner = owner
+        self._id = id
+        self._value = value
+        self._changed_by_device = False
+        self._timestamp = timestamp
+        self._flags = flags
+        self._type = type
+
+
+class ReferenceDataPoints:
+    def __init__(self, owner: object) -> None:
+        self._owner = owner
+        self._datapoints: dict[int, ReferenceDataPoint] = {}
+
+    def __getitem__(self, key: int) -> ReferenceDataPoint | None:
+        return self._datapoints.get(key)
+
+    def get_or_create(
+        self, id: int, type: TuyaBLEDataPointType, value: int
+    ) -> ReferenceDataPoint:
+        datapoint = self._datapoints.get(id)
+        if datapoint:
+            return datapoint
+        datapoint = ReferenceDataPoint(self, id, time.time(), 0, type, value)
+        self._datapoints[id] = datapoint
+        return datapoint
+
+
+def _fleet(store_type: type) -> tuple[list, float]:
+    """Create datapoint stores of a fleet, return them and bytes per device."""
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    stores = []
+    for _ in range(FLEET_SIZE):
+        store = store_type(None)
+        for dp_id in DATAPOINT_IDS:
+            store.get_or_create(dp_id, TuyaBLEDataPointType.DT_VALUE, 1000 + dp_id)
+        stores.append(store)
+    used = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    return stores, used / FLEET_SIZE
+
+
+def _lookup_all(stores: list) -> None:
+    for store in stores:
+        for dp_id in DATAPOINT_IDS:
+            store[dp_id]
+
+
+def main() -> None:
+    lookups = FLEET_SIZE * len(DATAPOINT_IDS)
+    print(f"{FLEET_SIZE} devices, {len(DATAPOINT_IDS)} datapoints each")
+    print(f"{'store':>10} {'bytes/device':>13} {'ns/lookup':>10}")
+    for name, store_type in (
+        ("reference", ReferenceDataPoints),
+        ("table", TuyaBLEDataPoints),
+    ):
+        stores, per_device = _fleet(store_type)
+        lookup = measure(lambda: _lookup_all(stores)) * 1000 / lookups
+        print(f"{name:>10} {per_device:>13.0f} {lookup:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Count GATT writes per command at the default and the negotiated MTU.
+
+Counts include the acknowledgements of the reports the simulated device
+sends back after each write.
+"""
+from __future__ import annotations
+
+import asyncio
+
+from custom_components.tuya_ble.tuya_ble import connection_scheduler
+from custom_components.tuya_ble.tuya_ble.const import (
+    GATT_MTU,
+    GATT_MTU_MAX,
+    TuyaBLEDataPointType,
+)
+from custom_components.tuya_ble.tuya_ble.tuya_ble import TuyaBLEDevice
+
+from ..simulator import SIMULATOR_SOURCE, TuyaBLESimulator
+
+DATAPOINTS = {
+    dp_id: (TuyaBLEDataPointType.DT_VALUE, dp_id) for dp_id in range(101, 131)
+}
+DATAPOINTS[1] = (TuyaBLEDataPointType.DT_BOOL, True)
+DATAPOINTS[2] = (TuyaBLEDataPointType.DT_RAW, b"\x00" * 64)
+
+
+async def _set_bool(device: TuyaBLEDevice) -> None:
+    await device.datapoints[1].set_value(False)
+
+
+async def _set_raw(device: TuyaBLEDevice) -> None:
+    await device.datapoints[2].set_value(b"\x01" * 64)
+
+
+async def _set_batch(device: TuyaBLEDevice) -> None:
+    async with device.datapoints.batch():
+        for dp_id in range(101, 131):
+            await device.datapoints[dp_id].set_value(dp_id + 1)
+
+
+COMMANDS = {
+    "connect": None,
+    "bool write": _set_bool,
+    "64 B raw write": _set_raw,
+    "30 DPs batch": _set_batch,
+}
+
+
+async def _count_writes(mtu: int, protocol_version: int) -> dict[str, int]:
+    simulator = TuyaBLESimulator()
+    simulated = simulator.add_device(
+        "AA:BB:CC:DD:00:01",
+        datapoints=DATAPOINTS,
+        protocol_version=protocol_version,
+        mtu=mtu,
+    )
+    device = simulator.create_device(simulated)
+    counts: dict[str, int] = {}
+    try:
+        await device.initialize()
+        await device.update()
+        counts["connect"] = simulated.packets_received
+        for name, command in COMMANDS.items():
+            if command is None:
+                continue
+            before = simulated.packets_received
+            await command(device)
+            counts[name] = simulated.packets_received - before
+        await device.stop()
+    finally:
+        await simulated.disconnect()
+    return counts
+
+
+async def _main() -> None:
+    connection_scheduler.set_slots(SIMULATOR_SOURCE, 1)
+    for protocol_version in (3, 4):
+        default = await _count_writes(GATT_MTU, protocol_version)
+        negotiated = await _count_writes(GATT_MTU_MAX, protocol_version)
+        print(f"protocol {protocol_version}")
+        print(f"  {'command':<16} {'MTU %s' % GATT_MTU:>8} {'MTU %s' % GATT_MTU_MAX:>8}")
+        for name in COMMANDS:
+            print(f"  {name:<16} {default[name]:>8} {negotiated[name]:>8}")
+
+
+def main() -> None:
+    asyncio.run(_main())
+
+
+if __name__ == "__main__":
+    main()
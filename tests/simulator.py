@@ -0,0 +1,494 @@
+"""In-process simulator of Tuya BLE devices for tests."""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import random
+import secrets
+import time
+from collections.abc import Callable
+from struct import pack, unpack_from
+
+from bleak.backends.device import BLEDevice
+from Crypto.Cipher import AES
+
+from custom_components.tuya_ble.tuya_ble.codec import (
+    DP_HEADER_V3,
+    DP_HEADER_V4,
+    decode_datapoints,
+    encode_datapoints,
+    encode_value,
+)
+from custom_components.tuya_ble.tuya_ble.const import (
+    CHARACTERISTIC_NOTIFY,
+    CHARACTERISTIC_WRITE,
+    GATT_MTU,
+    TuyaBLECode,
+    TuyaBLEDataPointType,
+)
+from custom_components.tuya_ble.tuya_ble.crc16 import crc16
+from custom_components.tuya_ble.tuya_ble.manager import (
+    AbstaractTuyaBLEDeviceManager,
+    TuyaBLEDeviceCredentials,
+)
+from custom_components.tuya_ble.tuya_ble.tuya_ble import TuyaBLEDevice
+
+_LOGGER = logging.getLogger(__name__)
+
+SIMULATOR_SOURCE = "simulator"
+
+_TIME_REPORT_CODES = (
+    TuyaBLECode.FUN_RECEIVE_TIME_DP,
+    TuyaBLECode.FUN_RECEIVE_SIGN_TIME_DP,
+)
+
+
+# Packet headers use the varints of the library
+_pack_int = TuyaBLEDevice._pack_int
+_unpack_int = TuyaBLEDevice._unpack_int
+
+
+class _TuyaBLESimulatorCharacteristic:
+    def __init__(self, uuid: str, max_write_without_response_size: int) -> None:
+        self.uuid = uuid
+        self.max_write_without_response_size = max_write_without_response_size
+
+
+class TuyaBLESimulatorClient:
+    """Stands in for BleakClient of a simulated device."""
+
+    def __init__(
+        self,
+        device: TuyaBLESimulatedDevice,
+        disconnected_callback: Callable[[TuyaBLESimulatorClient], None] | None,
+    ) -> None:
+        self._device = device
+        self._disconnected_callback = disconnected_callback
+        self._notify_callback: Callable[[int, bytearray], None] | None = None
+        self._is_connected = True
+
+    @property
+    def is_connected(self) -> bool:
+        return self._is_connected
+
+    @property
+    def mtu_size(self) -> int:
+        return self._device.mtu + 3
+
+    @property
+    def services(self) -> TuyaBLESimulatorClient:
+        return self
+
+    def get_characteristic(
+        self, uuid: str
+    ) -> _TuyaBLESimulatorCharacteristic | None:
+        if uuid in (CHARACTERISTIC_NOTIFY, CHARACTERISTIC_WRITE):
+            return _TuyaBLESimulatorCharacteristic(uuid, self._device.mtu)
+        return None
+
+    async def start_notify(
+        self, uuid: str, callback: Callable[[int, bytearray], None]
+    ) -> None:
+        self._notify_callback = callback
+
+    async def stop_notify(self, uuid: str) -> None:
+        self._notify_callback = None
+
+    async def write_gatt_char(
+        self, uuid: str, data: bytes | bytearray, response: bool = False
+    ) -> None:
+        if not self._is_connected:
+            raise ConnectionError("Simulated device is disconnected")
+        device = self._device
+        if device.latency > 0:
+            # Packets reach the device in the order writes complete, like
+            # on air, so out of order writes break the frame.
+            await asyncio.sleep(device.latency)
+        device._receive_packet(bytes(data))
+
+    async def disconnect(self) -> bool:
+        if self._is_connected:
+            self._is_connected = False
+            self._notify_callback = None
+            self._device._client_disconnected(self)
+            if self._disconnected_callback:
+                self._disconnected_callback(self)
+        return True
+
+    def _notify(self, packets: list[bytes]) -> None:
+        for packet in packets:
+            if self._notify_callback and self._is_connected:
+                self._notify_callback(0, bytearray(packet))
+
+
+class TuyaBLESimulatedDevice:
+    """Device side of the Tuya BLE protocol.
+
+    Answers device info, pairing, status and datapoint requests, sends
+    plain, signed or timed datapoint reports and may request the time.
+    Latency is applied to every write and notified frame, loss drops
+    single packets in both directions.
+    """
+
+    def __init__(
+        self,
+        address: str,
+        credentials: TuyaBLEDeviceCredentials,
+        datapoints: dict[int, tuple[TuyaBLEDataPointType, bytes | bool | int | str]]
+        | None = None,
+        protocol_version: int = 3,
+        device_version: tuple[int, int] = (1, 0),
+        hardware_version: tuple[int, int] = (1, 0),
+        report_code: TuyaBLECode = TuyaBLECode.FUN_RECEIVE_DP,
+        mtu: int = GATT_MTU,
+        latency: float = 0.0,
+        loss: float = 0.0,
+        seed: int | None = None,
+    ) -> None:
+        self.address = address
+        self.credentials = credentials
+        self.datapoints = dict(datapoints or {})
+        self.protocol_version = protocol_version
+        self.device_version = device_version
+        self.hardware_version = hardware_version
+        self.report_code = report_code
+        self.mtu = mtu
+        self.latency = latency
+        self.loss = loss
+        # Connects fail while False, as if the device was out of range
+        self.reachable = True
+        self._random = random.Random(seed)
+
+        self._local_key = credentials.local_key[:6].encode()
+        self._login_key = hashlib.md5(self._local_key).digest()
+        self._session_key: bytes | None = None
+        self._auth_key = secrets.token_bytes(32)
+        self._is_paired = False
+        self._seq_num = 1
+        self._dp_seq_num = 1
+        self._client: TuyaBLESimulatorClient | None = None
+
+        self._input = bytearray()
+        self._input_expected_packet_num = 0
+        self._input_expected_length = 0
+
+        self.packets_received = 0
+        self.packets_sent = 0
+        self.packets_lost = 0
+        self.frames_received = 0
+        self.frames_sent = 0
+        self.time_responses: dict[TuyaBLECode, bytes] = {}
+
+    @property
+    def ble_device(self) -> BLEDevice:
+        details = {"source": SIMULATOR_SOURCE}
+        try:
+            return BLEDevice(self.address, self.credentials.device_name, details, -60)
+        except TypeError:
+            # Newer bleak does not take RSSI
+            return BLEDevice(self.address, self.credentials.device_name, details)
+
+    @property
+    def is_connected(self) -> bool:
+        return self._client is not None and self._client.is_connected
+
+    @property
+    def is_paired(self) -> bool:
+        return self._is_paired
+
+    def connect(
+        self,
+        disconnected_callback: Callable[[TuyaBLESimulatorClient], None] | None = None,
+    ) -> TuyaBLESimulatorClient:
+        if self._client:
+            self._client._is_connected = False
+        self._reset_session()
+        self._client = TuyaBLESimulatorClient(self, disconnected_callback)
+        return self._client
+
+    async def disconnect(self) -> None:
+        """Drop the connection from the device side."""
+        if self._client:
+            await self._client.disconnect()
+
+    async def report_datapoints(
+        self,
+        values: dict[int, tuple[TuyaBLEDataPointType, bytes | bool | int | str]],
+    ) -> None:
+        """Change datapoints on the device side and report them."""
+        self.datapoints.update(values)
+        self._send_report(list(values))
+
+    async def request_time(
+        self, code: TuyaBLECode = TuyaBLECode.FUN_RECEIVE_TIME1_REQ
+    ) -> None:
+        """Send TIME1 or TIME2 request, the answer lands in time_responses."""
+        self._send_frame(code, bytes(0))
+
+    def _reset_session(self) -> None:
+        self._session_key = None
+        self._is_paired = False
+        self._seq_num = 1
+        self._input = bytearray()
+        self._input_expected_packet_num = 0
+        self._input_expected_length = 0
+
+    def _client_disconnected(self, client: TuyaBLESimulatorClient) -> None:
+        if self._client is client:
+            self._client = None
+            self._reset_session()
+
+    def _is_lost(self) -> bool:
+        if self.loss > 0 and self._random.random() < self.loss:
+            self.packets_lost += 1
+            return True
+        return False
+
+    def _receive_packet(self, data: bytes) -> None:
+        if self._is_lost():
+            return
+        self.packets_received += 1
+        packet_num, pos = _unpack_int(data, 0)
+        if packet_num != self._input_expected_packet_num:
+            self._input = bytearray()
+            self._input_expected_packet_num = 0
+            if packet_num != 0:
+                return
+        if packet_num == 0:
+            self._input = bytearray()
+            self._input_expected_length, pos = _unpack_int(data, pos)
+            pos += 1
+        self._input += data[pos:]
+        self._input_expected_packet_num += 1
+        if len(self._input) >= self._input_expected_length:
+            frame = bytes(self._input)
+            self._input = bytearray()
+            self._input_expected_packet_num = 0
+            self._receive_frame(frame)
+
+    def _receive_frame(self, frame: bytes) -> None:
+        self.frames_received += 1
+        key = self._login_key if frame[0] == 4 else self._session_key
+        if key is None:
+            _LOGGER.debug("%s: Simulator has no session key", self.address)
+            return
+        raw = AES.new(key, AES.MODE_CBC, frame[1:17]).decrypt(frame[17:])
+        seq_num, response_to, _code, data_length = unpack_from(">IIHH", raw)
+        data_end_pos = 12 + data_length
+        (data_crc,) = unpack_from(">H", raw, data_end_pos)
+        if crc16(raw[:data_end_pos]) != data_crc:
+            _LOGGER.debug("%s: Simulator received invalid CRC", self.address)
+            return
+        data = raw[12:data_end_pos]
+        try:
+            code = TuyaBLECode(_code)
+        except ValueError:
+            return
+        if response_to != 0:
+            if code in (
+                TuyaBLECode.FUN_RECEIVE_TIME1_REQ,
+                TuyaBLECode.FUN_RECEIVE_TIME2_REQ,
+            ):
+                self.time_responses[code] = data
+            return
+        self._handle_request(seq_num, code, data)
+
+    def _handle_request(self, seq_num: int, code: TuyaBLECode, data: bytes) -> None:
+        match code:
+            case TuyaBLECode.FUN_SENDER_DEVICE_INFO:
+                srand = secrets.token_bytes(6)
+                self._session_key = hashlib.md5(self._local_key + srand).digest()
+                info = bytearray(46)
+                info[0:2] = bytes(self.device_version)
+                info[2:4] = bytes((self.protocol_version, 0))
+                info[4] = 0
+                info[5] = 1
+                info[6:12] = srand
+                info[12:14] = bytes(self.hardware_version)
+                info[14:46] = self._auth_key
+                self._send_frame(code, info, seq_num, self._login_key, 4)
+
+            case TuyaBLECode.FUN_SENDER_PAIR:
+                expected = bytearray(44)
+                request = (
+                    self.credentials.uuid.encode()
+                    + self._local_key
+                    + self.credentials.device_id.encode()
+                )
+                expected[: len(request)] = request
+                if bytes(data) != bytes(expected):
+                    self._send_frame(code, b"\x01", seq_num)
+                else:
+                    result = 2 if self._is_paired else 0
+                    self._is_paired = True
+                    self._send_frame(code, bytes((result,)), seq_num)
+
+            case TuyaBLECode.FUN_SENDER_DEVICE_STATUS:
+                self._send_frame(code, b"\x00", seq_num)
+                self._send_report(list(self.datapoints))
+
+            case TuyaBLECode.FUN_SENDER_DPS | TuyaBLECode.FUN_SENDER_DPS_V4:
+                if code == TuyaBLECode.FUN_SENDER_DPS:
+                    decoded = decode_datapoints(data, 0, DP_HEADER_V3)
+                    self._send_frame(code, b"\x00", seq_num)
+                else:
+                    decoded = decode_datapoints(data, 1, DP_HEADER_V4)
+                    self._send_frame(code, b"\x00\x00", seq_num)
+                for id, type, value, _ in decoded:
+                    self.datapoints[id] = (type, value)
+                self._send_report([id for id, _, _, _ in decoded])
+
+    def _send_report(self, dp_ids: list[int]) -> None:
+        if not dp_ids:
+            return
+        now = int(time.time())
+        items = [
+            (id, self.datapoints[id][0], encode_value(*self.datapoints[id]))
+            for id in dp_ids
+        ]
+        dp_seq_num = self._dp_seq_num
+        self._dp_seq_num = (self._dp_seq_num + 1) & 0xFFFF
+        timed = self.report_code in _TIME_REPORT_CODES
+        if self.protocol_version >= 4:
+            header = pack(">BIBBB", 0, dp_seq_num, 0, 0, 0)
+            if timed:
+                code = TuyaBLECode.FUN_RECEIVE_TIME_DP_V4
+                header += pack(">BI", 1, now)
+            else:
+                code = TuyaBLECode.FUN_RECEIVE_DP_V4
+            body = encode_datapoints(items, DP_HEADER_V4)
+        else:
+            code = self.report_code
+            match code:
+                case TuyaBLECode.FUN_RECEIVE_SIGN_DP:
+                    header = pack(">HB", dp_seq_num, 0)
+                case TuyaBLECode.FUN_RECEIVE_TIME_DP:
+                    header = pack(">BI", 1, now)
+                case TuyaBLECode.FUN_RECEIVE_SIGN_TIME_DP:
+                    header = pack(">HBBI", dp_seq_num, 0, 1, now)
+                case _:
+                    header = bytes(0)
+            body = encode_datapoints(items, DP_HEADER_V3)
+        self._send_frame(code, header + body)
+
+    def _send_frame(
+        self,
+        code: TuyaBLECode,
+        data: bytes,
+        response_to: int = 0,
+        key: bytes | None = None,
+        security_flag: int = 5,
+    ) -> None:
+        client = self._client
+        if client is None:
+            return
+        key = key or self._session_key
+        if key is None:
+            return
+
+        seq_num = self._seq_num
+        self._seq_num += 1
+        raw = bytearray(pack(">IIHH", seq_num, response_to, code.value, len(data)))
+        raw += data
+        raw += pack(">H", crc16(raw))
+        raw += bytes(-len(raw) % 16)
+        iv = secrets.token_bytes(16)
+        encrypted = (
+            bytes((security_flag,))
+            + iv
+            + AES.new(key, AES.MODE_CBC, iv).encrypt(bytes(raw))
+        )
+
+        packets: list[bytes] = []
+        packet_num = 0
+        pos = 0
+        while pos < len(encrypted):
+            packet = _pack_int(packet_num)
+            if packet_num == 0:
+                packet += _pack_int(len(encrypted))
+                packet += pack(">B", self.protocol_version << 4)
+            part = encrypted[pos:pos + self.mtu - len(packet)]  # fmt: skip
+            packet += part
+            pos += len(part)
+            packet_num += 1
+            if not self._is_lost():
+                packets.append(bytes(packet))
+
+        self.frames_sent += 1
+        self.packets_sent += len(packets)
+        loop = asyncio.get_running_loop()
+        # Whole frame is delivered at once, so frames never interleave
+        if self.latency > 0:
+            loop.call_later(self.latency, client._notify, packets)
+        else:
+            loop.call_soon(client._notify, packets)
+
+
+class TuyaBLESimulator(AbstaractTuyaBLEDeviceManager):
+    """Set of simulated devices, also serving their credentials.
+
+    Simulated devices use the SIMULATOR_SOURCE connection source, raise
+    its slots in the connection scheduler to connect many in parallel.
+    """
+
+    def __init__(self) -> None:
+        self._devices: dict[str, TuyaBLESimulatedDevice] = {}
+
+    @property
+    def devices(self) -> list[TuyaBLESimulatedDevice]:
+        return list(self._devices.values())
+
+    def add_device(
+        self,
+        address: str,
+        credentials: TuyaBLEDeviceCredentials | None = None,
+        **kwargs,
+    ) -> TuyaBLESimulatedDevice:
+        """Add simulated device, credentials are generated if missing."""
+        if credentials is None:
+            credentials = TuyaBLEDeviceCredentials(
+                secrets.token_hex(8),
+                secrets.token_hex(8),
+                secrets.token_hex(11),
+                "simulator",
+                "simulator",
+                "Simulated %s" % address,
+                None,
+                None,
+            )
+        device = TuyaBLESimulatedDevice(address, credentials, **kwargs)
+        self._devices[address.upper()] = device
+        return device
+
+    def create_device(self, simulated: TuyaBLESimulatedDevice, **kwargs) -> TuyaBLEDevice:
+        """Create TuyaBLEDevice connected to the simulated device."""
+        return TuyaBLEDevice(
+            self,
+            simulated.ble_device,
+            client_factory=self.connect,
+            **kwargs,
+        )
+
+    async def connect(
+        self,
+        ble_device: BLEDevice,
+        disconnected_callback: Callable[[TuyaBLESimulatorClient], None] | None,
+    ) -> TuyaBLESimulatorClient:
+        device = self._devices.get(ble_device.address.upper())
+        if device is None:
+            raise ConnectionError("Unknown simulated device %s" % ble_device.address)
+        if device.latency > 0:
+            await asyncio.sleep(device.latency)
+        if not device.reachable:
+            raise ConnectionError("Simulated device %s is unreachable" % device.address)
+        return device.connect(disconnected_callback)
+
+    async def get_device_credentials(
+        self,
+        address: str,
+        force_update: bool = False,
+        save_data: bool = False,
+    ) -> TuyaBLEDeviceCredentials | None:
+        device = self._devices.get(address.upper())
+        return device.credentials if device else None
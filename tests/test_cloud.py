@@ -0,0 +1,211 @@
+"""Tests of fetching device credentials from a stub Tuya cloud."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import aiohttp
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from homeassistant.components.tuya.const import CONF_APP_TYPE, CONF_ENDPOINT
+from homeassistant.const import CONF_COUNTRY_CODE, CONF_PASSWORD, CONF_USERNAME
+from tuya_iot import AuthType
+
+from custom_components.tuya_ble import cloud
+from custom_components.tuya_ble.const import (
+    CONF_ACCESS_ID,
+    CONF_ACCESS_SECRET,
+    CONF_AUTH_TYPE,
+    SMARTLIFE_APP,
+    TUYA_API_CONCURRENCY,
+    TUYA_API_DEVICES_URL,
+    TUYA_API_FACTORY_INFO_BATCH,
+    TUYA_FILL_FAILURE_CACHE,
+)
+
+from .test_simulator import wait_for
+from .tuya_cloud import (
+    ACCESS_ID,
+    ACCESS_SECRET,
+    FACTORY_INFO_PATH,
+    UID,
+    TuyaCloudStub,
+    create_devices,
+    get_address,
+)
+
+DEVICES_PATH = TUYA_API_DEVICES_URL % (UID)
+
+
+class MemoryStore:
+    """Home Assistant storage kept in memory."""
+
+    def __init__(self, hass: Any, version: int, key: str) -> None:
+        self.data: Any = None
+
+    async def async_load(self) -> Any:
+        return self.data
+
+    def async_delay_save(self, data_func: Callable[[], Any], delay: float) -> None:
+        self.data = data_func()
+
+
+class FakeHass:
+    """The parts of Home Assistant the credentials manager uses."""
+
+    def __init__(self, session: aiohttp.ClientSession) -> None:
+        self.data: dict[str, Any] = {}
+        self.session = session
+
+    def async_create_task(self, target: Awaitable) -> asyncio.Task:
+        return asyncio.get_running_loop().create_task(target)
+
+    def async_create_background_task(
+        self, target: Awaitable, name: str
+    ) -> asyncio.Task:
+        return asyncio.get_running_loop().create_task(target, name=name)
+
+
+@pytest.fixture(autouse=True)
+def cloud_state(monkeypatch: pytest.MonkeyPatch):
+    """Isolate module state of the cloud and its storage per test."""
+    monkeypatch.setattr(cloud, "Store", MemoryStore)
+    monkeypatch.setattr(cloud, "async_get_clientsession", lambda hass: hass.session)
+    states = (
+        cloud._cache,
+        cloud._logins,
+        cloud._fills,
+        cloud._failed_logins,
+        cloud._addresses,
+    )
+    for state in states:
+        state.clear()
+    yield
+    for state in states:
+        state.clear()
+
+
+def login_data(stub: TuyaCloudStub) -> dict[str, Any]:
+    return {
+        CONF_ENDPOINT: stub.endpoint,
+        CONF_ACCESS_ID: ACCESS_ID,
+        CONF_ACCESS_SECRET: ACCESS_SECRET,
+        CONF_AUTH_TYPE: AuthType.SMART_HOME.value,
+        CONF_USERNAME: "user",
+        CONF_PASSWORD: "password",
+        CONF_COUNTRY_CODE: "1",
+        CONF_APP_TYPE: SMARTLIFE_APP,
+    }
+
+
+def run(
+    stub: TuyaCloudStub,
+    test: Callable[[FakeHass], Awaitable[None]],
+) -> None:
+    async def main() -> None:
+        async with stub, aiohttp.ClientSession() as session:
+            await test(FakeHass(session))
+
+    asyncio.run(main())
+
+
+def test_factory_infos_are_fetched_in_concurrent_batches() -> None:
+    devices = create_devices(90)
+    stub = TuyaCloudStub(devices, latency=0.05)
+
+    async def test(hass: FakeHass) -> None:
+        manager = cloud.HASSTuyaBLEDeviceManager(hass, login_data(stub))
+        credentials = await manager.get_device_credentials(get_address(devices[0]))
+        assert credentials is not None
+        assert credentials.local_key == "key0000"
+        assert credentials.device_id == "device0000"
+        # The lookup does not wait for batches of other devices
+        item = next(iter(cloud._cache.values()))
+        assert len(item.credentials) < len(devices)
+
+        await wait_for(lambda: not cloud._fills)
+        assert set(item.credentials) == {get_address(device) for device in devices}
+
+    run(stub, test)
+    assert stub.logins == 1
+    assert stub.requests.count(DEVICES_PATH) == 1
+    assert sorted(len(ids) for ids in stub.factory_info_requests) == [
+        10,
+        TUYA_API_FACTORY_INFO_BATCH,
+        TUYA_API_FACTORY_INFO_BATCH,
+        TUYA_API_FACTORY_INFO_BATCH,
+        TUYA_API_FACTORY_INFO_BATCH,
+    ]
+    assert stub.max_concurrent == TUYA_API_CONCURRENCY
+
+
+def test_concurrent_lookups_share_requests() -> None:
+    devices = create_devices(40)
+    stub = TuyaCloudStub(devices, latency=0.05)
+
+    async def test(hass: FakeHass) -> None:
+        results = await asyncio.gather(
+            *(
+                cloud.HASSTuyaBLEDeviceManager(
+                    hass, login_data(stub)
+                ).get_device_credentials(get_address(device))
+                for device in (devices[0], devices[25], devices[39])
+            )
+        )
+        assert [credentials.local_key for credentials in results] == [
+            "key0000",
+            "key0025",
+            "key0039",
+        ]
+        await wait_for(lambda: not cloud._fills)
+
+    run(stub, test)
+    assert stub.logins == 1
+    assert stub.requests.count(DEVICES_PATH) == 1
+    assert len(stub.factory_info_requests) == 2
+
+
+def test_failed_batch_keeps_other_batches() -> None:
+    devices = create_devices(40)
+    stub = TuyaCloudStub(devices, latency=0.05)
+    stub.failures[FACTORY_INFO_PATH] = [404]
+
+    async def test(hass: FakeHass) -> None:
+        manager = cloud.HASSTuyaBLEDeviceManager(hass, login_data(stub))
+        await manager.get_device_credentials(get_address(devices[0]))
+        await wait_for(lambda: not cloud._fills)
+        item = next(iter(cloud._cache.values()))
+        assert len(item.credentials) == TUYA_API_FACTORY_INFO_BATCH
+
+    run(stub, test)
+    assert stub.requests.count(FACTORY_INFO_PATH) == 2
+
+
+def test_failed_device_list_is_not_fetched_again_at_once() -> None:
+    devices = create_devices(5)
+    stub = TuyaCloudStub(devices)
+    stub.failures[DEVICES_PATH] = [
+        {"success": False, "code": 500, "msg": "system error"}
+    ]
+
+    async def test(hass: FakeHass) -> None:
+        manager = cloud.HASSTuyaBLEDeviceManager(hass, login_data(stub))
+        address = get_address(devices[0])
+        assert await manager.get_device_credentials(address) is None
+        assert await manager.get_device_credentials(address) is None
+        await asyncio.sleep(0.05)
+        assert stub.logins == 1
+        assert stub.requests.count(DEVICES_PATH) == 1
+
+        # Fetched again in the background once the failure is old enough
+        item = next(iter(cloud._cache.values()))
+        item.failed -= TUYA_FILL_FAILURE_CACHE
+        await manager.get_device_credentials(address)
+        await wait_for(lambda: address in item.credentials)
+        assert item.failed is None
+        assert stub.logins == 2
+
+    run(stub, test)
@@ -0,0 +1,182 @@
+"""Tests of the Tuya OpenAPI client against a stub cloud."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import patch
+
+import aiohttp
+import pytest
+from tuya_iot import AuthType, TuyaOpenAPI
+
+from custom_components.tuya_ble.cloud_api import TuyaCloudAPI
+from custom_components.tuya_ble.const import (
+    TUYA_API_CUSTOM_LOGIN_URL,
+    TUYA_API_DEVICES_URL,
+    TUYA_API_FACTORY_INFO_URL,
+    TUYA_API_SMART_HOME_LOGIN_URL,
+    TUYA_API_TOKEN_INVALID,
+)
+from custom_components.tuya_ble.tuya_ble.retry import TuyaBLERetryPolicy
+
+from .tuya_cloud import ACCESS_ID, ACCESS_SECRET, UID, TuyaCloudStub
+
+DEVICES_PATH = TUYA_API_DEVICES_URL % (UID)
+
+
+def run(
+    stub: TuyaCloudStub,
+    test: Callable[[TuyaCloudStub, aiohttp.ClientSession], Awaitable[None]],
+) -> None:
+    async def main() -> None:
+        async with stub, aiohttp.ClientSession() as session:
+            await test(stub, session)
+
+    asyncio.run(main())
+
+
+def create_api(
+    stub: TuyaCloudStub, session: aiohttp.ClientSession, **kwargs: Any
+) -> TuyaCloudAPI:
+    return TuyaCloudAPI(
+        session,
+        stub.endpoint,
+        ACCESS_ID,
+        ACCESS_SECRET,
+        dev_channel="cloud_hass",
+        retry_policy=TuyaBLERetryPolicy(attempts=3, initial_delay=0.01, jitter=0.0),
+        **kwargs,
+    )
+
+
+@pytest.mark.parametrize(
+    ("method", "path", "params", "body"),
+    [
+        ("GET", DEVICES_PATH, None, None),
+        ("GET", "/v1.0/devices", {"page_size": 20, "category": "szjqr"}, None),
+        ("GET", TUYA_API_FACTORY_INFO_URL % ("id1,id2"), None, None),
+        ("POST", TUYA_API_SMART_HOME_LOGIN_URL, None, {"username": "user"}),
+        ("POST", "/v1.0/devices/id1/commands", None, {}),
+    ],
+)
+def test_sign_matches_tuya_iot(
+    method: str,
+    path: str,
+    params: dict[str, Any] | None,
+    body: dict[str, Any] | None,
+) -> None:
+    reference = TuyaOpenAPI("", ACCESS_ID, ACCESS_SECRET)
+    reference.token_info = SimpleNamespace(access_token="token")
+    api = TuyaCloudAPI(None, "", ACCESS_ID, ACCESS_SECRET)
+    with patch("time.time", return_value=1700000000.123):
+        assert api._calculate_sign(
+            method, path, params, body, "token"
+        ) == reference._calculate_sign(method, path, params, body)
+
+
+@pytest.mark.parametrize(
+    ("auth_type", "login_path"),
+    [
+        (AuthType.SMART_HOME, TUYA_API_SMART_HOME_LOGIN_URL),
+        # As stored in config entries
+        (AuthType.CUSTOM.value, TUYA_API_CUSTOM_LOGIN_URL),
+    ],
+)
+def test_login(auth_type: AuthType | int, login_path: str) -> None:
+    async def test(stub: TuyaCloudStub, session: aiohttp.ClientSession) -> None:
+        api = create_api(stub, session, auth_type=auth_type)
+        response = await api.connect("user", "password", "1", "smartlife")
+        assert response["success"]
+        assert api.is_connected
+        assert api.token_info.uid == UID
+        assert stub.requests == [login_path]
+        assert stub.login_headers["dev_channel"] == "cloud_hass"
+
+        response = await api.get(DEVICES_PATH)
+        assert response["success"]
+
+    run(TuyaCloudStub(), test)
+
+
+def test_token_is_refreshed_before_expiry() -> None:
+    async def test(stub: TuyaCloudStub, session: aiohttp.ClientSession) -> None:
+        api = create_api(stub, session)
+        await api.connect("user", "password")
+        assert (await api.get(DEVICES_PATH))["success"]
+        assert api.token_info.access_token == stub.access_token
+
+    # Expires within the refresh margin, so every request refreshes first
+    stub = TuyaCloudStub(expire=30)
+    run(stub, test)
+    assert stub.logins == 1
+    assert stub.refreshes == 1
+
+
+def test_failed_refresh_keeps_token() -> None:
+    async def test(stub: TuyaCloudStub, session: aiohttp.ClientSession) -> None:
+        api = create_api(stub, session)
+        await api.connect("user", "password")
+        token_info = api.token_info
+        stub.failures["/v1.0/token/" + token_info.refresh_token] = [404]
+        with pytest.raises(aiohttp.ClientResponseError):
+            await api.get(DEVICES_PATH)
+        assert api.token_info is token_info
+
+    run(TuyaCloudStub(expire=30), test)
+
+
+def test_invalid_token_logs_in_once() -> None:
+    async def test(stub: TuyaCloudStub, session: aiohttp.ClientSession) -> None:
+        api = create_api(stub, session)
+        await api.connect("user", "password")
+        stub.revoke_token()
+        responses = await asyncio.gather(
+            *(api.get(DEVICES_PATH) for _ in range(5))
+        )
+        assert all(response["success"] for response in responses)
+
+    stub = TuyaCloudStub()
+    run(stub, test)
+    assert stub.logins == 2
+
+
+def test_failed_login_keeps_token() -> None:
+    async def test(stub: TuyaCloudStub, session: aiohttp.ClientSession) -> None:
+        api = create_api(stub, session)
+        await api.connect("user", "password")
+        token_info = api.token_info
+        stub.revoke_token()
+        stub.failures[TUYA_API_SMART_HOME_LOGIN_URL] = [
+            {"success": False, "code": 500, "msg": "system error"}
+        ]
+        response = await api.get(DEVICES_PATH)
+        assert response["code"] == TUYA_API_TOKEN_INVALID
+        assert api.token_info is token_info
+
+    run(TuyaCloudStub(), test)
+
+
+def test_server_errors_are_retried() -> None:
+    async def test(stub: TuyaCloudStub, session: aiohttp.ClientSession) -> None:
+        api = create_api(stub, session)
+        await api.connect("user", "password")
+        stub.failures[DEVICES_PATH] = [503, 429]
+        assert (await api.get(DEVICES_PATH))["success"]
+        assert stub.requests.count(DEVICES_PATH) == 3
+
+    run(TuyaCloudStub(), test)
+
+
+def test_client_errors_are_raised() -> None:
+    async def test(stub: TuyaCloudStub, session: aiohttp.ClientSession) -> None:
+        api = create_api(stub, session)
+        await api.connect("user", "password")
+        stub.failures[DEVICES_PATH] = [404]
+        with pytest.raises(aiohttp.ClientResponseError) as error:
+            await api.get(DEVICES_PATH)
+        assert error.value.status == 404
+        assert stub.requests.count(DEVICES_PATH) == 1
+
+    run(TuyaCloudStub(), test)
@@ -0,0 +1,120 @@
+"""Tests for the datapoint codec."""
+from __future__ import annotations
+
+import pytest
+
+from custom_components.tuya_ble.tuya_ble.codec import (
+    DP_HEADER_V3,
+    DP_HEADER_V4,
+    decode_datapoints,
+    encode_datapoints,
+    encode_value,
+)
+from custom_components.tuya_ble.tuya_ble.const import TuyaBLEDataPointType
+from custom_components.tuya_ble.tuya_ble.exceptions import (
+    TuyaBLEDataFormatError,
+    TuyaBLEDataLengthError,
+    TuyaBLEValueLengthError,
+)
+
+# FUN_RECEIVE_DP_V4 payload of a thermostat: version, sn, type, mode, ack,
+# then switch, target temperature, mode enum, fault bitmap and schedule raw.
+REPORT_V4 = bytes.fromhex(
+    "00" "0000002a" "00" "00" "00"
+    "01" "01" "0001" "01"
+    "02" "02" "0004" "000000d2"
+    "04" "04" "0001" "02"
+    "0d" "05" "0001" "00"
+    "65" "00" "0008" "0600d2070000aa00"
+)
+REPORT_V4_DATAPOINTS = [
+    (1, TuyaBLEDataPointType.DT_BOOL, True),
+    (2, TuyaBLEDataPointType.DT_VALUE, 210),
+    (4, TuyaBLEDataPointType.DT_ENUM, 2),
+    (13, TuyaBLEDataPointType.DT_BITMAP, b"\x00"),
+    (101, TuyaBLEDataPointType.DT_RAW, bytes.fromhex("0600d2070000aa00")),
+]
+
+# FUN_SENDER_DPS_V4 payload: version, then a negative value and a string
+WRITE_V4 = bytes.fromhex(
+    "00"
+    "66" "02" "0004" "fffffff6"
+    "67" "03" "0005" "68656c6c6f"
+)
+WRITE_V4_DATAPOINTS = [
+    (102, TuyaBLEDataPointType.DT_VALUE, -10),
+    (103, TuyaBLEDataPointType.DT_STRING, "hello"),
+]
+
+
+def _decode(data: bytes, start_pos: int, header) -> list:
+    return [item[:3] for item in decode_datapoints(data, start_pos, header)]
+
+
+def _encode(
+    datapoints: list[tuple[int, TuyaBLEDataPointType, object]],
+) -> list[tuple[int, TuyaBLEDataPointType, bytes]]:
+    return [(id, type, encode_value(type, value)) for id, type, value in datapoints]
+
+
+@pytest.mark.parametrize(
+    ("frame", "offset", "datapoints"),
+    [(REPORT_V4, 8, REPORT_V4_DATAPOINTS), (WRITE_V4, 1, WRITE_V4_DATAPOINTS)],
+)
+def test_v4_round_trip(frame: bytes, offset: int, datapoints: list) -> None:
+    assert _decode(frame, offset, DP_HEADER_V4) == datapoints
+    encoded = encode_datapoints(_encode(datapoints), DP_HEADER_V4, offset)
+    assert encoded[offset:] == frame[offset:]
+
+
+def test_v3_round_trip() -> None:
+    datapoints = [
+        (1, TuyaBLEDataPointType.DT_BOOL, False),
+        (2, TuyaBLEDataPointType.DT_VALUE, 70000),
+        (3, TuyaBLEDataPointType.DT_RAW, b"\x01\x02\x03"),
+    ]
+    encoded = encode_datapoints(_encode(datapoints), DP_HEADER_V3)
+    assert encoded == bytes.fromhex("010101 00 020204 00011170 030003 010203")
+    assert _decode(encoded, 0, DP_HEADER_V3) == datapoints
+
+
+@pytest.mark.parametrize("header", [DP_HEADER_V3, DP_HEADER_V4])
+def test_trailing_empty_datapoint(header) -> None:
+    datapoints = [
+        (1, TuyaBLEDataPointType.DT_BOOL, b"\x01"),
+        (2, TuyaBLEDataPointType.DT_RAW, b""),
+    ]
+    decoded = decode_datapoints(encode_datapoints(datapoints, header), 0, header)
+    assert decoded == [
+        (1, TuyaBLEDataPointType.DT_BOOL, True, b"\x01"),
+        (2, TuyaBLEDataPointType.DT_RAW, b"", b""),
+    ]
+
+
+@pytest.mark.parametrize(
+    ("raw", "value"),
+    [("80", 0x80), ("ff", 0xFF), ("fffe", 0xFFFE), ("ffffffff", 0xFFFFFFFF)],
+)
+def test_enum_is_unsigned(raw: str, value: int) -> None:
+    data = bytes.fromhex("0404") + bytes([len(raw) // 2]) + bytes.fromhex(raw)
+    assert decode_datapoints(data, 0, DP_HEADER_V3) == [
+        (4, TuyaBLEDataPointType.DT_ENUM, value, bytes.fromhex(raw))
+    ]
+    assert encode_value(TuyaBLEDataPointType.DT_ENUM, value) == bytes.fromhex(raw)
+
+
+def test_truncated_value() -> None:
+    with pytest.raises(TuyaBLEDataLengthError):
+        decode_datapoints(REPORT_V4[:-1], 8, DP_HEADER_V4)
+
+
+def test_unknown_type() -> None:
+    with pytest.raises(TuyaBLEDataFormatError):
+        decode_datapoints(bytes.fromhex("010601 00"), 0, DP_HEADER_V3)
+
+
+def test_value_too_long() -> None:
+    datapoints = [(101, TuyaBLEDataPointType.DT_RAW, b"\x00" * 256)]
+    with pytest.raises(TuyaBLEValueLengthError):
+        encode_datapoints(datapoints, DP_HEADER_V3)
+    assert len(encode_datapoints(datapoints, DP_HEADER_V4)) == 260
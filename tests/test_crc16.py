@@ -0,0 +1,39 @@
+"""Tests for the CRC16/MODBUS engine."""
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from custom_components.tuya_ble.tuya_ble.crc16 import crc16
+
+
+def crc16_bitwise(data: bytes) -> int:
+    """Bit-by-bit CRC16/MODBUS, the engine the table replaced."""
+    crc = 0xFFFF
+    for byte in data:
+        crc ^= byte & 255
+        for _ in range(8):
+            tmp = crc & 1
+            crc >>= 1
+            if tmp != 0:
+                crc ^= 0xA001
+    return crc
+
+
+def test_check_value() -> None:
+    assert crc16(b"123456789") == 0x4B37
+    assert crc16(b"") == 0xFFFF
+
+
+@pytest.mark.parametrize("size", [1, 16, 256, 4096])
+def test_matches_bitwise(size: int) -> None:
+    data = random.Random(size).randbytes(size)
+    assert crc16(data) == crc16_bitwise(data)
+
+
+def test_incremental_matches_one_shot() -> None:
+    data = random.Random(0).randbytes(1000)
+    for split in (0, 1, 17, 500, 999, 1000):
+        crc = crc16(data[:split])
+        assert crc16(memoryview(data)[split:], crc) == crc16(data)
@@ -0,0 +1,96 @@
+"""Tests of the outbound datapoint queue against simulated devices."""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from custom_components.tuya_ble.tuya_ble.const import TuyaBLEDataPointType
+from custom_components.tuya_ble.tuya_ble.exceptions import (
+    TuyaBLECommandQueuedError,
+)
+from custom_components.tuya_ble.tuya_ble.retry import (
+    TuyaBLECircuitBreaker,
+    TuyaBLERetryPolicy,
+)
+from custom_components.tuya_ble.tuya_ble.tuya_ble import TuyaBLEDevice
+
+from .simulator import TuyaBLESimulatedDevice, TuyaBLESimulator
+from .test_simulator import DATAPOINTS, run, wait_for
+
+
+def create_device(
+    simulator: TuyaBLESimulator, simulated: TuyaBLESimulatedDevice, **kwargs
+) -> TuyaBLEDevice:
+    """Create device that gives up connecting at once."""
+    return simulator.create_device(
+        simulated,
+        retry_policy=TuyaBLERetryPolicy(attempts=1),
+        circuit_breaker=TuyaBLECircuitBreaker(reset_timeout=0.0),
+        **kwargs,
+    )
+
+
+def test_waited_write_outlives_expiry() -> None:
+    async def test(simulator: TuyaBLESimulator) -> None:
+        simulated = simulator.add_device(
+            "AA:BB:CC:DD:00:01", datapoints=DATAPOINTS, latency=0.01
+        )
+        # Every write is older than the expiry once connected
+        device = create_device(simulator, simulated, command_expiry=0.0)
+        await device.initialize()
+        datapoint = device.datapoints.get_or_create(
+            101, TuyaBLEDataPointType.DT_VALUE, 20
+        )
+        await datapoint.set_value(5)
+        assert simulated.datapoints[101] == (TuyaBLEDataPointType.DT_VALUE, 5)
+        await device.stop()
+
+    run(test)
+
+
+def test_expired_write_is_rolled_back() -> None:
+    async def test(simulator: TuyaBLESimulator) -> None:
+        simulated = simulator.add_device("AA:BB:CC:DD:00:01", datapoints=DATAPOINTS)
+        device = create_device(simulator, simulated, command_expiry=0.05)
+        await device.initialize()
+        await device.update()
+        await wait_for(lambda: device.datapoints[102] is not None)
+        await device._execute_disconnect()
+        device._expected_disconnect = False
+
+        simulated.reachable = False
+        with pytest.raises(TuyaBLECommandQueuedError):
+            await device.datapoints[101].set_value(5)
+        # Shown until the queued write is sent or dropped
+        assert device.datapoints[101].value == 5
+
+        await asyncio.sleep(0.1)
+        simulated.reachable = True
+        await device.datapoints[102].set_value(False)
+        assert device.datapoints[101].value == 20
+        assert simulated.datapoints[101] == (TuyaBLEDataPointType.DT_VALUE, 20)
+        assert simulated.datapoints[102] == (TuyaBLEDataPointType.DT_BOOL, False)
+        await device.stop()
+
+    run(test)
+
+
+def test_write_during_stop_stays_queued() -> None:
+    async def test(simulator: TuyaBLESimulator) -> None:
+        simulated = simulator.add_device("AA:BB:CC:DD:00:01", datapoints=DATAPOINTS)
+        device = create_device(simulator, simulated)
+        await device.initialize()
+        await device.update()
+        await wait_for(lambda: device.datapoints[101] is not None)
+
+        # Stopping, the connection is still up but nothing is sent
+        device._expected_disconnect = True
+        with pytest.raises(TuyaBLECommandQueuedError):
+            await device.datapoints[101].set_value(5)
+        assert device.datapoints[101].value == 5
+        assert 101 in device._pending_datapoints
+        assert simulated.datapoints[101] == (TuyaBLEDataPointType.DT_VALUE, 20)
+        await device.stop()
+
+    run(test)
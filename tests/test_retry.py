@@ -0,0 +1,110 @@
+"""Tests for the connection retry policy and circuit breaker."""
+from __future__ import annotations
+
+import pytest
+
+from custom_components.tuya_ble.tuya_ble import retry
+from custom_components.tuya_ble.tuya_ble.retry import (
+    TuyaBLECircuitBreaker,
+    TuyaBLERetryPolicy,
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    fake = FakeClock()
+    monkeypatch.setattr(retry.time, "monotonic", fake)
+    return fake
+
+
+def test_delay_grows_exponentially_up_to_max() -> None:
+    policy = TuyaBLERetryPolicy(
+        initial_delay=0.5, max_delay=10.0, multiplier=2.0, jitter=0.0
+    )
+    assert [policy.get_delay(retry) for retry in range(6)] == [
+        0.5,
+        1.0,
+        2.0,
+        4.0,
+        8.0,
+        10.0,
+    ]
+    # Large retry counts do not overflow
+    assert policy.get_delay(10000) == 10.0
+
+
+def test_delay_jitter_shortens_delay(monkeypatch: pytest.MonkeyPatch) -> None:
+    policy = TuyaBLERetryPolicy(
+        initial_delay=4.0, max_delay=10.0, multiplier=2.0, jitter=0.5
+    )
+    monkeypatch.setattr(retry.random, "random", lambda: 0.0)
+    assert policy.get_delay(0) == 4.0
+    monkeypatch.setattr(retry.random, "random", lambda: 1.0)
+    assert policy.get_delay(0) == 2.0
+    assert policy.get_delay(5) == 5.0
+
+
+def test_breaker_starts_closed(clock: FakeClock) -> None:
+    breaker = TuyaBLECircuitBreaker(reset_timeout=60.0)
+    assert not breaker.is_open
+    assert breaker.allow()
+    assert breaker.time_until_retry == 0.0
+    assert breaker.trips == 0
+
+
+def test_breaker_opens_on_failure_until_timeout(clock: FakeClock) -> None:
+    breaker = TuyaBLECircuitBreaker(reset_timeout=60.0)
+    breaker.record_failure()
+    assert breaker.is_open
+    assert breaker.trips == 1
+    assert not breaker.allow()
+    assert breaker.time_until_retry == 60.0
+
+    clock.now += 59.0
+    assert not breaker.allow()
+    clock.now += 1.0
+    # One connect is let through, the breaker stays open until it succeeds
+    assert breaker.allow()
+    assert breaker.is_open
+
+
+def test_breaker_timeout_doubles_up_to_max(clock: FakeClock) -> None:
+    breaker = TuyaBLECircuitBreaker(reset_timeout=60.0, max_reset_timeout=200.0)
+    timeouts = []
+    for _ in range(4):
+        breaker.record_failure()
+        timeouts.append(breaker.time_until_retry)
+        clock.now += breaker.time_until_retry
+    assert timeouts == [60.0, 120.0, 200.0, 200.0]
+    assert breaker.trips == 4
+
+
+def test_breaker_success_closes_and_resets_timeout(clock: FakeClock) -> None:
+    breaker = TuyaBLECircuitBreaker(reset_timeout=60.0)
+    breaker.record_failure()
+    clock.now += 60.0
+    breaker.record_failure()
+    clock.now += 120.0
+    breaker.record_success()
+    assert not breaker.is_open
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.time_until_retry == 60.0
+
+
+def test_breaker_reset_closes_at_once(clock: FakeClock) -> None:
+    breaker = TuyaBLECircuitBreaker(reset_timeout=60.0)
+    breaker.record_failure()
+    breaker.reset()
+    assert not breaker.is_open
+    assert breaker.allow()
+    assert breaker.time_until_retry == 0.0
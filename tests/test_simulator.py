@@ -0,0 +1,251 @@
+"""End-to-end tests of TuyaBLEDevice against simulated devices."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+
+import pytest
+
+from custom_components.tuya_ble.tuya_ble import connection_scheduler
+from custom_components.tuya_ble.tuya_ble.const import (
+    GATT_MTU,
+    GATT_MTU_MAX,
+    INPUT_BUFFER_KEEP,
+    INPUT_FRAME_MAX,
+    TuyaBLECode,
+    TuyaBLEDataPointType,
+)
+
+from custom_components.tuya_ble.tuya_ble.tuya_ble import TuyaBLEDevice
+
+from .simulator import SIMULATOR_SOURCE, TuyaBLESimulator
+
+DATAPOINTS = {
+    101: (TuyaBLEDataPointType.DT_VALUE, 20),
+    102: (TuyaBLEDataPointType.DT_BOOL, True),
+    103: (TuyaBLEDataPointType.DT_RAW, b"\x01" * 200),
+}
+
+
+async def wait_for(condition: Callable[[], bool], timeout: float = 1.0) -> None:
+    async def _poll() -> None:
+        while not condition():
+            await asyncio.sleep(0.005)
+
+    await asyncio.wait_for(_poll(), timeout)
+
+
+def run(test: Callable[[TuyaBLESimulator], Awaitable[None]]) -> None:
+    async def _run() -> None:
+        simulator = TuyaBLESimulator()
+        try:
+            await test(simulator)
+        finally:
+            for simulated in simulator.devices:
+                await simulated.disconnect()
+
+    asyncio.run(_run())
+
+
+@pytest.mark.parametrize("protocol_version", [3, 4])
+@pytest.mark.parametrize("mtu", [GATT_MTU, GATT_MTU_MAX])
+def test_connect_and_status(protocol_version: int, mtu: int) -> None:
+    async def test(simulator: TuyaBLESimulator) -> None:
+        simulated = simulator.add_device(
+            "AA:BB:CC:DD:00:01",
+            datapoints=DATAPOINTS,
+            protocol_version=protocol_version,
+            mtu=mtu,
+        )
+        device = simulator.create_device(simulated)
+        await device.initialize()
+        await device.update()
+        await wait_for(lambda: len(device.datapoints) == len(DATAPOINTS))
+        assert device.is_connected
+        assert simulated.is_paired
+        for dp_id, (dp_type, value) in DATAPOINTS.items():
+            assert device.datapoints[dp_id].type == dp_type
+            assert device.datapoints[dp_id].value == value
+        await device.stop()
+
+    run(test)
+
+
+@pytest.mark.parametrize("protocol_version", [3, 4])
+def test_write_round_trip(protocol_version: int) -> None:
+    async def test(simulator: TuyaBLESimulator) -> None:
+        simulated = simulator.add_device(
+            "AA:BB:CC:DD:00:01",
+            datapoints=DATAPOINTS,
+            protocol_version=protocol_version,
+            latency=0.001,
+        )
+        device = simulator.create_device(simulated)
+        await device.initialize()
+        await device.update()
+        await wait_for(lambda: device.datapoints[101] is not None)
+
+        requests: list[TuyaBLECode] = []
+        handle_request = simulated._handle_request
+
+        def record_request(seq_num: int, code: TuyaBLECode, data: bytes) -> None:
+            requests.append(code)
+            handle_request(seq_num, code, data)
+
+        simulated._handle_request = record_request
+        async with device.datapoints.batch():
+            await device.datapoints[101].set_value(-7)
+            await device.datapoints[102].set_value(False)
+        assert requests == [
+            TuyaBLECode.FUN_SENDER_DPS
+            if protocol_version == 3
+            else TuyaBLECode.FUN_SENDER_DPS_V4
+        ]
+        assert simulated.datapoints[101] == (TuyaBLEDataPointType.DT_VALUE, -7)
+        assert simulated.datapoints[102] == (TuyaBLEDataPointType.DT_BOOL, False)
+        await device.stop()
+
+    run(test)
+
+
+@pytest.mark.parametrize(
+    "report_code",
+    [TuyaBLECode.FUN_RECEIVE_DP, TuyaBLECode.FUN_RECEIVE_TIME_DP],
+)
+def test_device_reports(report_code: TuyaBLECode) -> None:
+    async def test(simulator: TuyaBLESimulator) -> None:
+        simulated = simulator.add_device(
+            "AA:BB:CC:DD:00:01", datapoints=DATAPOINTS, report_code=report_code
+        )
+        device = simulator.create_device(simulated)
+        await device.initialize()
+        await device.update()
+        await wait_for(lambda: device.datapoints[102] is not None)
+
+        await simulated.report_datapoints(
+            {102: (TuyaBLEDataPointType.DT_BOOL, False)}
+        )
+        await wait_for(lambda: device.datapoints[102].value is False)
+        assert device.datapoints[102].changed_by_device
+        await device.stop()
+
+    run(test)
+
+
+def test_time_request() -> None:
+    async def test(simulator: TuyaBLESimulator) -> None:
+        simulated = simulator.add_device("AA:BB:CC:DD:00:01", datapoints=DATAPOINTS)
+        device = simulator.create_device(simulated)
+        await device.initialize()
+        await device.update()
+
+        await simulated.request_time(TuyaBLECode.FUN_RECEIVE_TIME2_REQ)
+        await wait_for(
+            lambda: TuyaBLECode.FUN_RECEIVE_TIME2_REQ in simulated.time_responses
+        )
+        await device.stop()
+
+    run(test)
+
+
+def test_input_buffer_is_bounded() -> None:
+    async def test(simulator: TuyaBLESimulator) -> None:
+        datapoints = {104: (TuyaBLEDataPointType.DT_RAW, b"\x02" * 2000)}
+        simulated = simulator.add_device(
+            "AA:BB:CC:DD:00:01", datapoints=datapoints, protocol_version=4
+        )
+        device = simulator.create_device(simulated)
+        await device.initialize()
+        await device.update()
+        await wait_for(lambda: device.datapoints[104] is not None)
+        assert device.datapoints[104].value == b"\x02" * 2000
+        assert len(device._input_buffer) <= INPUT_BUFFER_KEEP
+
+        # A corrupted length is dropped before anything is allocated
+        header = TuyaBLEDevice._pack_int(0) + TuyaBLEDevice._pack_int(
+            INPUT_FRAME_MAX + 1
+        )
+        device._notification_handler(0, bytearray(header + b"\x00\x01"))
+        assert len(device._input_buffer) <= INPUT_BUFFER_KEEP
+        assert device._input_expected_length == 0
+
+        await simulated.report_datapoints(
+            {104: (TuyaBLEDataPointType.DT_RAW, b"\x03")}
+        )
+        await wait_for(lambda: device.datapoints[104].value == b"\x03")
+        await device.stop()
+
+    run(test)
+
+
+def test_fleet_connects_in_one_loop() -> None:
+    async def test(simulator: TuyaBLESimulator) -> None:
+        connection_scheduler.set_slots(SIMULATOR_SOURCE, 100)
+        devices = []
+        for index in range(100):
+            simulated = simulator.add_device(
+                "AA:BB:CC:DD:00:%02X" % index,
+                datapoints=DATAPOINTS,
+                protocol_version=3 + index % 2,
+                latency=0.002,
+            )
+            device = simulator.create_device(simulated)
+            await device.initialize()
+            devices.append(device)
+
+        await asyncio.gather(*(device.update() for device in devices))
+        await wait_for(
+            lambda: all(device.datapoints[103] is not None for device in devices)
+        )
+        assert all(device.is_connected for device in devices)
+        await asyncio.gather(*(device.stop() for device in devices))
+
+    run(test)
+
+
+def test_snapshot_round_trip() -> None:
+    async def test(simulator: TuyaBLESimulator) -> None:
+        datapoints = {
+            **DATAPOINTS,
+            104: (TuyaBLEDataPointType.DT_ENUM, 0x90),
+            105: (TuyaBLEDataPointType.DT_STRING, "text"),
+        }
+        simulated = simulator.add_device("AA:BB:CC:DD:00:01", datapoints=datapoints)
+        device = simulator.create_device(simulated)
+        await device.initialize()
+        await device.update()
+        await wait_for(lambda: device.datapoints[105] is not None)
+        # Never reported by the device, so not saved
+        device.datapoints.get_or_create(106, TuyaBLEDataPointType.DT_BOOL, False)
+        snapshot = device.snapshot()
+        await device.stop()
+
+        assert sorted(item[0] for item in snapshot["datapoints"]) == sorted(datapoints)
+        restored = simulator.create_device(simulated)
+        restored.restore_snapshot(snapshot)
+        for dp_id, (dp_type, value) in datapoints.items():
+            assert restored.datapoints[dp_id].type == dp_type
+            assert restored.datapoints[dp_id].value == value
+        assert restored.snapshot() == snapshot
+
+    run(test)
+
+
+def test_try_connect() -> None:
+    async def test(simulator: TuyaBLESimulator) -> None:
+        simulated = simulator.add_device("AA:BB:CC:DD:00:01", datapoints=DATAPOINTS)
+        device = simulator.create_device(simulated)
+        await device.initialize()
+
+        simulated.reachable = False
+        assert not await device.try_connect()
+        # A single failed attempt does not make connects fail fast
+        assert not device._circuit_breaker.is_open
+
+        simulated.reachable = True
+        assert await device.try_connect()
+        assert device.is_connected
+        assert await device.try_connect()
+        await device.stop()
+
+    run(test)
@@ -0,0 +1,232 @@
+"""Local stub of the Tuya OpenAPI endpoints used by the integration.
+
+The stub checks request signatures the way the cloud does and counts
+requests, so tests can tell how many logins, refreshes and factory info
+requests the client made and how many of them ran at once.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import hmac
+import time
+from typing import Any
+
+from aiohttp import web
+
+from custom_components.tuya_ble.const import (
+    TUYA_API_CUSTOM_LOGIN_URL,
+    TUYA_API_CUSTOM_REFRESH_TOKEN_URL,
+    TUYA_API_DEVICES_URL,
+    TUYA_API_SMART_HOME_LOGIN_URL,
+    TUYA_API_SMART_HOME_REFRESH_TOKEN_URL,
+    TUYA_API_TOKEN_INVALID,
+)
+
+ACCESS_ID = "stub-access-id"
+ACCESS_SECRET = "stub-access-secret"
+UID = "stub-uid"
+
+FACTORY_INFO_PATH = "/v1.0/iot-03/devices/factory-infos"
+
+
+def create_devices(count: int) -> list[dict[str, Any]]:
+    """Create device list entries with factory infos derived from index."""
+    return [
+        {
+            "id": "device%04d" % (index),
+            "uuid": "uuid%04d" % (index),
+            "local_key": "key%04d" % (index),
+            "category": "szjqr",
+            "product_id": "product",
+            "name": "Device %d" % (index),
+            "model": "model",
+            "product_name": "Fingerbot",
+            "mac": "dc23%08x" % (index),
+        }
+        for index in range(count)
+    ]
+
+
+def get_address(device: dict[str, Any]) -> str:
+    """Address the integration derives from factory info of the device."""
+    mac = device["mac"]
+    return ":".join(mac[i : i + 2] for i in range(0, 12, 2)).upper()
+
+
+class TuyaCloudStub:
+    """Tuya OpenAPI served on a local port.
+
+    Answers listed in failures by request path, without query, are sent
+    before the request is handled: integers as HTTP statuses, dicts as
+    JSON responses.
+    """
+
+    def __init__(
+        self,
+        devices: list[dict[str, Any]] | None = None,
+        latency: float = 0.0,
+        expire: int = 7200,
+    ) -> None:
+        self.devices = devices or []
+        self.latency = latency
+        self.expire = expire
+        self.failures: dict[str, list[int | dict[str, Any]]] = {}
+        self.access_token = ""
+        self.refresh_token = ""
+        self.logins = 0
+        # Headers of the last login request
+        self.login_headers: dict[str, str] = {}
+        self.refreshes = 0
+        self.requests: list[str] = []
+        self.factory_info_requests: list[list[str]] = []
+        self.concurrent = 0
+        self.max_concurrent = 0
+        self._tokens = 0
+        self._runner: web.AppRunner | None = None
+        self.endpoint = ""
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_route("*", "/{path:.*}", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.endpoint = f"http://127.0.0.1:{port}"
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> TuyaCloudStub:
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.stop()
+
+    def revoke_token(self) -> None:
+        """Make the cloud reject the issued access token."""
+        self.access_token = "revoked"
+
+    def _issue_token(self) -> dict[str, Any]:
+        self._tokens += 1
+        self.access_token = "access%d" % (self._tokens)
+        self.refresh_token = "refresh%d" % (self._tokens)
+        return self._success(
+            {
+                "access_token": self.access_token,
+                "refresh_token": self.refresh_token,
+                "uid": UID,
+                "expire_time": self.expire,
+            }
+        )
+
+    @staticmethod
+    def _success(result: Any) -> dict[str, Any]:
+        return {"success": True, "t": int(time.time() * 1000), "result": result}
+
+    @staticmethod
+    def _failure(code: int, msg: str) -> dict[str, Any]:
+        return {
+            "success": False,
+            "t": int(time.time() * 1000),
+            "code": code,
+            "msg": msg,
+        }
+
+    def _is_signed(self, request: web.Request, body: bytes) -> bool:
+        headers = request.headers
+        str_to_sign = "\n".join(
+            (
+                request.method,
+                hashlib.sha256(body).hexdigest().lower(),
+                "",
+                request.raw_path,
+            )
+        )
+        message = (
+            headers.get("client_id", "")
+            + headers.get("access_token", "")
+            + headers.get("t", "")
+            + str_to_sign
+        )
+        sign = (
+            hmac.new(
+                ACCESS_SECRET.encode("utf8"),
+                msg=message.encode("utf8"),
+                digestmod=hashlib.sha256,
+            )
+            .hexdigest()
+            .upper()
+        )
+        return (
+            headers.get("client_id") == ACCESS_ID
+            and headers.get("sign_method") == "HMAC-SHA256"
+            and hmac.compare_digest(headers.get("sign", ""), sign)
+        )
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        body = await request.read()
+        path = request.path
+        self.requests.append(path)
+        failures = self.failures.get(path)
+        if failures:
+            failure = failures.pop(0)
+            if isinstance(failure, int):
+                return web.Response(status=failure)
+            return web.json_response(failure)
+        if not self._is_signed(request, body):
+            return web.json_response(self._failure(1004, "sign invalid"))
+
+        if path in (TUYA_API_SMART_HOME_LOGIN_URL, TUYA_API_CUSTOM_LOGIN_URL):
+            if request.headers.get("access_token"):
+                return web.json_response(self._failure(1004, "sign invalid"))
+            self.logins += 1
+            self.login_headers = dict(request.headers)
+            return web.json_response(self._issue_token())
+        for refresh_path in (
+            TUYA_API_SMART_HOME_REFRESH_TOKEN_URL,
+            TUYA_API_CUSTOM_REFRESH_TOKEN_URL,
+        ):
+            if path.startswith(refresh_path % ("")):
+                self.refreshes += 1
+                if path != refresh_path % (self.refresh_token):
+                    return web.json_response(
+                        self._failure(1012, "refresh token invalid")
+                    )
+                return web.json_response(self._issue_token())
+
+        if request.headers.get("access_token") != self.access_token:
+            return web.json_response(
+                self._failure(TUYA_API_TOKEN_INVALID, "token invalid")
+            )
+        if path == TUYA_API_DEVICES_URL % (UID):
+            await asyncio.sleep(self.latency)
+            return web.json_response(
+                self._success(
+                    [
+                        {key: value for key, value in device.items() if key != "mac"}
+                        for device in self.devices
+                    ]
+                )
+            )
+        if path == FACTORY_INFO_PATH:
+            ids = request.query["device_ids"].split(",")
+            self.factory_info_requests.append(ids)
+            self.concurrent += 1
+            self.max_concurrent = max(self.max_concurrent, self.concurrent)
+            try:
+                await asyncio.sleep(self.latency)
+            finally:
+                self.concurrent -= 1
+            macs = {device["id"]: device["mac"] for device in self.devices}
+            return web.json_response(
+                self._success(
+                    [{"id": id, "mac": macs[id]} for id in ids if id in macs]
+                )
+            )
+        return web.json_response(self._failure(1108, "uri path invalid"))